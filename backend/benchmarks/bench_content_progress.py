@@ -0,0 +1,74 @@
+# benchmarks/bench_content_progress.py
+"""
+Latency of GET /api/content-progress/<id> with the shared Prisma client versus
+connecting and disconnecting around every request, as the app used to do.
+
+Run from the backend directory against a migrated database:
+
+    DATABASE_URL=file:./bench.db python -m benchmarks.bench_content_progress --requests 500
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+from src.app import create_app
+from src.prisma import prisma, get_database_loop, run_on_database_loop, init_prisma, disconnect_prisma
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def seed_content() -> int:
+    content = asyncio.run(run_on_database_loop(prisma.content.create(data={
+        "title": "Benchmark content",
+        "videoSubject": "Benchmark",
+        "status": "processing",
+        "progress": 42,
+        "currentStep": "voice",
+    })))
+    return content.id
+
+def measure(app, content_id: int, requests: int) -> List[float]:
+    client = app.test_client()
+    client.get(f'/api/content-progress/{content_id}')  # warm up
+    samples = []
+    for _ in range(requests):
+        start_time = time.perf_counter()
+        response = client.get(f'/api/content-progress/{content_id}')
+        samples.append((time.perf_counter() - start_time) * 1000)
+        assert response.status_code == 200, response.data
+    return samples
+
+def reconnecting_app():
+    app = create_app()
+
+    @app.before_request
+    async def connect():
+        await run_on_database_loop(init_prisma())
+
+    @app.teardown_appcontext
+    def disconnect(exception=None):
+        asyncio.run_coroutine_threadsafe(disconnect_prisma(), get_database_loop()).result()
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    app = create_app()
+    content_id = seed_content()
+
+    results = {"shared client": measure(app, content_id, args.requests)}
+    results["reconnect per request"] = measure(reconnecting_app(), content_id, args.requests)
+
+    print(f"{'mode':<24}{'p50 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+    for mode, samples in results.items():
+        print(f"{mode:<24}{percentile(samples, 50):>10.2f}{percentile(samples, 99):>10.2f}{statistics.mean(samples):>10.2f}")
+
+if __name__ == '__main__':
+    main()
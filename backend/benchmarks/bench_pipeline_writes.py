@@ -0,0 +1,155 @@
+# benchmarks/bench_pipeline_writes.py
+"""
+Write transactions per video and pipeline throughput with the stage updates committed
+one stage at a time versus coalesced into a single unit of work.
+
+Both paths that create contents are measured: the batch path (process_input), and the
+worker path, which also claims, checkpoints after every stage and completes a job per video.
+The scripts of both are stored through the shared content insert batcher, whose bulk
+inserts are counted along with the pipeline's own transactions.
+The providers are replaced by instant fakes so that only the database work is measured.
+Run from the backend directory against a migrated SQLite database:
+
+    DATABASE_URL=file:./bench.db python -m benchmarks.bench_pipeline_writes --entries 200 --concurrency 10
+"""
+import argparse
+import asyncio
+import time
+
+from shared.types.ContentCreation import ContentCreationRequest
+from src import content_pipeline as pipeline_module
+from src import job_queue as job_queue_module
+from src.content_pipeline import ContentCreationPipeline
+from src.job_queue import JobQueue
+from src.models import get_content_inserts
+from src.prisma import init_prisma, disconnect_prisma, prisma, run_write
+from src.progress_tracker import progress_writer
+from src.worker import ContentWorker
+from src.services import Scene, VideoContent
+
+def make_request(index: int, scenes: int) -> ContentCreationRequest:
+    return ContentCreationRequest.parse_obj({
+        "title": f"Benchmark {index}",
+        "videoSubject": f"Benchmark subject {index}",
+        "generalOptions": {
+            "style": "cinematic",
+            "description": "Benchmark",
+            "sceneAmount": scenes,
+            "duration": 60,
+            "tone": "neutral",
+            "vocabulary": "simple",
+            "targetAudience": "everyone",
+            "services": {
+                "generate_image": True,
+                "generate_voice": True,
+                "generate_music": True,
+                "generate_video": True,
+            },
+        },
+        "contentOptions": {"pacing": "medium", "description": "Benchmark"},
+        "visualPromptOptions": {
+            "pictureDescription": "Benchmark",
+            "style": "photo",
+            "imageDetails": "none",
+            "shotDetails": "wide",
+        },
+    })
+
+def install_fake_providers(scenes: int):
+    content = VideoContent(
+        video_title="Benchmark video",
+        description="Benchmark",
+        main_scenes=[Scene(scene_description=f"Scene {n}", visual_prompt=f"Visual {n}") for n in range(1, scenes + 1)],
+    )
+
+    async def generate_content(prompt, on_scene=None, **kwargs):
+        if on_scene:
+            for scene_number, scene in enumerate(content.main_scenes, start=1):
+                on_scene(scene_number, scene)
+        return content
+
+    async def generate_asset(*args, **kwargs):
+        return "http://example.com/asset"
+
+    pipeline_module.generate_content_with_openai = generate_content
+    for name in ('generate_image', 'generate_voice', 'generate_music', 'generate_video'):
+        setattr(pipeline_module, name, generate_asset)
+
+# Write transactions of the job queue, counted around its run_write
+queue_writes = 0
+
+def count_queue_writes():
+    async def counted_run_write(operation):
+        global queue_writes
+        queue_writes += 1
+        return await run_write(operation)
+
+    job_queue_module.run_write = counted_run_write
+
+async def run_mode(coalesce_writes: bool, entries: int, concurrency: int, scenes: int):
+    pipeline = ContentCreationPipeline("prompt_templates.yaml", max_concurrency=concurrency)
+    pipeline.coalesce_writes = coalesce_writes
+    requests = [make_request(index, scenes) for index in range(entries)]
+    inserts = get_content_inserts().get_stats()["batches"]
+    _, run_stats = await pipeline.process_input(requests)
+    stats = pipeline.write_stats
+    inserts = get_content_inserts().get_stats()["batches"] - inserts
+    return {
+        "write transactions / video": (stats["write_transactions"] + inserts) / max(stats["contents"], 1),
+        "videos / minute": run_stats["entries_per_minute"],
+    }
+
+async def run_worker_mode(coalesce_writes: bool, entries: int, concurrency: int, scenes: int):
+    global queue_writes
+    # The worker runs jobs through the shared pipeline
+    pipeline = pipeline_module.content_pipeline
+    pipeline.coalesce_writes = coalesce_writes
+    pipeline.write_stats = {"contents": 0, "write_transactions": 0}
+    queue = JobQueue()
+    jobs = await queue.enqueue([make_request(index, scenes) for index in range(entries)])
+    job_ids = [job["jobId"] for job in jobs]
+    queue_writes = 0
+    inserts = get_content_inserts().get_stats()["batches"]
+    worker = ContentWorker("bench", queue=queue, concurrency=concurrency)
+    worker.poll_interval = 0.05
+    start_time = time.perf_counter()
+    run = asyncio.ensure_future(worker.run())
+    while await prisma.job.count(where={"id": {"in": job_ids}, "status": {"in": ["queued", "running"]}}):
+        await asyncio.sleep(0.05)
+    elapsed_time = time.perf_counter() - start_time
+    worker.stop()
+    await run
+    stats = pipeline.write_stats
+    inserts = get_content_inserts().get_stats()["batches"] - inserts
+    return {
+        "write transactions / video": (stats["write_transactions"] + inserts + queue_writes) / max(stats["contents"], 1),
+        "videos / minute": entries / elapsed_time * 60,
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--scenes', type=int, default=5)
+    args = parser.parse_args()
+
+    install_fake_providers(args.scenes)
+    count_queue_writes()
+    await init_prisma()
+    try:
+        results = {
+            ("batch", "one per stage"): await run_mode(False, args.entries, args.concurrency, args.scenes),
+            ("batch", "unit of work"): await run_mode(True, args.entries, args.concurrency, args.scenes),
+            ("worker", "one per stage"): await run_worker_mode(False, args.entries, args.concurrency, args.scenes),
+            ("worker", "unit of work"): await run_worker_mode(True, args.entries, args.concurrency, args.scenes),
+        }
+        await progress_writer.close()
+    finally:
+        await disconnect_prisma()
+
+    print(f"{'path':<8}{'mode':<16}{'writes/video':>14}{'videos/min':>14}")
+    for (path, mode), result in results.items():
+        print(f"{path:<8}{mode:<16}{result['write transactions / video']:>14.2f}{result['videos / minute']:>14.1f}")
+
+if __name__ == '__main__':
+    asyncio.run(main())
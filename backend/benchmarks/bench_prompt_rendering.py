@@ -0,0 +1,86 @@
+# benchmarks/bench_prompt_rendering.py
+"""
+Prompts rendered per second from src/prompt_templates.yaml.
+
+Compares the previous per-call path (templates loaded from YAML for every request, then
+the template text scanned once per keyword argument before str.format) with a
+PromptGenerator built once per request and with a long-lived one, both rendering from
+the process-wide compiled templates. Then times a bulk import sized list of subjects
+rendered one generate_prompt call at a time and through render_many. Run from the
+backend directory:
+
+    python -m benchmarks.bench_prompt_rendering --seconds 2 --rows 100000
+"""
+import argparse
+import logging
+import os
+import time
+from typing import Callable, Dict
+
+import yaml
+
+from src.prompt_generator import PromptGenerator
+
+TEMPLATE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'prompt_templates.yaml')
+VARIABLES = {
+    "title": "The history of the printing press",
+    "scene_amount": 10,
+    "video_length": 60,
+    "style": "Photorealistic, Cinematic",
+    "target_audience": "high school students",
+    "videoSubject": "Printing press",
+    "generalOptions": {"style": "cinematic", "sceneAmount": 10},
+}
+
+def render_uncompiled() -> str:
+    with open(TEMPLATE_FILE, 'r') as file:
+        templates = yaml.safe_load(file)
+    template = templates["video_content"]['template']
+    filtered_kwargs = {k: v for k, v in VARIABLES.items() if f"{{{k}}}" in template}
+    return template.format(**filtered_kwargs)
+
+def rate(render: Callable[[], str], seconds: float) -> float:
+    count = 0
+    start_time = time.perf_counter()
+    deadline = start_time + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            render()
+        count += 100
+    return count / (time.perf_counter() - start_time)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=2.0)
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+    # The request fields that are not template variables would log a warning per render
+    logging.getLogger('src.prompt_generator').setLevel(logging.ERROR)
+
+    generator = PromptGenerator(TEMPLATE_FILE)
+    expected = render_uncompiled()
+    assert generator.generate_prompt("video_content", **VARIABLES) == expected
+
+    cases: Dict[str, Callable[[], str]] = {
+        "parse YAML per call + str.format": render_uncompiled,
+        "new PromptGenerator per call": lambda: PromptGenerator(TEMPLATE_FILE).generate_prompt("video_content", **VARIABLES),
+        "shared PromptGenerator": lambda: generator.generate_prompt("video_content", **VARIABLES),
+    }
+    print(f"  {'renderer':<36}{'prompts/s':>14}")
+    for name, render in cases.items():
+        print(f"  {name:<36}{rate(render, args.seconds):>14,.0f}")
+
+
+    rows = [dict(VARIABLES, title=f"Subject {index}") for index in range(args.rows)]
+    bulk: Dict[str, Callable[[], object]] = {
+        "generate_prompt per row": lambda: [generator.generate_prompt("video_content", **row) for row in rows],
+        "render_many": lambda: list(generator.render_many("video_content", rows)),
+    }
+    print(f"  {'bulk renderer':<36}{f'{args.rows} rows, s':>14}")
+    for name, render in bulk.items():
+        start_time = time.perf_counter()
+        render()
+        print(f"  {name:<36}{time.perf_counter() - start_time:>14.2f}")
+
+if __name__ == '__main__':
+    main()
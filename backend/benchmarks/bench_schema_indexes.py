@@ -0,0 +1,130 @@
+# benchmarks/bench_schema_indexes.py
+"""
+Latency of the hot read paths on a seeded SQLite database before and after the
+hot path index migration, and of full-row versus projected progress reads.
+
+The database is built from the Prisma migrations in shared/prisma/migrations, seeded
+with sqlite3 directly and deleted afterwards. Run from the backend directory:
+
+    python -m benchmarks.bench_schema_indexes --contents 100000
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'shared', 'prisma', 'migrations')
+INDEX_MIGRATION = '20261018110000_add_hot_path_indexes'
+STATUSES = ['pending', 'processing', 'completed', 'failed']
+
+def apply_migrations(connection: sqlite3.Connection, until: str):
+    for name in sorted(os.listdir(MIGRATIONS_DIR)):
+        path = os.path.join(MIGRATIONS_DIR, name, 'migration.sql')
+        if name >= until or not os.path.isfile(path):
+            continue
+        with open(path) as file:
+            connection.executescript(file.read())
+
+def apply_migration(connection: sqlite3.Connection, name: str):
+    with open(os.path.join(MIGRATIONS_DIR, name, 'migration.sql')) as file:
+        connection.executescript(file.read())
+    connection.execute('ANALYZE')
+
+def seed(connection: sqlite3.Connection, contents: int, scenes: int):
+    # Prisma stores SQLite DateTime values as milliseconds since the epoch
+    now = int(time.time() * 1000)
+    generated_content = json.dumps({
+        "video_title": "Seeded video",
+        "description": "x" * 500,
+        "main_scenes": [{"scene_description": "d" * 300, "visual_prompt": "v" * 300} for _ in range(scenes)],
+    })
+    batch_size = 10000
+    for start in range(1, contents + 1, batch_size):
+        ids = range(start, min(start + batch_size, contents + 1))
+        connection.executemany(
+            'INSERT INTO "Content" ("id", "title", "videoSubject", "status", "progress", "currentStep", "generatedContent", "createdAt", "updatedAt") '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            [(i, f"Video {i}", f"Subject {i}", random.choice(STATUSES), random.random() * 100, "images generated",
+              generated_content, now - (contents - i) * 1000, now) for i in ids],
+        )
+        connection.executemany(
+            'INSERT INTO "Scene" ("type", "description", "contentId") VALUES (?, ?, ?)',
+            [("main", f"Scene {n}", i) for i in ids for n in range(1, scenes + 1)],
+        )
+        for table in ('AudioPrompt', 'VisualPrompt'):
+            connection.executemany(
+                f'INSERT INTO "{table}" ("type", "sceneNumber", "description", "contentId") VALUES (?, ?, ?, ?)',
+                [("scene", n, f"Prompt {n}", i) for i in ids for n in range(1, scenes + 1)],
+            )
+    connection.commit()
+
+def measure(query: Callable[[], None], repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        query()
+        samples.append((time.perf_counter() - start_time) * 1000)
+    return samples
+
+def hot_paths(connection: sqlite3.Connection, contents: int) -> Dict[str, Callable[[], None]]:
+    def content_id() -> int:
+        return random.randint(1, contents)
+
+    return {
+        "scenes of content": lambda: connection.execute(
+            'SELECT * FROM "Scene" WHERE "contentId" = ?', (content_id(),)).fetchall(),
+        "visual prompts of content": lambda: connection.execute(
+            'SELECT * FROM "VisualPrompt" WHERE "contentId" = ? ORDER BY "sceneNumber"', (content_id(),)).fetchall(),
+        "audio prompt of scene": lambda: connection.execute(
+            'SELECT "id" FROM "AudioPrompt" WHERE "contentId" = ? AND "sceneNumber" = ?', (content_id(), 3)).fetchall(),
+        "latest by status": lambda: connection.execute(
+            'SELECT "id", "title", "status", "createdAt" FROM "Content" WHERE "status" = ? ORDER BY "createdAt" DESC LIMIT 20',
+            (random.choice(STATUSES),)).fetchall(),
+    }
+
+def progress_reads(connection: sqlite3.Connection, contents: int) -> Dict[str, Callable[[], None]]:
+    return {
+        "progress, full row": lambda: connection.execute(
+            'SELECT * FROM "Content" WHERE "id" = ?', (random.randint(1, contents),)).fetchall(),
+        "progress, projected": lambda: connection.execute(
+            'SELECT "id", "status", "progress", "currentStep" FROM "Content" WHERE "id" = ?', (random.randint(1, contents),)).fetchall(),
+    }
+
+def report(title: str, results: Dict[str, List[float]]):
+    print(title)
+    print(f"  {'query':<28}{'p50 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+    for name, samples in results.items():
+        ordered = sorted(samples)
+        p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+        print(f"  {name:<28}{statistics.median(samples):>10.3f}{p99:>10.3f}{statistics.mean(samples):>10.3f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--contents', type=int, default=100000)
+    parser.add_argument('--scenes', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        connection = sqlite3.connect(os.path.join(directory, 'bench.db'))
+        apply_migrations(connection, until=INDEX_MIGRATION)
+        start_time = time.perf_counter()
+        seed(connection, args.contents, args.scenes)
+        print(f"Seeded {args.contents} contents with {args.scenes} scenes each in {time.perf_counter() - start_time:.1f}s")
+
+        # Fewer repetitions without indexes: every lookup scans a whole table
+        before = {name: measure(query, max(args.repeat // 10, 5)) for name, query in hot_paths(connection, args.contents).items()}
+        apply_migration(connection, INDEX_MIGRATION)
+        after = {name: measure(query, args.repeat) for name, query in hot_paths(connection, args.contents).items()}
+        report("Without indexes", before)
+        report(f"With {INDEX_MIGRATION}", after)
+        report("Progress read", {name: measure(query, args.repeat) for name, query in progress_reads(connection, args.contents).items()})
+        connection.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+# benchmarks/bench_serialization.py
+"""
+Time spent serializing generated content on the write path (model to stored JSON) and on
+the read path (stored JSON to response body), with the stdlib json module and orjson.
+
+The read path compares parsing and re-encoding the stored generatedContent with embedding
+it as raw JSON. Run from the backend directory:
+
+    python -m benchmarks.bench_serialization --scenes 10 --repeat 2000
+"""
+import argparse
+import json
+import statistics
+import time
+from typing import Callable, Dict, List
+
+from src.serialization import RawJSON, get_serializer, orjson
+from src.services import Scene, VideoContent
+
+def make_content(scenes: int) -> VideoContent:
+    return VideoContent(
+        video_title="Benchmark video",
+        description="d" * 400,
+        main_scenes=[Scene(scene_description=f"Scene {n} " + "s" * 300, visual_prompt="v" * 300) for n in range(scenes)],
+    )
+
+def measure(operation: Callable[[], object], repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        operation()
+        samples.append((time.perf_counter() - start_time) * 1000000)
+    return samples
+
+def cases(content: VideoContent) -> Dict[str, Callable[[], object]]:
+    stored = json.dumps(content.dict())
+    row = {"id": 1, "title": "Benchmark video", "status": "completed", "progress": 100.0}
+    results = {
+        "write, json.dumps(model.dict())": lambda: json.dumps(content.dict()),
+    }
+    for library in ['json'] + (['orjson'] if orjson is not None else []):
+        serializer = get_serializer(library)
+        results[f"write, {library} dump_model"] = lambda serializer=serializer: serializer.dump_model(content)
+        results[f"read, {library} loads + dumps"] = (
+            lambda serializer=serializer: serializer.dumps(dict(row, generatedContent=serializer.loads(stored))))
+        results[f"read, {library} raw passthrough"] = (
+            lambda serializer=serializer: serializer.dumps(dict(row, generatedContent=RawJSON(stored))))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenes', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    content = make_content(args.scenes)
+    print(f"Payload: {len(json.dumps(content.dict()))} bytes, {args.scenes} scenes")
+    print(f"  {'operation':<36}{'p50 us':>10}{'p99 us':>10}{'mean us':>10}")
+    for name, operation in cases(content).items():
+        samples = sorted(measure(operation, args.repeat))
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        print(f"  {name:<36}{statistics.median(samples):>10.1f}{p99:>10.1f}{statistics.mean(samples):>10.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -1,33 +1,68 @@
-from flask import Flask, request, jsonify
+import asyncio
+import atexit
+from flask import Flask, Response, request, jsonify, stream_with_context
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
-from prisma import Prisma
-from shared.types.ContentCreation import ContentCreationRequest, ContentCreationResponse
-from .content_creation import create_content
-import os
-import yaml
+from shared.types.ContentCreation import ContentCreationRequest
+from .bulk_ingest import BulkIngestor, iter_lines, parse_csv, parse_ndjson
+from .config import load_config
+from .job_queue import ContentJobInProgress, IdempotencyKeyMismatch, JobQueue
+from .llm_client import close_on_shutdown as close_llm_client_on_shutdown
+from .models import find_content_progress, list_content_summaries, get_content_response, get_content_cache, get_json_serializer, get_token_usage
+from .prisma import connect_on_startup, disconnect_on_shutdown, get_database_loop, run_on_database_loop
+from .progress_events import ProgressFeed, progress_broker, format_sse
+from .progress_tracker import get_progress_channel
+from .serialization import JSONSerializer
 
-prisma = Prisma()
+class SerializerJSONProvider(JSONProvider):
+    """
+    Flask JSON provider backed by the configured serializer, so jsonify writes bytes directly.
+    """
+    def __init__(self, app: Flask, serializer: JSONSerializer):
+        super().__init__(app)
+        self.serializer = serializer
 
-def load_config():
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    config_path = os.path.join(current_dir, 'config.yaml')
-    
-    with open(config_path, 'r') as file:
-        return yaml.safe_load(file)
+    def dumps(self, obj, **kwargs) -> str:
+        return self.serializer.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return self.serializer.loads(s)
+
+    def response(self, *args, **kwargs) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.serializer.dumps(obj), mimetype='application/json')
 
 def create_app(config_name=None):
     app = Flask(__name__)
+    app.json = SerializerJSONProvider(app, get_json_serializer())
     CORS(app)
     
     config = load_config()
+    job_queue = JobQueue()
     
-    @app.before_request
-    async def before_request():
-        await prisma.connect()
+    # One connection for the life of the process instead of one per request
+    connect_on_startup()
+    atexit.register(disconnect_on_shutdown)
+    # Registered last so it runs first, while the database loop is still running
+    atexit.register(close_llm_client_on_shutdown, get_database_loop())
+
+    progress_settings = config.get('progress', {})
+    contents_settings = config.get('contents', {})
+    bulk_settings = config.get('bulk_ingest', {})
 
-    @app.teardown_appcontext
-    async def shutdown_session(exception=None):
-        await prisma.disconnect()
+    def fetch_progress(content_ids):
+        contents = asyncio.run_coroutine_threadsafe(find_content_progress(content_ids), get_database_loop()).result()
+        return [{
+            'contentId': content['id'],
+            'status': content['status'],
+            'progress': content['progress'],
+            'currentStep': content['currentStep'],
+            'eventId': int(content['updatedAt'].timestamp() * 1000),
+        } for content in contents]
+
+    progress_feed = ProgressFeed(progress_broker, fetch_progress, interval=progress_settings.get('stream_poll_interval', 1.0))
+    # Workers push their events through the channel when there is one; the feed polls otherwise
+    progress_channel = get_progress_channel()
 
     @app.route('/api/create-content', methods=['POST'])
     async def create_content_endpoint():
@@ -35,21 +70,176 @@ def create_app(config_name=None):
         if not data:
             return jsonify({'error': 'No data provided'}), 400
 
+        # Retrying with the same key returns the jobs of the first attempt, also across restarts
+        idempotency_key = request.headers.get('Idempotency-Key')
+        if idempotency_key is not None and not 0 < len(idempotency_key) <= 255:
+            return jsonify({'error': 'Idempotency-Key must be 1 to 255 characters'}), 400
+
         try:
             if isinstance(data, list):
                 content_requests = [ContentCreationRequest(**item) for item in data]
+                idempotency_keys = [f"{idempotency_key}:{index}" for index in range(len(data))] if idempotency_key else None
             else:
                 content_requests = [ContentCreationRequest(**data)]
+                idempotency_keys = [idempotency_key] if idempotency_key else None
 
-            results = await create_content(content_requests)
+            jobs = await run_on_database_loop(job_queue.enqueue(content_requests, idempotency_keys))
             
-            return jsonify([ContentCreationResponse(**result).dict() for result in results]), 201
+            return jsonify(jobs), 202
+        except IdempotencyKeyMismatch as e:
+            return jsonify({'error': str(e)}), 422
         except Exception as e:
             app.logger.error(f"Error in content creation: {str(e)}")
             return jsonify({'error': str(e)}), 500
 
+    @app.route('/api/create-content/bulk', methods=['POST'])
+    def create_content_bulk():
+        # Rows are read from the body while results are written, so nothing holds the whole upload
+        content_format = request.args.get('format') or ('csv' if request.mimetype == 'text/csv' else 'ndjson')
+        if content_format not in ('csv', 'ndjson'):
+            return jsonify({'error': f"Unsupported format: {content_format}"}), 400
+        parse = parse_csv if content_format == 'csv' else parse_ndjson
+        ingestor = BulkIngestor(
+            ContentCreationRequest.parse_obj,
+            lambda requests: asyncio.run_coroutine_threadsafe(job_queue.enqueue(requests), get_database_loop()),
+            batch_size=bulk_settings.get('batch_size', 100),
+            max_in_flight=bulk_settings.get('max_in_flight_batches', 2),
+        )
+        serializer = get_json_serializer()
+
+        def results():
+            rows = parse(iter_lines(request.stream, bulk_settings.get('max_line_bytes', 65536)))
+            for result in ingestor.ingest(rows):
+                yield serializer.dumps(result) + b'\n'
+
+        return Response(
+            stream_with_context(results()),
+            mimetype='application/x-ndjson',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+        )
+
+    @app.route('/api/jobs/<int:job_id>', methods=['GET'])
+    async def get_job(job_id):
+        job = await run_on_database_loop(job_queue.get_status(job_id))
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify({
+            'jobId': job['id'],
+            'status': job['status'],
+            'contentId': job['contentId'],
+            'lastCompletedStage': job['lastCompletedStage'],
+            'attempts': job['attempts'],
+            'error': job['error'],
+        })
+
+    @app.route('/api/contents', methods=['GET'])
+    async def list_contents():
+        page_size = contents_settings.get('page_size', 20)
+        limit = min(request.args.get('limit', page_size, type=int), contents_settings.get('max_page_size', 100))
+        if limit < 1:
+            return jsonify({'error': 'limit must be positive'}), 400
+        statuses = [status for value in request.args.getlist('status') for status in value.split(',') if status]
+        cursor = request.args.get('cursor') or None
+
+        try:
+            items, next_cursor = await run_on_database_loop(list_content_summaries(limit, statuses, cursor))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        response = jsonify({'items': items, 'nextCursor': next_cursor})
+        response.headers['Cache-Control'] = 'no-cache'
+        response.add_etag()
+        return response.make_conditional(request)
+
+    @app.route('/api/contents/<int:content_id>', methods=['GET'])
+    async def get_content(content_id):
+        body = await run_on_database_loop(get_content_response(content_id))
+        if body is None:
+            return jsonify({'error': 'Content not found'}), 404
+        return Response(body, mimetype='application/json')
+
+    @app.route('/api/contents/<int:content_id>/token-usage', methods=['GET'])
+    async def get_content_token_usage(content_id):
+        if not await run_on_database_loop(find_content_progress([content_id])):
+            return jsonify({'error': 'Content not found'}), 404
+        entries = await run_on_database_loop(get_token_usage(content_id))
+        totals = {
+            column: sum(entry[column] or 0 for entry in entries)
+            for column in ('promptTokens', 'completionTokens', 'estimatedPromptTokens', 'estimatedCompletionTokens')
+        }
+        return jsonify({'contentId': content_id, 'entries': entries, 'totals': totals})
+
+    @app.route('/api/contents/<int:content_id>/regenerate', methods=['POST'])
+    async def regenerate_content(content_id):
+        # Only the stages whose inputs changed run again; the other stored assets are kept
+        data = request.json
+        if not data or not isinstance(data, dict):
+            return jsonify({'error': 'No data provided'}), 400
+        try:
+            content_request = ContentCreationRequest(**data)
+        except Exception as e:
+            return jsonify({'error': str(e)}), 400
+
+        try:
+            job = await run_on_database_loop(job_queue.enqueue_regeneration(content_id, content_request))
+        except ContentJobInProgress as e:
+            return jsonify({'error': str(e), 'jobId': e.job_id}), 409
+        except Exception as e:
+            app.logger.error(f"Error in content regeneration: {str(e)}")
+            return jsonify({'error': str(e)}), 500
+        if job is None:
+            return jsonify({'error': 'Content not found'}), 404
+        return jsonify(job), 202
+
+    @app.route('/api/content-cache/stats', methods=['GET'])
+    def get_content_cache_stats():
+        return jsonify(get_content_cache().get_stats())
+
     @app.route('/api/content-progress/<int:content_id>', methods=['GET'])
     async def get_content_progress(content_id):
-        content = await prisma.content.find_unique(where={"id": content_id})
-        if not content:
-            return jsonify({'error': '
\ No newline at end of file
+        contents = await run_on_database_loop(find_content_progress([content_id]))
+        if not contents:
+            return jsonify({'error': 'Content not found'}), 404
+        return jsonify({
+            'id': contents[0]['id'],
+            'status': contents[0]['status'],
+            'progress': contents[0]['progress'],
+            'currentStep': contents[0]['currentStep'],
+        })
+
+    @app.route('/api/content-progress/<int:content_id>/stream', methods=['GET'])
+    def stream_content_progress(content_id):
+        snapshots = fetch_progress([content_id])
+        if not snapshots:
+            return jsonify({'error': 'Content not found'}), 404
+        last_event_id = request.headers.get('Last-Event-ID', type=int)
+        keepalive_interval = progress_settings.get('keepalive_interval', 15)
+        if progress_channel is None:
+            progress_feed.start()
+        else:
+            progress_channel.start(progress_broker)
+            if progress_broker.latest(content_id) is None:
+                # Pushed events only report changes, so a stream starts from the stored state
+                snapshot = dict(snapshots[0])
+                progress_broker.publish(content_id, snapshot, event_id=snapshot.pop('eventId'))
+        subscription = progress_broker.subscribe(content_id, last_event_id)
+
+        def events():
+            with subscription:
+                yield 'retry: 2000\n\n'
+                while True:
+                    event = subscription.get(timeout=keepalive_interval)
+                    if event is None:
+                        yield ': keepalive\n\n'
+                        continue
+                    event_id, data = event
+                    yield format_sse(event_id, data)
+                    if data.get('status') in ('completed', 'failed'):
+                        return
+
+        return Response(
+            stream_with_context(events()),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+        )
+
+    return app
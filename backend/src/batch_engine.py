@@ -0,0 +1,74 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+class BatchEngine:
+    def __init__(self, max_concurrency: int = 5):
+        """
+        Initialize the BatchEngine.
+
+        :param max_concurrency: Maximum number of entries processed at the same time.
+        :raises: ValueError if max_concurrency is lower than 1.
+        """
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be at least 1, got {max_concurrency}")
+        self.max_concurrency = max_concurrency
+        self.logger = logging.getLogger(__name__)
+
+    async def run(
+        self,
+        items: Iterable[T],
+        worker: Callable[[T, int], Awaitable[R]],
+        on_error: Optional[Callable[[T, int, Exception], Any]] = None,
+    ) -> Tuple[List[Any], Dict[str, Any]]:
+        """
+        Run the worker for every item with at most max_concurrency running at once.
+
+        A failing item does not cancel the others: its slot in the result list is filled
+        with the value returned by on_error, or with the exception itself if no handler is given.
+        The engine keeps no state between runs, so one engine can serve concurrent batches.
+
+        :param items: Entries to process.
+        :param worker: Coroutine function called as worker(item, index), index starting at 1.
+        :param on_error: Optional callback building the result for a failed item.
+        :return: Results in the same order as the input items, and the statistics of the run.
+        """
+        items = list(items)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        failed = 0
+
+        async def run_one(item: T, index: int) -> Any:
+            nonlocal failed
+            async with semaphore:
+                try:
+                    return await worker(item, index)
+                except Exception as e:
+                    failed += 1
+                    self.logger.error(f"Error processing batch entry {index}/{len(items)}: {str(e)}", exc_info=True)
+                    return on_error(item, index, e) if on_error else e
+
+        start_time = time.monotonic()
+        results = await asyncio.gather(*(run_one(item, index) for index, item in enumerate(items, start=1)))
+        elapsed_time = time.monotonic() - start_time
+
+        stats = self._build_stats(len(items), failed, elapsed_time)
+        self.logger.info(
+            f"Processed {len(items)} entries in {stats['elapsed_time']}s "
+            f"({stats['entries_per_minute']} entries/min, concurrency {self.max_concurrency})"
+        )
+        return list(results), stats
+
+    def _build_stats(self, total: int, failed: int, elapsed_time: float) -> Dict[str, Any]:
+        entries_per_minute = (total / elapsed_time) * 60 if elapsed_time > 0 else 0
+        return {
+            "total_entries": total,
+            "succeeded": total - failed,
+            "failed": failed,
+            "max_concurrency": self.max_concurrency,
+            "elapsed_time": round(elapsed_time, 2),
+            "entries_per_minute": round(entries_per_minute, 2),
+        }
@@ -0,0 +1,165 @@
+import codecs
+import csv
+import json
+import logging
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+Row = Tuple[int, Union[Dict[str, Any], Exception]]
+
+class BulkIngestError(Exception):
+    pass
+
+def iter_lines(stream: Any, max_line_bytes: int = 65536) -> Iterator[bytes]:
+    """
+    Read a request body line by line, without holding more than one line in memory.
+
+    :param stream: File-like object with readline(limit), e.g. the WSGI input stream.
+    :param max_line_bytes: Longest accepted line.
+    :raises BulkIngestError: If a line is longer than max_line_bytes.
+    """
+    while True:
+        line = stream.readline(max_line_bytes + 1)
+        if not line:
+            return
+        if len(line) > max_line_bytes:
+            raise BulkIngestError(f"Line longer than {max_line_bytes} bytes")
+        yield line
+
+def parse_ndjson(lines: Iterable[bytes]) -> Iterator[Row]:
+    """
+    Parse newline-delimited JSON, one object per line. Blank lines are skipped.
+
+    :return: (line number, object), or (line number, error) for a line that is not a JSON object.
+    """
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError as e:
+            yield line_number, ValueError(f"Invalid JSON: {str(e)}")
+            continue
+        if not isinstance(item, dict):
+            yield line_number, ValueError("Expected a JSON object")
+            continue
+        yield line_number, item
+
+def parse_csv(lines: Iterable[bytes]) -> Iterator[Row]:
+    """
+    Parse CSV with a header row. Dotted column names build nested objects, so the column
+    generalOptions.style sets item["generalOptions"]["style"]. Empty cells are left out.
+
+    :return: (line number, object) for each data row.
+    :raises BulkIngestError: If the input is not valid UTF-8 CSV.
+    """
+    reader = csv.reader(codecs.iterdecode(lines, 'utf-8-sig'))
+    try:
+        header = next(reader, None)
+        if header is None:
+            return
+        for values in reader:
+            if not any(value.strip() for value in values):
+                continue
+            if len(values) != len(header):
+                yield reader.line_num, ValueError(f"Expected {len(header)} columns, got {len(values)}")
+                continue
+            item: Dict[str, Any] = {}
+            for column, value in zip(header, values):
+                if value == '':
+                    continue
+                *parents, name = column.strip().split('.')
+                target = item
+                for parent in parents:
+                    target = target.setdefault(parent, {})
+                target[name] = value
+            yield reader.line_num, item
+    except (csv.Error, UnicodeDecodeError) as e:
+        raise BulkIngestError(f"Invalid CSV after line {reader.line_num}: {str(e)}") from e
+
+class BulkIngestor:
+    def __init__(self, validate: Callable[[Dict[str, Any]], Any], submit: Callable[[List[Any]], Future],
+                 batch_size: int = 100, max_in_flight: int = 2):
+        """
+        Initialize an ingestor that validates rows and enqueues them in batches as they are read.
+
+        At most max_in_flight batches are submitted and not yet stored. Once that many are
+        waiting, no further input is read, so a slow queue slows down the upload instead of
+        piling rows up in memory.
+
+        :param validate: Builds a request from a row, raising an exception for an invalid row.
+        :param submit: Enqueues a batch of requests; its future resolves to one result dict per request, in order.
+        :param batch_size: Requests per submitted batch.
+        :param max_in_flight: Batches submitted at the same time.
+        """
+        self.validate = validate
+        self.submit = submit
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight
+        self.logger = logging.getLogger(__name__)
+
+    def ingest(self, rows: Iterable[Row]) -> Iterator[Dict[str, Any]]:
+        """
+        Validate and enqueue rows, yielding one result per row as soon as it is known.
+
+        Rejected rows are reported immediately; queued rows once their batch is stored. The
+        last result is a summary. If a batch cannot be stored, reading stops there.
+
+        :param rows: (line number, object or parse error) pairs, e.g. from parse_ndjson.
+        :return: Results: {"line", **submitted result}, {"line", "error"} or {"summary"}.
+        """
+        summary = {"rows": 0, "queued": 0, "rejected": 0}
+        batch: List[Tuple[int, Any]] = []
+        in_flight: Deque[Tuple[List[int], Future]] = deque()
+        failure: Optional[str] = None
+
+        def send():
+            lines = [line for line, _ in batch]
+            in_flight.append((lines, self.submit([request for _, request in batch])))
+            batch.clear()
+
+        def receive() -> Iterator[Dict[str, Any]]:
+            nonlocal failure
+            lines, future = in_flight.popleft()
+            try:
+                submitted = future.result()
+            except Exception as e:
+                self.logger.error(f"Bulk ingest batch of {len(lines)} rows failed: {str(e)}")
+                failure = failure or str(e)
+                summary["rejected"] += len(lines)
+                for line in lines:
+                    yield {"line": line, "error": f"Not queued: {str(e)}"}
+                return
+            summary["queued"] += len(submitted)
+            for line, result in zip(lines, submitted):
+                yield {"line": line, **result}
+
+        try:
+            for line, item in rows:
+                summary["rows"] += 1
+                try:
+                    if isinstance(item, Exception):
+                        raise item
+                    batch.append((line, self.validate(item)))
+                except Exception as e:
+                    summary["rejected"] += 1
+                    yield {"line": line, "error": str(e)}
+                    continue
+                if len(batch) >= self.batch_size:
+                    send()
+                    while len(in_flight) >= self.max_in_flight:
+                        yield from receive()
+                    if failure:
+                        break
+        except BulkIngestError as e:
+            failure = str(e)
+            yield {"error": failure}
+
+        if batch:
+            send()
+        while in_flight:
+            yield from receive()
+        if failure:
+            summary["error"] = failure
+        yield {"summary": summary}
@@ -0,0 +1,27 @@
+import os
+from functools import lru_cache
+from typing import Dict, Any
+
+import yaml
+
+@lru_cache(maxsize=None)
+def load_config() -> Dict[str, Any]:
+    """
+    Load config.yaml from the src directory once per process.
+
+    :return: Parsed configuration dictionary.
+    """
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    config_path = os.path.join(current_dir, 'config.yaml')
+
+    with open(config_path, 'r') as file:
+        return yaml.safe_load(file)
+
+def get_section(name: str) -> Dict[str, Any]:
+    """
+    Get a top-level section of the configuration.
+
+    :param name: Name of the section, e.g. 'pipeline'.
+    :return: The section dictionary, or an empty dictionary if it is missing.
+    """
+    return load_config().get(name) or {}
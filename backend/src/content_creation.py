@@ -1,84 +1,36 @@
-import json
 import logging
-from typing import Dict, Any, Optional, List
+from functools import lru_cache
+from typing import Dict, Any, Optional, List, Tuple
 from .prompt_generator import PromptGenerator
-from .services import generate_content_with_openai, generate_image, generate_voice, generate_music, generate_video
-from prisma import Prisma
+from .services import build_script_prompt, generate_content_with_openai, load_token_budget, generate_image, generate_voice, generate_music, generate_video
+from .models import create_contents, insert_content
+from .content_pipeline import content_data, script_prompt_values
 from shared.types.ContentCreation import ContentCreationRequest, VideoContent
 from .progress_tracker import ProgressTracker
-
-prisma = Prisma()
+from .batch_engine import BatchEngine
+from .config import get_section
+from .single_flight import SingleFlight, request_hash
 
 class ContentCreator:
-    def __init__(self, template_file: str):
+    def __init__(self, template_file: str, max_concurrency: Optional[int] = None):
         self.logger = logging.getLogger(__name__)
         self.prompt_generator = PromptGenerator(template_file)
+        if max_concurrency is None:
+            max_concurrency = get_section('pipeline').get('batch_concurrency', 5)
+        self.batch_engine = BatchEngine(max_concurrency)
+        self.single_flight = SingleFlight()
 
     async def create_content(self, input_data: ContentCreationRequest, progress_tracker: Optional[ProgressTracker] = None) -> Dict[str, Any]:
-        try:
-            if progress_tracker:
-                progress_tracker.update(1, {"status": "Generating content prompt"})
-
-            content_prompt = self.prompt_generator.generate_prompt("video_content", **input_data.dict())
-            
-            if progress_tracker:
-                progress_tracker.update(2, {"status": "Generating content with OpenAI"})
-
-            generated_content: VideoContent = await generate_content_with_openai(content_prompt)
+        # An identical request already in flight is not generated twice: its content is shared
+        return await self.single_flight.run(
+            request_hash(input_data.dict()),
+            lambda: self._create_content(input_data, progress_tracker),
+        )
 
-            if progress_tracker:
-                progress_tracker.update(3, {"status": "Creating Content object"})
-
-            content = await prisma.content.create(
-                data={
-                    "title": generated_content.video_title,
-                    "videoSubject": input_data.videoSubject,
-                    "status": "pending",
-                    "progress": 0,
-                    "generatedContent": json.dumps(generated_content.dict()),
-                    "generalOptions": {
-                        "create": {
-                            "style": input_data.style,
-                            "description": input_data.description,
-                            "sceneAmount": input_data.sceneAmount,
-                            "duration": input_data.duration,
-                            "tone": input_data.tone,
-                            "vocabulary": input_data.vocabulary,
-                            "targetAudience": input_data.targetAudience
-                        }
-                    },
-                    "contentOptions": {
-                        "create": {
-                            "pacing": input_data.pacing,
-                            "description": input_data.contentDescription
-                        }
-                    },
-                    "visualPromptOptions": {
-                        "create": {
-                            "pictureDescription": input_data.pictureDescription,
-                            "style": input_data.imageStyle,
-                            "imageDetails": input_data.imageDetails,
-                            "shotDetails": input_data.shotDetails
-                        }
-                    },
-                    "scenes": {
-                        "create": [{"type": "main", "description": scene.scene_description} for scene in generated_content.main_scenes]
-                    },
-                    "audioPrompts": {
-                        "create": [{"type": "narration", "sceneNumber": i+1, "description": scene.scene_description} 
-                                   for i, scene in enumerate(generated_content.main_scenes)]
-                    },
-                    "visualPrompts": {
-                        "create": [{"type": "scene", "sceneNumber": i+1, "description": scene.visual_description} 
-                                   for i, scene in enumerate(generated_content.main_scenes)]
-                    },
-                    "musicPrompt": {
-                        "create": {
-                            "description": f"Create {input_data.style} music for a video about {input_data.videoSubject}"
-                        }
-                    }
-                }
-            )
+    async def _create_content(self, input_data: ContentCreationRequest, progress_tracker: Optional[ProgressTracker] = None) -> Dict[str, Any]:
+        try:
+            data = await self.generate_content_data(input_data, progress_tracker)
+            content = await insert_content(data)
 
             if progress_tracker:
                 progress_tracker.update(4, {"status": "Content creation completed"})
@@ -89,21 +41,104 @@ class ContentCreator:
             self.logger.error(f"Error in content creation pipeline: {str(e)}")
             raise
 
-    async def process_batch(self, input_data_list: List[ContentCreationRequest]) -> List[Dict[str, Any]]:
-        results = []
+    async def generate_content_data(self, input_data: ContentCreationRequest, progress_tracker: Optional[ProgressTracker] = None) -> Dict[str, Any]:
+        """
+        Generate the content of a request without storing it.
+
+        :return: Content data in the shape of a nested prisma.content.create.
+        """
+        if progress_tracker:
+            progress_tracker.update(1, {"status": "Generating content prompt"})
+
+        content_prompt, estimate = build_script_prompt(
+            self.prompt_generator.get_template("video_content"),
+            script_prompt_values(input_data),
+            input_data.generalOptions.sceneAmount,
+            await load_token_budget(),
+        )
+
+        if progress_tracker:
+            progress_tracker.update(2, {"status": "Generating content with OpenAI"})
+
+        token_usage: List[Dict[str, Any]] = []
+        generated_content: VideoContent = await generate_content_with_openai(content_prompt, estimate=estimate, on_usage=token_usage.append)
+
+        if progress_tracker:
+            progress_tracker.update(3, {"status": "Creating Content object"})
+
+        return content_data(generated_content, input_data, token_usage)
+
+    async def process_batch(self, input_data_list: List[ContentCreationRequest]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Generate the contents of a batch of requests concurrently and store them in bulk.
+
+        :return: The Content row or an error result per request, in request order, and the
+                 statistics of the run, see BatchEngine.run. Entries that failed to store
+                 count as failed.
+        """
         total_entries = len(input_data_list)
         progress_tracker = ProgressTracker(total_entries * 5)  # 5 steps per entry
+        # Entries identical to an earlier entry of the batch reuse its content
+        first_indexes: Dict[str, int] = {}
+        duplicates = {}
+        for index, input_data in enumerate(input_data_list):
+            first_index = first_indexes.setdefault(request_hash(input_data.dict()), index)
+            if first_index != index:
+                duplicates[index] = first_index
+
+        # Generation runs concurrently, storage in bulk: generated entries are stored a chunk
+        # at a time as they finish, so a chunk that fails to store fails only its own entries
+        batch_size = get_section('database').get('bulk_insert_batch_size', 100)
+        generated: List[Tuple[int, Dict[str, Any]]] = []
+        stored: Dict[int, Any] = {}
 
-        for index, input_data in enumerate(input_data_list, start=1):
+        async def store(chunk: List[Tuple[int, Dict[str, Any]]]):
             try:
-                content = await self.create_content(input_data, progress_tracker)
-                results.append(content)
+                contents = await create_contents([data for _, data in chunk], batch_size)
             except Exception as e:
-                self.logger.error(f"Error processing entry {index}: {str(e)}")
-                results.append({"error": str(e), "index": index})
+                self.logger.error(f"Error storing {len(chunk)} generated contents: {str(e)}", exc_info=True)
+                for index, _ in chunk:
+                    stored[index] = {"error": str(e), "index": index + 1}
+                return
+            for (index, _), content in zip(chunk, contents):
+                stored[index] = content
+                progress_tracker.update(4, {"status": "Content creation completed"})
+
+        async def process_entry(input_data: ContentCreationRequest, index: int) -> Optional[Dict[str, Any]]:
+            if index - 1 in duplicates:
+                return None
+            data = await self.generate_content_data(input_data, progress_tracker)
+            generated.append((index - 1, data))
+            if len(generated) >= batch_size:
+                chunk = generated[:]
+                generated.clear()
+                await store(chunk)
+            return data
+
+        def handle_error(input_data: ContentCreationRequest, index: int, e: Exception) -> Dict[str, Any]:
+            return {"error": str(e), "index": index}
+
+        results, stats = await self.batch_engine.run(input_data_list, process_entry, on_error=handle_error)
+        if generated:
+            await store(generated)
+        for index, result in stored.items():
+            results[index] = result
+
+        for index, first_index in duplicates.items():
+            result = results[first_index]
+            results[index] = {**result, "index": index + 1} if isinstance(result, dict) and "error" in result else result
+        if duplicates:
+            self.logger.info(f"Reused {len(duplicates)} contents for duplicate entries of the batch")
+        failed = sum(1 for result in results if isinstance(result, dict) and "error" in result)
+        stats.update(succeeded=len(results) - failed, failed=failed)
+        return results, stats
 
-        return results
+@lru_cache(maxsize=None)
+def get_content_creator(template_file: str = "prompt_templates.yaml") -> ContentCreator:
+    """
+    Get the ContentCreator of the process for a template file, built on first use.
+    """
+    return ContentCreator(template_file)
 
-async def create_content(input_data: List[ContentCreationRequest]) -> List[Dict[str, Any]]:
-    creator = ContentCreator("prompt_templates.yaml")
-    return await creator.process_batch(input_data)
\ No newline at end of file
+async def create_content(input_data: List[ContentCreationRequest]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    return await get_content_creator().process_batch(input_data)
\ No newline at end of file
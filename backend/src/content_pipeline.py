@@ -1,137 +1,535 @@
+import asyncio
+import json
 import logging
-from prisma import Prisma
-from .services import generate_content_with_openai, generate_image, generate_voice, generate_music, generate_video
+from .prisma import prisma, run_write
+from .services import SCRIPT_TEMPERATURE, build_script_prompt, generate_content_with_openai, load_token_budget, generate_image, generate_voice, generate_music, generate_video
 from shared.types.ContentCreation import ContentCreationRequest, VideoContent
-from typing import Dict, Any, List
-import json
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List, Optional, Awaitable, Callable, Iterable, Tuple
+from .batch_engine import BatchEngine
+from .config import get_section
+from .models import CONTENT_CHILD_RELATIONS, get_json_serializer, insert_content, invalidate_contents, replace_content
 from .progress_tracker import ProgressTracker
+from .single_flight import SingleFlight, request_hash
+from .prompt_generator import PromptGenerator
+from .stage_fingerprints import reusable_stages, stage_fingerprints
+from .stage_scheduler import Stage, StageScheduler
+from .token_budget import TokenEstimate
+from .unit_of_work import UnitOfWork
+
+def script_prompt_values(input_data: ContentCreationRequest) -> Dict[str, Any]:
+    """
+    Variables of the video_content template for a request, whose placeholders are named
+    after the prompt rather than after the request fields.
+    """
+    general = input_data.generalOptions
+    return {
+        "title": input_data.title,
+        "scene_amount": general.sceneAmount,
+        "video_length": general.duration,
+        "style": general.style,
+        "target_audience": general.targetAudience,
+    }
+
+def request_options(input_data: ContentCreationRequest) -> Dict[str, Dict[str, Any]]:
+    """
+    Rows stored from the options of a request, by Content relation.
+    """
+    return {
+        "generalOptions": {
+            "style": input_data.generalOptions.style,
+            "description": input_data.generalOptions.description,
+            "sceneAmount": input_data.generalOptions.sceneAmount,
+            "duration": input_data.generalOptions.duration,
+            "tone": input_data.generalOptions.tone,
+            "vocabulary": input_data.generalOptions.vocabulary,
+            "targetAudience": input_data.generalOptions.targetAudience
+        },
+        "contentOptions": {
+            "pacing": input_data.contentOptions.pacing,
+            "description": input_data.contentOptions.description
+        },
+        "visualPromptOptions": {
+            "pictureDescription": input_data.visualPromptOptions.pictureDescription,
+            "style": input_data.visualPromptOptions.style,
+            "imageDetails": input_data.visualPromptOptions.imageDetails,
+            "shotDetails": input_data.visualPromptOptions.shotDetails
+        },
+        "musicPrompt": {
+            "description": f"Create {input_data.generalOptions.style} music for a video about {input_data.videoSubject}"
+        },
+    }
 
-prisma = Prisma()
+def content_data(generated_content: VideoContent, input_data: ContentCreationRequest, token_usage: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Build the stored form of a generated script with the request options and the scene rows.
+
+    :return: Content data in the shape accepted by models.create_contents.
+    """
+    return {
+        "title": generated_content.video_title,
+        "videoSubject": input_data.videoSubject,
+        "status": "pending",
+        "progress": 0,
+        "generatedContent": get_json_serializer().dump_model(generated_content).decode(),
+        **{relation: {"create": row} for relation, row in request_options(input_data).items()},
+        "scenes": {
+            "create": [{"type": "main", "description": scene.scene_description} for scene in generated_content.main_scenes]
+        },
+        "audioPrompts": {
+            "create": [{"type": "narration", "sceneNumber": i+1, "description": scene.scene_description} 
+                       for i, scene in enumerate(generated_content.main_scenes)]
+        },
+        "visualPrompts": {
+            "create": [{"type": "scene", "sceneNumber": i+1, "description": scene.visual_prompt} 
+                       for i, scene in enumerate(generated_content.main_scenes)]
+        },
+        "tokenUsage": {
+            "create": token_usage or []
+        }
+    }
 
 class ContentCreationPipeline:
-    def __init__(self, template_file: str):
+    def __init__(self, template_file: str, max_concurrency: Optional[int] = None):
         self.prompt_generator = PromptGenerator(template_file)
         self.logger = logging.getLogger(__name__)
+        if max_concurrency is None:
+            max_concurrency = get_section('pipeline').get('batch_concurrency', 5)
+        self.batch_engine = BatchEngine(max_concurrency)
+        self.stream_scenes = get_section('pipeline').get('stream_scenes', False)
+        self.coalesce_writes = get_section('pipeline').get('coalesce_writes', True)
+        self.write_stats = {"contents": 0, "write_transactions": 0}
+        self.single_flight = SingleFlight()
+
+    async def process_input(self, input_data: List[ContentCreationRequest]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Create the contents of a batch of requests, running max_concurrency entries at once.
 
-    async def process_input(self, input_data: List[ContentCreationRequest]) -> List[Dict[str, Any]]:
-        results = []
+        :return: The Content row or an error result per request, in request order, and the
+                 statistics of the run, see BatchEngine.run, whose entries_per_minute shows
+                 how batch_concurrency performs.
+        """
         total_entries = len(input_data)
         progress_tracker = ProgressTracker(total_entries * 6)  # 6 steps per entry
 
-        with ThreadPoolExecutor() as executor:
-            future_to_entry = {executor.submit(self.create_content, entry, index, total_entries, progress_tracker): entry for index, entry in enumerate(input_data, start=1)}
-            for future in as_completed(future_to_entry):
-                entry = future_to_entry[future]
-                try:
-                    result = await future.result()
-                    results.append(result)
-                except Exception as e:
-                    self.logger.error(f"Error processing entry: {entry.videoSubject} - {str(e)}", exc_info=True)
-                    results.append({"error": str(e), "videoSubject": entry.videoSubject})
+        async def process_entry(entry: ContentCreationRequest, index: int) -> Dict[str, Any]:
+            return await self.create_content(entry, index, total_entries, progress_tracker)
 
-        return results
+        def handle_error(entry: ContentCreationRequest, index: int, e: Exception) -> Dict[str, Any]:
+            return {"error": str(e), "videoSubject": entry.videoSubject}
+
+        return await self.batch_engine.run(input_data, process_entry, on_error=handle_error)
+
+    async def create_content(
+        self,
+        input_data: ContentCreationRequest,
+        index: int,
+        total_entries: int,
+        progress_tracker: ProgressTracker,
+        checkpoint: Optional[Dict[str, Any]] = None,
+        on_checkpoint: Optional[Callable[[str, Dict[str, Any]], Awaitable[None]]] = None,
+        content_id: Optional[int] = None,
+        mark_failed: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Run the stage graph for one entry.
+
+        An identical request whose run is already in flight in this process is not run again:
+        the call attaches to that run and returns its Content row. Resumed runs and
+        regenerations, which already have their own content, always run on their own.
 
-    async def create_content(self, input_data: ContentCreationRequest, index: int, total_entries: int, progress_tracker: ProgressTracker) -> Dict[str, Any]:
+        :param checkpoint: Serialized results of stages completed by an earlier run; those stages are skipped.
+        :param on_checkpoint: Coroutine function awaited with (stage name, checkpoint) after each stage,
+                              where checkpoint holds the serialized results of all completed stages.
+        :param content_id: Existing content to regenerate from this request. Stages whose input
+                           fingerprints are unchanged reuse the stored results; the others run
+                           again and overwrite them.
+        :param mark_failed: Mark the content as failed when the run fails. The worker leaves this
+                            to its job, which may run again.
+        :return: The Content row.
+        """
+        def run() -> Awaitable[Dict[str, Any]]:
+            return self._create_content(
+                input_data, index, total_entries, progress_tracker, checkpoint, on_checkpoint, content_id, mark_failed)
+
+        if checkpoint or content_id is not None:
+            return await run()
+        return await self.single_flight.run(request_hash(input_data.dict()), run)
+
+    async def _create_content(
+        self,
+        input_data: ContentCreationRequest,
+        index: int,
+        total_entries: int,
+        progress_tracker: ProgressTracker,
+        checkpoint: Optional[Dict[str, Any]],
+        on_checkpoint: Optional[Callable[[str, Dict[str, Any]], Awaitable[None]]],
+        content_id: Optional[int] = None,
+        mark_failed: bool = True,
+    ) -> Dict[str, Any]:
         self.logger.info(f"Processing entry {index}/{total_entries}: {input_data.videoSubject}")
         base_step = (index - 1) * 6
-        try:
-            prompt = self.prompt_generator.generate_prompt("video_content", input_data.dict())
-            generated_content: VideoContent = await generate_content_with_openai(prompt)
-            progress_tracker.update(base_step + 1, {"videoSubject": input_data.videoSubject, "status": "content generated"})
-
-            content = await self.save_to_database(generated_content, input_data)
-            progress_tracker.update(base_step + 2, {"videoSubject": input_data.videoSubject, "status": "content saved"})
-            
-            if input_data.generalOptions.services.get('generate_image'):
-                image_url = await generate_image(generated_content.description)
-                await prisma.content.update(
-                    where={"id": content.id},
-                    data={"generatedPicture": image_url}
-                )
-                progress_tracker.update(base_step + 3, {"videoSubject": input_data.videoSubject, "status": "image generated"})
-            
-            if input_data.generalOptions.services.get('generate_voice'):
-                voice_url = await generate_voice('\n'.join([scene.scene_description for scene in generated_content.main_scenes]))
-                await prisma.content.update(
-                    where={"id": content.id},
-                    data={"generatedVoice": voice_url}
-                )
-                progress_tracker.update(base_step + 4, {"videoSubject": input_data.videoSubject, "status": "voice generated"})
-            
-            if input_data.generalOptions.services.get('generate_music'):
-                music_url = await generate_music(f"Create {input_data.generalOptions.style} music for a video about {input_data.videoSubject}")
-                await prisma.content.update(
-                    where={"id": content.id},
-                    data={"generatedMusic": music_url}
-                )
-                progress_tracker.update(base_step + 5, {"videoSubject": input_data.videoSubject, "status": "music generated"})
-            
-            if input_data.generalOptions.services.get('generate_video'):
-                video_url = await generate_video(content.id)
-                await prisma.content.update(
-                    where={"id": content.id},
-                    data={"generatedVideo": video_url, "status": "completed", "progress": 100}
-                )
-                progress_tracker.update(base_step + 6, {"videoSubject": input_data.videoSubject, "status": "video generated"})
+        unit_of_work = UnitOfWork(prisma)
+        stages = self._build_stages(input_data, base_step, progress_tracker, unit_of_work, content_id)
+        scheduler = StageScheduler(stages)
+        checkpoint = dict(checkpoint or {})
+        current_fingerprints: Dict[str, str] = {}
+        # Fingerprints of the results stored with the content, staged along with the results
+        fingerprints: Dict[str, str] = {}
 
+        def stage_fingerprint_update(content_id: int):
+            unit_of_work.update("content", {"id": content_id}, {"stageFingerprints": json.dumps(fingerprints, sort_keys=True)})
+
+        async def record_stage(name: str, result: Any):
+            checkpoint[name] = self._serialize_stage_result(name, result)
+            fingerprints[name] = current_fingerprints[name]
+            stage_fingerprint_update(checkpoint["script"]["content_id"])
+            if on_checkpoint:
+                await on_checkpoint(name, checkpoint)
+
+        try:
+            current_fingerprints.update(await self.stage_fingerprints(input_data))
+            if content_id is not None and "script" not in checkpoint:
+                reused, stored_fingerprints = await self.plan_regeneration(
+                    content_id, input_data, current_fingerprints, [stage.name for stage in stages])
+                checkpoint.update(reused)
+                # Results of stages left out of this request stay stored with their fingerprints
+                fingerprints.update((name, fingerprint) for name, fingerprint in stored_fingerprints.items()
+                                    if name not in scheduler.stages)
+                self.logger.info(f"Regenerating content {content_id}, reusing stages: {list(reused.keys())}")
+            elif checkpoint:
+                self.logger.info(f"Resuming {input_data.videoSubject} after stages: {list(checkpoint.keys())}")
+            results = await self._restore_stage_results(checkpoint)
+            fingerprints.update((name, current_fingerprints[name]) for name in checkpoint)
+            if "script" in results:
+                # Checkpointed stages may not have reached the database before the previous run
+                # stopped; their writes are idempotent, so they are simply staged again.
+                for name, result in checkpoint.items():
+                    self._stage_writes(unit_of_work, name, results["script"]["content"].id, result)
+                stage_fingerprint_update(results["script"]["content"].id)
+            try:
+                results = await scheduler.run(results, on_complete=record_stage)
+            except Exception:
+                try:
+                    await self._commit_writes(unit_of_work, input_data)
+                except Exception as commit_error:
+                    self.logger.error(f"Error storing finished stages of {input_data.videoSubject}: {str(commit_error)}")
+                raise
+            # The content is completed by the same commit that stores its last results
+            content = results["script"]["content"]
+            if content_id is not None:
+                # A reused script leaves the options of the previous request stored
+                self._stage_request_writes(unit_of_work, content.id, input_data)
+            unit_of_work.update("content", {"id": content.id}, {"status": "completed", "progress": 100})
+            await self._commit_writes(unit_of_work, input_data)
+            progress_tracker.complete(content.id)
+            self.logger.info(f"Stage timings for {input_data.videoSubject}: {scheduler.timings}")
             return content
         except Exception as e:
             self.logger.error(f"Error creating content for {input_data.videoSubject}: {str(e)}", exc_info=True)
+            failed_id = checkpoint["script"]["content_id"] if "script" in checkpoint else content_id
+            if mark_failed and failed_id is not None:
+                progress_tracker.fail(failed_id, str(e))
             raise
 
-    async def save_to_database(self, generated_content: VideoContent, input_data: ContentCreationRequest) -> Dict[str, Any]:
-        try:
-            content = await prisma.content.create(
-                data={
-                    "title": generated_content.video_title,
-                    "videoSubject": input_data.videoSubject,
-                    "status": "pending",
-                    "progress": 0,
-                    "generatedContent": json.dumps(generated_content.dict()),
-                    "generalOptions": {
-                        "create": {
-                            "style": input_data.generalOptions.style,
-                            "description": input_data.generalOptions.description,
-                            "sceneAmount": input_data.generalOptions.sceneAmount,
-                            "duration": input_data.generalOptions.duration,
-                            "tone": input_data.generalOptions.tone,
-                            "vocabulary": input_data.generalOptions.vocabulary,
-                            "targetAudience": input_data.generalOptions.targetAudience
-                        }
-                    },
-                    "contentOptions": {
-                        "create": {
-                            "pacing": input_data.contentOptions.pacing,
-                            "description": input_data.contentOptions.description
-                        }
-                    },
-                    "visualPromptOptions": {
-                        "create": {
-                            "pictureDescription": input_data.visualPromptOptions.pictureDescription,
-                            "style": input_data.visualPromptOptions.style,
-                            "imageDetails": input_data.visualPromptOptions.imageDetails,
-                            "shotDetails": input_data.visualPromptOptions.shotDetails
-                        }
-                    },
-                    "scenes": {
-                        "create": [{"type": "main", "description": scene.scene_description} for scene in generated_content.main_scenes]
-                    },
-                    "audioPrompts": {
-                        "create": [{"type": "narration", "sceneNumber": i+1, "description": scene.scene_description} 
-                                   for i, scene in enumerate(generated_content.main_scenes)]
-                    },
-                    "visualPrompts": {
-                        "create": [{"type": "scene", "sceneNumber": i+1, "description": scene.visual_description} 
-                                   for i, scene in enumerate(generated_content.main_scenes)]
-                    },
-                    "musicPrompt": {
-                        "create": {
-                            "description": f"Create {input_data.generalOptions.style} music for a video about {input_data.videoSubject}"
-                        }
-                    }
-                }
+    async def _commit_writes(self, unit_of_work: UnitOfWork, input_data: ContentCreationRequest):
+        """
+        Commit the staged writes of the finished stages in one transaction.
+
+        A video takes one write transaction of its own, plus its share of the bulk insert
+        that stores the scripts of the contents created at the same time, see
+        models.insert_content. Run by a worker, its job adds one per stage for the checkpoint,
+        plus the claim and the completion; write_stats counts only the pipeline's own
+        transactions, and the content inserts count theirs in get_content_inserts().get_stats().
+        """
+        await run_write(unit_of_work.commit)
+        invalidate_contents(
+            where["id"] if model == "content" else where["contentId"]
+            for model, where in unit_of_work.committed
+        )
+        self.write_stats["contents"] += 1
+        self.write_stats["write_transactions"] += unit_of_work.transactions
+        self.logger.info(
+            f"Stored {unit_of_work.statements} updates for {input_data.videoSubject} "
+            f"in {unit_of_work.transactions} write transactions"
+        )
+
+    async def build_script_prompt(self, input_data: ContentCreationRequest) -> Tuple[str, TokenEstimate]:
+        """
+        Render the script prompt of a request within the token budget, see services.build_script_prompt.
+        """
+        return build_script_prompt(
+            self.prompt_generator.get_template("video_content"),
+            script_prompt_values(input_data),
+            input_data.generalOptions.sceneAmount,
+            await load_token_budget(),
+        )
+
+    async def stage_fingerprints(self, input_data: ContentCreationRequest) -> Dict[str, str]:
+        """
+        Fingerprint the inputs of every stage of a request, see stage_fingerprints.stage_fingerprints.
+        """
+        prompt, _ = await self.build_script_prompt(input_data)
+        return stage_fingerprints(
+            input_data.dict(),
+            prompt,
+            get_section('llm_client').get('model', 'gpt-4o-2024-08-06'),
+            SCRIPT_TEMPERATURE,
+        )
+
+    async def plan_regeneration(
+        self,
+        content_id: int,
+        input_data: ContentCreationRequest,
+        fingerprints: Dict[str, str],
+        enabled: Iterable[str],
+    ) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """
+        Find the stored results of a content that a regeneration from input_data can keep.
+
+        :param content_id: Id of the content to regenerate.
+        :param input_data: The new content creation request.
+        :param fingerprints: Stage fingerprints of input_data.
+        :param enabled: Stages of the new request's stage graph.
+        :return: Serialized results of the reusable stages, in checkpoint form, and the
+                 fingerprints stored with the content.
+        :raises ValueError: If the content does not exist.
+        """
+        content = await prisma.content.find_unique(
+            where={"id": content_id},
+            include={"visualPrompts": True, "audioPrompts": True},
+        )
+        if content is None:
+            raise ValueError(f"Content {content_id} not found")
+        stored_fingerprints = json.loads(content.stageFingerprints) if content.stageFingerprints else {}
+
+        stored: Dict[str, Any] = {}
+        if content.generatedContent:
+            stored["script"] = {"content_id": content.id, "generated_content": json.loads(content.generatedContent)}
+        for name, prompts in (("image", content.visualPrompts), ("voice", content.audioPrompts)):
+            urls = [prompt.generatedUrl for prompt in sorted(prompts or [], key=lambda prompt: prompt.sceneNumber)]
+            if urls and all(urls):
+                stored[name] = urls
+        if content.generatedMusic:
+            stored["music"] = content.generatedMusic
+        if content.generatedVideo:
+            stored["video"] = content.generatedVideo
+
+        enabled = list(enabled)
+        reused = reusable_stages(stored_fingerprints, fingerprints, stored.keys(), enabled)
+        return {name: stored[name] for name in reused if name in enabled}, stored_fingerprints
+
+    def _build_stages(
+        self,
+        input_data: ContentCreationRequest,
+        base_step: int,
+        progress_tracker: ProgressTracker,
+        unit_of_work: UnitOfWork,
+        content_id: Optional[int] = None,
+    ) -> List[Stage]:
+        """
+        Declare the per-content flow as a dependency graph: script -> {image, voice, music} -> video.
+
+        :param input_data: The content creation request.
+        :param base_step: Progress step offset of this entry within the batch.
+        :param progress_tracker: Tracker receiving one update per finished stage.
+        :param unit_of_work: Collects the database updates of the stages.
+        :param content_id: Existing content the script stage overwrites instead of creating one.
+        :return: Stages enabled by the request's services options.
+        """
+        services = input_data.generalOptions.services
+        scene_generators: Dict[str, Callable[[Any], Awaitable[str]]] = {}
+        if services.get('generate_image'):
+            scene_generators["image"] = lambda scene: generate_image(scene.visual_prompt)
+        if services.get('generate_voice'):
+            scene_generators["voice"] = lambda scene: generate_voice(scene.scene_description)
+        # Scene assets started while the script is still streaming, by stage and scene number
+        dispatched: Dict[str, Dict[int, asyncio.Future]] = {name: {} for name in scene_generators}
+
+        total_steps = 2 + sum(1 for service in ('generate_image', 'generate_voice', 'generate_music', 'generate_video') if services.get(service))
+        finished_steps = 0
+
+        def report(step: int, status: str, content_id: Optional[int] = None):
+            nonlocal finished_steps
+            finished_steps += 1
+            info = {"videoSubject": input_data.videoSubject, "status": status}
+            if content_id is not None:
+                info["contentId"] = content_id
+                info["progress"] = round(finished_steps / total_steps * 100, 2)
+            progress_tracker.update(base_step + step, info)
+
+        async def store(name: str, content_id: int, result: Any):
+            self._stage_writes(unit_of_work, name, content_id, result)
+            if not self.coalesce_writes:
+                await run_write(unit_of_work.commit)
+                invalidate_contents([content_id])
+
+        def dispatch_scene(scene_number: int, scene: Any):
+            for name, generate in scene_generators.items():
+                dispatched[name][scene_number] = asyncio.ensure_future(generate(scene))
+
+        async def script_stage(results: Dict[str, Any]) -> Dict[str, Any]:
+            on_scene = dispatch_scene if self.stream_scenes and scene_generators else None
+            try:
+                prompt, estimate = await self.build_script_prompt(input_data)
+                token_usage: List[Dict[str, Any]] = []
+                generated_content: VideoContent = await generate_content_with_openai(
+                    prompt, on_scene=on_scene, estimate=estimate, on_usage=token_usage.append)
+                report(1, "content generated")
+
+                content = await self.save_to_database(generated_content, input_data, token_usage, content_id)
+                report(2, "content saved", content.id)
+            except Exception:
+                for futures in dispatched.values():
+                    for future in futures.values():
+                        future.cancel()
+                raise
+            return {"generated_content": generated_content, "content": content}
+
+        async def image_stage(results: Dict[str, Any]) -> List[str]:
+            script = results["script"]
+            image_urls = await self._fan_out_scenes(
+                script["generated_content"].main_scenes,
+                scene_generators["image"],
+                dispatched["image"],
             )
+            await store("image", script["content"].id, image_urls)
+            report(3, "images generated", script["content"].id)
+            return image_urls
+
+        async def voice_stage(results: Dict[str, Any]) -> List[str]:
+            script = results["script"]
+            voice_urls = await self._fan_out_scenes(
+                script["generated_content"].main_scenes,
+                scene_generators["voice"],
+                dispatched["voice"],
+            )
+            await store("voice", script["content"].id, voice_urls)
+            report(4, "narration generated", script["content"].id)
+            return voice_urls
+
+        async def music_stage(results: Dict[str, Any]) -> str:
+            script = results["script"]
+            music_url = await generate_music(f"Create {input_data.generalOptions.style} music for a video about {input_data.videoSubject}")
+            await store("music", script["content"].id, music_url)
+            report(5, "music generated", script["content"].id)
+            return music_url
+
+        async def video_stage(results: Dict[str, Any]) -> str:
+            content = results["script"]["content"]
+            video_url = await generate_video(content.id)
+            await store("video", content.id, video_url)
+            report(6, "video generated", content.id)
+            return video_url
+
+        stages = [Stage("script", script_stage)]
+        media_stages = [
+            ("image", image_stage, 'generate_image'),
+            ("voice", voice_stage, 'generate_voice'),
+            ("music", music_stage, 'generate_music'),
+        ]
+        for name, func, service in media_stages:
+            if services.get(service):
+                stages.append(Stage(name, func, depends_on=["script"]))
+        if services.get('generate_video'):
+            stages.append(Stage("video", video_stage, depends_on=[stage.name for stage in stages]))
+        return stages
+
+    def _serialize_stage_result(self, name: str, result: Any) -> Any:
+        if name == "script":
+            return {"content_id": result["content"].id, "generated_content": result["generated_content"].dict()}
+        return result
+
+    async def _restore_stage_results(self, checkpoint: Dict[str, Any]) -> Dict[str, Any]:
+        results = dict(checkpoint)
+        if "script" in checkpoint:
+            script = checkpoint["script"]
+            results["script"] = {
+                "generated_content": VideoContent.parse_obj(script["generated_content"]),
+                "content": await prisma.content.find_unique(where={"id": script["content_id"]}),
+            }
+        return results
+
+    async def _fan_out_scenes(self, scenes: List[Any], generate: Callable[[Any], Awaitable[str]], dispatched: Dict[int, asyncio.Future]) -> List[str]:
+        """
+        Generate one asset per scene concurrently. The provider's rate limiter caps how many calls are in flight.
+
+        When a scene fails, the calls of the other scenes are cancelled and awaited before the
+        error is raised, so that none of them goes on spending the provider's rate limit.
+
+        :param scenes: Scenes of the generated script, in scene order.
+        :param generate: Coroutine function producing the asset URL of a scene.
+        :param dispatched: Assets already started during script streaming, by scene number.
+        :return: Asset URLs in scene order.
+        """
+        tasks = [
+            dispatched[scene_number] if scene_number in dispatched else asyncio.ensure_future(generate(scene))
+            for scene_number, scene in enumerate(scenes, start=1)
+        ]
+        try:
+            return list(await asyncio.gather(*tasks))
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    def _stage_writes(self, unit_of_work: UnitOfWork, name: str, content_id: int, result: Any):
+        """
+        Stage the database updates that store the result of a stage.
+
+        :param unit_of_work: Unit of work of the content.
+        :param name: Stage name.
+        :param content_id: Id of the content row.
+        :param result: Serializable stage result.
+        """
+        if name == "image":
+            self._stage_scene_urls(unit_of_work, "visualprompt", content_id, result)
+            # The first scene doubles as the cover picture
+            unit_of_work.update("content", {"id": content_id}, {"generatedPicture": result[0] if result else None})
+        elif name == "voice":
+            self._stage_scene_urls(unit_of_work, "audioprompt", content_id, result)
+        elif name == "music":
+            unit_of_work.update("content", {"id": content_id}, {"generatedMusic": result})
+        elif name == "video":
+            unit_of_work.update("content", {"id": content_id}, {"generatedVideo": result})
+
+    def _stage_request_writes(self, unit_of_work: UnitOfWork, content_id: int, input_data: ContentCreationRequest):
+        """
+        Stage the updates that store the options of a regeneration's request with its content.
+        """
+        unit_of_work.update("content", {"id": content_id}, {"videoSubject": input_data.videoSubject})
+        for relation, row in request_options(input_data).items():
+            unit_of_work.update(CONTENT_CHILD_RELATIONS[relation], {"contentId": content_id}, row)
+
+    def _stage_scene_urls(self, unit_of_work: UnitOfWork, model: str, content_id: int, urls: List[str]):
+        for scene_number, url in enumerate(urls, start=1):
+            unit_of_work.update(model, {"contentId": content_id, "sceneNumber": scene_number}, {"generatedUrl": url})
+
+    async def save_to_database(
+        self,
+        generated_content: VideoContent,
+        input_data: ContentCreationRequest,
+        token_usage: Optional[List[Dict[str, Any]]] = None,
+        content_id: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Store a generated script with the request options and the scene rows.
+
+        :param content_id: Existing content to overwrite. Its scene assets belong to the old
+                           script and are cleared, except for the music, which does not depend on it.
+        :return: The Content row.
+        """
+        try:
+            data = content_data(generated_content, input_data, token_usage)
+            if content_id is not None:
+                content = await replace_content(content_id, {
+                    **data, "generatedPicture": None, "generatedVoice": None, "generatedVideo": None,
+                })
+                # The content row and its children are written in one transaction
+                self.write_stats["write_transactions"] += 1
+            else:
+                # Stored with the contents other jobs of the process create at the same time
+                content = await insert_content(data)
             self.logger.info(f"Saved content to database for {input_data.videoSubject}")
             return content
         except Exception as e:
@@ -140,13 +538,12 @@ class ContentCreationPipeline:
 
 content_pipeline = ContentCreationPipeline("prompt_templates.yaml")
 
-async def content_creation_worker(input_data: List[ContentCreationRequest]) -> List[Dict[str, Any]]:
+async def content_creation_worker(input_data: List[ContentCreationRequest]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
     logger = logging.getLogger(__name__)
     logger.info(f"Starting content creation for {len(input_data)} entries")
     
     try:
-        results = await content_pipeline.process_input(input_data)
-        return results
+        return await content_pipeline.process_input(input_data)
     except Exception as e:
         logger.error(f"Error in content creation: {str(e)}", exc_info=True)
-        return [{"error": f"Failed to generate content: {str(e)}"}]
\ No newline at end of file
+        return [{"error": f"Failed to generate content: {str(e)}"}], {}
\ No newline at end of file
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+WriteOperation = Callable[[], Awaitable[Any]]
+
+class DatabaseWriter:
+    def __init__(self):
+        """
+        Initialize a writer that runs write operations one at a time, in submission order.
+
+        SQLite allows a single writer per database file. Queueing the writes of a process in one
+        task keeps its pipelines from fighting over the write lock, while reads stay concurrent.
+        """
+        self.logger = logging.getLogger(__name__)
+        self._queue: Optional["asyncio.Queue[Tuple[WriteOperation, asyncio.Future]]"] = None
+        self._task: Optional[asyncio.Task] = None
+        self.writes = 0
+
+    async def submit(self, operation: WriteOperation) -> Any:
+        """
+        Queue a write and wait for its result.
+
+        The operation must not submit further writes itself, as those would wait behind it.
+
+        :param operation: Coroutine function performing the write, e.g. a transaction.
+        :return: The operation's result; its exception is raised here.
+        """
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((operation, future))
+        return await future
+
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def close(self):
+        """
+        Finish the queued writes and stop the writer task.
+        """
+        if self._task is None or self._task.done() or self._task.get_loop() is not asyncio.get_running_loop():
+            return
+        await self._queue.join()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        try:
+            while True:
+                operation, future = await self._queue.get()
+                try:
+                    if not future.cancelled():
+                        await self._write(operation, future)
+                finally:
+                    # The writer was cancelled or interrupted during the write
+                    if not future.done():
+                        future.cancel()
+                    self._queue.task_done()
+        finally:
+            # Writes still queued when the writer stops would otherwise wait forever
+            while not self._queue.empty():
+                _, future = self._queue.get_nowait()
+                future.cancel()
+                self._queue.task_done()
+
+    async def _write(self, operation: WriteOperation, future: asyncio.Future):
+        # The write runs in a task of its own and its outcome is copied over, so that its
+        # exception never passes through the writer's frame: a caller clearing the frames of
+        # the traceback, as assertRaises does, would otherwise finalize the writer loop
+        task = asyncio.ensure_future(operation())
+        try:
+            await asyncio.wait([task])
+        finally:
+            if not task.done():
+                task.cancel()
+        if not task.cancelled() and task.exception() is None:
+            self.writes += 1
+        if future.cancelled():
+            return
+        if task.cancelled():
+            future.cancel()
+        elif task.exception() is not None:
+            future.set_exception(task.exception())
+        else:
+            future.set_result(task.result())
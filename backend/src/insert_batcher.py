@@ -0,0 +1,97 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+InsertMany = Callable[[List[Any]], Awaitable[List[Any]]]
+
+class InsertBatcher:
+    def __init__(self, insert_many: InsertMany, max_batch_size: int = 100, window_ms: float = 20):
+        """
+        Initialize a batcher that groups single inserts submitted at about the same time into one bulk insert.
+
+        The first insert of a batch waits up to window_ms for others to join it, so the
+        concurrent jobs of a process store their rows together instead of in a transaction each.
+        If a bulk insert fails, its items are inserted again one at a time, so that an item
+        that cannot be stored fails only its own caller.
+
+        :param insert_many: Coroutine function storing a list of items and returning their rows, in order.
+        :param max_batch_size: Items per bulk insert; a full batch is written without waiting.
+        :param window_ms: Milliseconds the first item of a batch waits for others.
+        """
+        self.insert_many = insert_many
+        self.max_batch_size = max_batch_size
+        self.window = window_ms / 1000
+        self.logger = logging.getLogger(__name__)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.Task] = None
+        self._writes: Set[asyncio.Task] = set()
+        self._stats = {"items": 0, "batches": 0, "fallbacks": 0}
+
+    async def insert(self, item: Any) -> Any:
+        """
+        Insert an item with the next batch and wait for its row.
+
+        An item whose caller is cancelled before its batch is written is left out of it.
+
+        :param item: Item in the form accepted by insert_many.
+        :return: The stored row; the exception of its insert is raised here.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Batches never span event loops
+            self._loop, self._pending, self._timer = loop, [], None
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._start_write()
+        elif self._timer is None:
+            self._timer = loop.create_task(self._write_after_window())
+        return await future
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        stats["items_per_batch"] = round(stats["items"] / stats["batches"], 2) if stats["batches"] else 0
+        return stats
+
+    async def _write_after_window(self):
+        await asyncio.sleep(self.window)
+        self._timer = None
+        if self._pending:
+            self._start_write()
+
+    def _start_write(self):
+        batch, self._pending = self._pending, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        task = asyncio.get_running_loop().create_task(self._write(batch))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    async def _write(self, batch: List[Tuple[Any, asyncio.Future]]):
+        batch = [(item, future) for item, future in batch if not future.cancelled()]
+        if not batch:
+            return
+        try:
+            rows = await self.insert_many([item for item, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                _, future = batch[0]
+                if not future.done():
+                    future.set_exception(e)
+                return
+            self.logger.warning(f"Bulk insert of {len(batch)} items failed, inserting them one at a time: {str(e)}")
+            self._stats["fallbacks"] += 1
+            for entry in batch:
+                await self._write([entry])
+            return
+        except BaseException:
+            for _, future in batch:
+                future.cancel()
+            raise
+        self._stats["items"] += len(batch)
+        self._stats["batches"] += 1
+        for (_, future), row in zip(batch, rows):
+            if not future.done():
+                future.set_result(row)
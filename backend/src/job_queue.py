@@ -0,0 +1,247 @@
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from prisma.errors import UniqueViolationError
+
+from shared.types.ContentCreation import ContentCreationRequest
+from .config import get_section
+from .models import invalidate_contents
+from .prisma import prisma, run_write
+from .single_flight import request_hash
+
+class IdempotencyKeyMismatch(Exception):
+    def __init__(self, key: str):
+        super().__init__(f"Idempotency-Key {key} was already used with a different request")
+        self.key = key
+
+class ContentJobInProgress(Exception):
+    def __init__(self, content_id: int, job_id: int):
+        super().__init__(f"Content {content_id} is already being generated by job {job_id}")
+        self.content_id = content_id
+        self.job_id = job_id
+
+class JobQueue:
+    def __init__(self, lease_seconds: Optional[float] = None, max_attempts: Optional[int] = None):
+        """
+        Initialize the durable job queue stored in the Job table.
+
+        :param lease_seconds: How long a claimed job stays owned by a worker without a heartbeat.
+        :param max_attempts: Number of claims after which a job that keeps failing is marked as failed.
+        """
+        settings = get_section('job_queue')
+        self.lease_seconds = lease_seconds if lease_seconds is not None else settings.get('lease_seconds', 60)
+        self.max_attempts = max_attempts if max_attempts is not None else settings.get('max_attempts', 3)
+        self.logger = logging.getLogger(__name__)
+
+    def _lease_expiry(self) -> datetime:
+        return datetime.now(timezone.utc) + timedelta(seconds=self.lease_seconds)
+
+    async def enqueue(self, requests: List[ContentCreationRequest], idempotency_keys: Optional[List[Optional[str]]] = None) -> List[Dict[str, Any]]:
+        """
+        Persist one job per content creation request, unless an equivalent job already exists.
+
+        A request with an idempotency key already used returns the job of that key, whatever
+        its status, provided it is the same request; a new key always creates a job, so that
+        the key maps to exactly one job.
+        A request without a key that is identical to a queued or running job, compared by
+        request_hash, returns that job. Both are reported as deduplicated.
+
+        :param requests: Validated content creation requests.
+        :param idempotency_keys: Optional client supplied key per request.
+        :return: {"jobId", "status", "deduplicated"} per request, in request order.
+        :raises IdempotencyKeyMismatch: If a key was used before with a different request; no job is enqueued then.
+        """
+        keys = idempotency_keys or [None] * len(requests)
+        hashes = [request_hash(request.dict()) for request in requests]
+
+        async def insert_jobs() -> List[Dict[str, Any]]:
+            async with prisma.tx() as transaction:
+                used_keys = [key for key in keys if key]
+                by_key = {job.idempotencyKey: job for job in await transaction.job.find_many(
+                    where={"idempotencyKey": {"in": used_keys}})} if used_keys else {}
+                in_flight = {job.requestHash: job for job in await transaction.job.find_many(
+                    where={"requestHash": {"in": list(set(hashes))}, "status": {"in": ["queued", "running"]}},
+                    order={"id": "asc"},
+                )}
+                results = []
+                for request, key, hash_ in zip(requests, keys, hashes):
+                    job = by_key.get(key) if key else None
+                    if job is not None and job.requestHash != hash_:
+                        raise IdempotencyKeyMismatch(key)
+                    if job is None and key is None:
+                        job = in_flight.get(hash_)
+                    if job is not None:
+                        results.append({"jobId": job.id, "status": job.status, "deduplicated": True})
+                        continue
+                    job = await transaction.job.create(data={
+                        "status": "queued",
+                        "payload": request.json(),
+                        "requestHash": hash_,
+                        "idempotencyKey": key,
+                    })
+                    in_flight.setdefault(hash_, job)
+                    if key:
+                        by_key[key] = job
+                    results.append({"jobId": job.id, "status": job.status, "deduplicated": False})
+                return results
+
+        try:
+            results = await run_write(insert_jobs)
+        except UniqueViolationError:
+            # Another process stored one of the keys meanwhile; the retry returns its job
+            results = await run_write(insert_jobs)
+        deduplicated = sum(1 for result in results if result["deduplicated"])
+        self.logger.info(f"Enqueued {len(results) - deduplicated} content jobs, {deduplicated} deduplicated")
+        return results
+
+    async def enqueue_regeneration(self, content_id: int, request: ContentCreationRequest) -> Optional[Dict[str, Any]]:
+        """
+        Persist a job regenerating an existing content from a new request.
+
+        The worker reruns only the stages whose input fingerprints differ from those stored
+        with the content. Two jobs writing the same content would overwrite each other's
+        results, so none is enqueued while another job of the content is queued or running.
+
+        :param content_id: Id of the content to regenerate.
+        :param request: Validated content creation request.
+        :return: {"jobId", "status", "contentId"}, or None if the content does not exist.
+        :raises ContentJobInProgress: If a job of the content is queued or running.
+        """
+        async def insert_job() -> Optional[Dict[str, Any]]:
+            async with prisma.tx() as transaction:
+                if await transaction.content.find_unique(where={"id": content_id}) is None:
+                    return None
+                job = await transaction.job.find_first(
+                    where={"contentId": content_id, "status": {"in": ["queued", "running"]}},
+                    order={"id": "asc"},
+                )
+                if job is not None:
+                    raise ContentJobInProgress(content_id, job.id)
+                job = await transaction.job.create(data={
+                    "status": "queued",
+                    "payload": request.json(),
+                    "contentId": content_id,
+                })
+                await transaction.content.update(where={"id": content_id}, data={"status": "pending"})
+                return {"jobId": job.id, "status": job.status, "contentId": content_id}
+
+        result = await run_write(insert_job)
+        if result is not None:
+            invalidate_contents([content_id])
+            self.logger.info(f"Enqueued regeneration of content {content_id} as job {result['jobId']}")
+        return result
+
+    async def claim(self, worker_id: str) -> Optional[Any]:
+        """
+        Atomically take the oldest queued job, or a running job whose lease expired.
+
+        The claim is a compare-and-set on (status, attempts), so two workers racing for the
+        same job cannot both win it.
+
+        :param worker_id: Identifier of the claiming worker.
+        :return: The claimed job, or None if the queue is empty.
+        """
+        while True:
+            now = datetime.now(timezone.utc)
+            job = await prisma.job.find_first(
+                where={"OR": [
+                    {"status": "queued"},
+                    {"status": "running", "leaseExpiresAt": {"lt": now}},
+                ]},
+                order={"id": "asc"},
+            )
+            if job is None:
+                return None
+
+            if job.attempts >= self.max_attempts:
+                error = job.error or "Lease expired too many times"
+                failed = await run_write(lambda: prisma.job.update_many(
+                    where={"id": job.id, "status": job.status, "attempts": job.attempts},
+                    data={"status": "failed", "leaseOwner": None, "error": error},
+                ))
+                if failed and job.contentId is not None:
+                    # The worker that held the job is gone and cannot report the failure itself
+                    await run_write(lambda: prisma.content.update_many(
+                        where={"id": job.contentId},
+                        data={"status": "failed", "currentStep": f"Failed: {error}"[:500]},
+                    ))
+                    invalidate_contents([job.contentId])
+                continue
+
+            claimed = await run_write(lambda: prisma.job.update_many(
+                where={"id": job.id, "status": job.status, "attempts": job.attempts},
+                data={
+                    "status": "running",
+                    "leaseOwner": worker_id,
+                    "leaseExpiresAt": self._lease_expiry(),
+                    "heartbeatAt": now,
+                    "attempts": {"increment": 1},
+                },
+            ))
+            if claimed:
+                self.logger.info(f"Worker {worker_id} claimed job {job.id} (attempt {job.attempts + 1})")
+                return await prisma.job.find_unique(where={"id": job.id})
+
+    async def heartbeat(self, job_id: int, worker_id: str) -> bool:
+        """
+        Extend the lease of a job owned by the worker.
+
+        :return: False if the worker no longer owns the job.
+        """
+        updated = await run_write(lambda: prisma.job.update_many(
+            where={"id": job_id, "leaseOwner": worker_id, "status": "running"},
+            data={"leaseExpiresAt": self._lease_expiry(), "heartbeatAt": datetime.now(timezone.utc)},
+        ))
+        return updated > 0
+
+    async def save_checkpoint(self, job_id: int, worker_id: str, stage: str, checkpoint: Dict[str, Any], content_id: Optional[int] = None) -> bool:
+        """
+        Record the results of all stages completed so far.
+
+        :param stage: Name of the stage that just completed.
+        :param checkpoint: Serializable results of every completed stage, by stage name.
+        :param content_id: Id of the Content row, once the script stage has created it.
+        :return: False if the worker no longer owns the job.
+        """
+        data = {"checkpoint": json.dumps(checkpoint), "lastCompletedStage": stage}
+        if content_id is not None:
+            data["contentId"] = content_id
+        updated = await run_write(lambda: prisma.job.update_many(where={"id": job_id, "leaseOwner": worker_id}, data=data))
+        return updated > 0
+
+    async def complete(self, job_id: int, worker_id: str, content_id: Optional[int] = None):
+        data = {"status": "completed", "leaseOwner": None, "leaseExpiresAt": None, "error": None}
+        if content_id is not None:
+            data["contentId"] = content_id
+        await run_write(lambda: prisma.job.update_many(where={"id": job_id, "leaseOwner": worker_id}, data=data))
+
+    async def fail(self, job_id: int, worker_id: str, error: str, attempts: int) -> str:
+        """
+        Release a failed job: it is queued again until it reaches max_attempts.
+
+        :return: The job's new status, "queued" or "failed".
+        """
+        status = "queued" if attempts < self.max_attempts else "failed"
+        await run_write(lambda: prisma.job.update_many(
+            where={"id": job_id, "leaseOwner": worker_id},
+            data={"status": status, "leaseOwner": None, "leaseExpiresAt": None, "error": error},
+        ))
+        self.logger.warning(f"Job {job_id} failed on attempt {attempts}, now {status}: {error}")
+        return status
+
+    async def get(self, job_id: int) -> Optional[Any]:
+        return await prisma.job.find_unique(where={"id": job_id})
+
+    async def get_status(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Read the status columns of a job, leaving out its payload and checkpoint.
+
+        :param job_id: Id of the job.
+        :return: Row with id, status, contentId, lastCompletedStage, attempts and error, or None.
+        """
+        return await prisma.query_first(
+            'SELECT "id", "status", "contentId", "lastCompletedStage", "attempts", "error" FROM "Job" WHERE "id" = ?',
+            job_id,
+        )
@@ -0,0 +1,114 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+class LLMResponseCache:
+    def __init__(self, path: str, ttl_seconds: float = 7 * 24 * 3600, max_entries: int = 10000):
+        """
+        Initialize a persistent cache of LLM responses stored in SQLite.
+
+        :param path: Path of the SQLite file. Use ':memory:' for a process-local cache.
+        :param ttl_seconds: Time after which an entry is considered stale.
+        :param max_entries: Maximum number of entries kept; the least recently used are evicted first.
+        """
+        self.logger = logging.getLogger(__name__)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS llm_responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, last_accessed REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS llm_responses_last_accessed ON llm_responses (last_accessed)")
+        self._connection.commit()
+
+    @staticmethod
+    def make_key(prompt: str, model: str, temperature: float, response_format: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Build the content address of a request.
+
+        :return: SHA-256 hex digest of the canonical request parameters.
+        """
+        payload = json.dumps(
+            {"prompt": prompt, "model": model, "temperature": temperature, "response_format": response_format},
+            sort_keys=True,
+            separators=(',', ':'),
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response and mark it as recently used.
+
+        :param key: Key returned by make_key.
+        :return: The cached value, or None on a miss or if the entry expired.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute("SELECT value, created_at FROM llm_responses WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    self._connection.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                    self._connection.commit()
+                self.misses += 1
+                return None
+            self._connection.execute("UPDATE llm_responses SET last_accessed = ? WHERE key = ?", (now, key))
+            self._connection.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, value: str):
+        """
+        Store a response and evict the least recently used entries above max_entries.
+
+        :param key: Key returned by make_key.
+        :param value: Serialized response.
+        """
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, value, created_at, last_accessed) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._connection.execute("DELETE FROM llm_responses WHERE created_at < ?", (now - self.ttl_seconds,))
+            cursor = self._connection.execute(
+                "DELETE FROM llm_responses WHERE key IN ("
+                "SELECT key FROM llm_responses ORDER BY last_accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self.evictions += max(cursor.rowcount, 0)
+            self._connection.commit()
+
+    async def aget(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: str):
+        await asyncio.to_thread(self.set, key, value)
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute("DELETE FROM llm_responses")
+            self._connection.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0,
+        }
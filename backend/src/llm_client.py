@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import os
+import weakref
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+from openai import AsyncOpenAI
+
+from .config import get_section
+
+# One client per event loop: httpx connection pools cannot be shared across loops.
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = weakref.WeakKeyDictionary()
+
+def _build_client(settings: Dict[str, Any]) -> AsyncOpenAI:
+    http_client = httpx.AsyncClient(
+        http2=settings.get('http2', True),
+        limits=httpx.Limits(
+            max_connections=settings.get('max_connections', 20),
+            max_keepalive_connections=settings.get('max_keepalive_connections', 10),
+        ),
+        timeout=httpx.Timeout(
+            settings.get('request_timeout', 60),
+            connect=settings.get('connect_timeout', 10),
+        ),
+    )
+    return AsyncOpenAI(
+        api_key=os.getenv('OPENAI_API_KEY'),
+        http_client=http_client,
+        max_retries=settings.get('max_retries', 2),
+    )
+
+def get_llm_client() -> AsyncOpenAI:
+    """
+    Get the shared AsyncOpenAI client for the running event loop, creating it on first use.
+
+    :return: AsyncOpenAI client backed by a size-limited HTTP/2 connection pool.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = _build_client(get_section('llm_client'))
+        _clients[loop] = client
+        logging.getLogger(__name__).info("Created pooled OpenAI client")
+    return client
+
+async def close_llm_client():
+    """
+    Close the client of the running event loop and release its pooled connections.
+    """
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
+
+def close_on_shutdown(loop: asyncio.AbstractEventLoop, timeout: float = 10):
+    """
+    Close the client of a loop running in another thread, e.g. from an atexit handler.
+    """
+    if loop.is_running():
+        asyncio.run_coroutine_threadsafe(close_llm_client(), loop).result(timeout)
+
+async def create_chat_completion(
+    messages: list,
+    timeout: Optional[float] = None,
+    total_timeout: Optional[float] = None,
+    max_retries: Optional[int] = None,
+    **kwargs,
+) -> Any:
+    """
+    Run a chat completion without blocking the event loop.
+
+    :param messages: Chat messages sent to the model.
+    :param timeout: Timeout in seconds for a single HTTP attempt. Defaults to llm_client.request_timeout.
+    :param total_timeout: Deadline in seconds for the whole call, retries included. Defaults to llm_client.total_timeout.
+    :param max_retries: Retries of the client for this call, e.g. 0 when the caller handles 429s. Defaults to llm_client.max_retries.
+    :param kwargs: Extra arguments passed to chat.completions.create (model, temperature, ...).
+    :return: The chat completion response.
+    :raises: asyncio.TimeoutError if the total deadline is exceeded.
+    """
+    settings = get_section('llm_client')
+    kwargs.setdefault('model', settings.get('model', 'gpt-4o-2024-08-06'))
+    if timeout is None:
+        timeout = settings.get('request_timeout', 60)
+    if total_timeout is None:
+        total_timeout = settings.get('total_timeout', 180)
+
+    client = get_llm_client()
+    if max_retries is not None:
+        client = client.with_options(max_retries=max_retries)
+    return await asyncio.wait_for(
+        client.chat.completions.create(messages=messages, timeout=timeout, **kwargs),
+        timeout=total_timeout,
+    )
+
+async def stream_chat_completion(
+    messages: list,
+    timeout: Optional[float] = None,
+    total_timeout: Optional[float] = None,
+    max_retries: Optional[int] = None,
+    **kwargs,
+) -> AsyncIterator[Any]:
+    """
+    Stream a chat completion chunk by chunk without blocking the event loop.
+
+    :param messages: Chat messages sent to the model.
+    :param timeout: Timeout in seconds for a single HTTP attempt. Defaults to llm_client.request_timeout.
+    :param total_timeout: Deadline in seconds for the whole stream. Defaults to llm_client.total_timeout.
+    :param max_retries: Retries of the client for this call, e.g. 0 when the caller handles 429s. Defaults to llm_client.max_retries.
+    :param kwargs: Extra arguments passed to chat.completions.create (model, temperature, ...).
+    :return: Async iterator over the streamed chunks.
+    :raises: asyncio.TimeoutError if the total deadline is exceeded.
+    """
+    settings = get_section('llm_client')
+    kwargs.setdefault('model', settings.get('model', 'gpt-4o-2024-08-06'))
+    if timeout is None:
+        timeout = settings.get('request_timeout', 60)
+    if total_timeout is None:
+        total_timeout = settings.get('total_timeout', 180)
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + total_timeout
+    client = get_llm_client()
+    if max_retries is not None:
+        client = client.with_options(max_retries=max_retries)
+    stream = await asyncio.wait_for(
+        client.chat.completions.create(messages=messages, timeout=timeout, stream=True, **kwargs),
+        timeout=total_timeout,
+    )
+    chunks = stream.__aiter__()
+    while True:
+        try:
+            chunk = await asyncio.wait_for(chunks.__anext__(), timeout=max(deadline - loop.time(), 0))
+        except StopAsyncIteration:
+            return
+        yield chunk
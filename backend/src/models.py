@@ -1,14 +1,286 @@
-from prisma import Prisma
-
-db = Prisma()
+import base64
+import json
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from .config import get_section
+from .insert_batcher import InsertBatcher
+# Shared client of the process, kept under its historical name
+from .prisma import prisma as db, run_write
+from .response_cache import MemoryCacheBackend, RedisCacheBackend, ResponseCache
+from .serialization import JSONSerializer, get_serializer
 
 # We don't need to define models here anymore, as they're defined in the Prisma schema
 # Instead, we can add helper methods if needed
 
+# Relation fields of a nested Content create and the child model accessor they map to
+CONTENT_CHILD_RELATIONS = {
+    "generalOptions": "generaloptions",
+    "contentOptions": "contentoptions",
+    "visualPromptOptions": "visualpromptoptions",
+    "scenes": "scene",
+    "audioPrompts": "audioprompt",
+    "visualPrompts": "visualprompt",
+    "musicPrompt": "musicprompt",
+    "tokenUsage": "tokenusage",
+}
+
+# Child relations that accumulate across regenerations instead of being replaced
+APPEND_ONLY_RELATIONS = {"tokenUsage"}
+
+_content_cache: Optional[ResponseCache] = None
+_content_inserts: Optional[InsertBatcher] = None
+
+def get_json_serializer() -> JSONSerializer:
+    """
+    Get the serializer selected by serialization.json_library.
+    """
+    return get_serializer(get_section('serialization').get('json_library', 'auto'))
+
 async def get_content_by_id(content_id: int):
     return await db.content.find_unique(where={"id": content_id})
 
+def get_content_cache() -> ResponseCache:
+    """
+    Get the cache of get-content responses, built from the content_cache section on first use.
+    """
+    global _content_cache
+    if _content_cache is None:
+        settings = get_section('content_cache')
+        ttl_seconds = settings.get('ttl_seconds')
+        if settings.get('backend', 'memory') == 'redis':
+            backend = RedisCacheBackend(settings['redis_url'])
+        else:
+            backend = MemoryCacheBackend(settings.get('max_entries', 1000))
+            # Invalidations by worker processes do not reach this process's entries
+            memory_ttl_seconds = settings.get('memory_ttl_seconds', 30)
+            ttl_seconds = memory_ttl_seconds if ttl_seconds is None else min(ttl_seconds, memory_ttl_seconds)
+        _content_cache = ResponseCache(backend, ttl_seconds)
+    return _content_cache
+
+def content_cache_key(content_id: int) -> str:
+    return f"content:{content_id}"
+
+def invalidate_contents(content_ids: Iterable[int]):
+    """
+    Drop the cached responses of contents that were just written.
+    """
+    get_content_cache().invalidate(content_cache_key(content_id) for content_id in set(content_ids))
+
+async def get_content_response(content_id: int) -> Optional[bytes]:
+    """
+    Read a content with all its relations as a JSON response body, through the content cache.
+
+    Only completed contents are cached. A content is completed by its final commit, and
+    regenerating it sets it back to pending first, so no entry is stored before the results
+    it holds have all been committed. Entries of the memory backend expire after
+    content_cache.memory_ttl_seconds, since they miss the invalidations of worker processes.
+
+    :param content_id: Id of the content.
+    :return: The JSON body, or None if the content does not exist.
+    """
+    async def load():
+        content = await db.content.find_unique(
+            where={"id": content_id},
+            include={relation: True for relation in CONTENT_CHILD_RELATIONS},
+        )
+        if content is None:
+            return None
+        # generatedContent is stored serialized and passed through without parsing
+        body = get_json_serializer().dump_model(content, raw_fields={"generatedContent": content.generatedContent})
+        return body, content.status == "completed"
+
+    return await get_content_cache().get_or_load(content_cache_key(content_id), load)
+
+async def find_content_progress(content_ids: List[int]) -> List[Dict[str, Any]]:
+    """
+    Read the progress columns of contents, leaving out the generated content JSON.
+
+    :param content_ids: Ids of the contents.
+    :return: Rows with id, status, progress, currentStep and updatedAt; missing contents are left out.
+    """
+    if not content_ids:
+        return []
+    placeholders = ', '.join('?' for _ in content_ids)
+    return await db.query_raw(
+        f'SELECT "id", "status", "progress", "currentStep", "updatedAt" FROM "Content" WHERE "id" IN ({placeholders})',
+        *content_ids,
+    )
+
+# Columns of a content listing entry; the generated content JSON is left out
+CONTENT_SUMMARY_COLUMNS = (
+    "id", "title", "videoSubject", "status", "progress", "currentStep",
+    "generatedPicture", "generatedVideo", "createdAt", "updatedAt",
+)
+
+def encode_content_cursor(created_at: str, content_id: int) -> str:
+    """
+    Build the opaque cursor that continues a content listing after the given row.
+    """
+    return base64.urlsafe_b64encode(json.dumps([created_at, content_id]).encode()).decode().rstrip('=')
+
+def decode_content_cursor(cursor: str) -> Tuple[str, int]:
+    """
+    Read the (createdAt, id) position stored in a cursor from encode_content_cursor.
+
+    :raises: ValueError if the cursor is malformed.
+    """
+    try:
+        created_at, content_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    if not isinstance(created_at, str) or not isinstance(content_id, int) or isinstance(content_id, bool):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return created_at, content_id
+
+async def list_content_summaries(limit: int, statuses: Optional[List[str]] = None, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Read one page of content summaries, newest first, with keyset pagination on (createdAt, id).
+
+    The cursor holds the (createdAt, id) of the last content of the previous page, compared
+    as a row value, so the query stays an index range scan at any depth and a page goes on
+    where it stopped even if that content has been deleted since. createdAt is kept in its
+    stored form, which the column's affinity compares as it was stored.
+
+    :param limit: Maximum number of summaries.
+    :param statuses: Only include contents with one of these statuses.
+    :param cursor: Cursor returned with the previous page.
+    :return: Summary rows with the CONTENT_SUMMARY_COLUMNS, and the cursor of the next page, or None on the last page.
+    :raises: ValueError if the cursor is malformed.
+    """
+    conditions = []
+    params: List[Any] = []
+    if statuses:
+        conditions.append(f'"status" IN ({", ".join("?" for _ in statuses)})')
+        params.extend(statuses)
+    if cursor is not None:
+        conditions.append('("createdAt", "id") < (?, ?)')
+        params.extend(decode_content_cursor(cursor))
+    where = f'WHERE {" AND ".join(conditions)} ' if conditions else ''
+    columns = ', '.join(f'"{column}"' for column in CONTENT_SUMMARY_COLUMNS)
+    # One extra row tells whether there is a next page
+    rows = await db.query_raw(
+        f'SELECT {columns}, CAST("createdAt" AS TEXT) AS "sortKey" FROM "Content" {where}'
+        f'ORDER BY "createdAt" DESC, "id" DESC LIMIT ?',
+        *params, limit + 1,
+    )
+    sort_keys = [row.pop("sortKey") for row in rows]
+    next_cursor = encode_content_cursor(sort_keys[limit - 1], rows[limit - 1]["id"]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+async def get_token_usage(content_id: int) -> List[Dict[str, Any]]:
+    """
+    Sum the token usage ledger of a content by stage and model.
+
+    :param content_id: Id of the content.
+    :return: Rows with stage, model, calls, cachedCalls and the summed token columns.
+    """
+    return await db.query_raw(
+        'SELECT "stage", "model", COUNT(*) AS "calls", SUM("cached") AS "cachedCalls", '
+        'SUM("promptTokens") AS "promptTokens", SUM("completionTokens") AS "completionTokens", '
+        'SUM("estimatedPromptTokens") AS "estimatedPromptTokens", SUM("estimatedCompletionTokens") AS "estimatedCompletionTokens" '
+        'FROM "TokenUsage" WHERE "contentId" = ? GROUP BY "stage", "model" ORDER BY "stage", "model"',
+        content_id,
+    )
+
 async def create_content(data):
-    return await db.content.create(data=data)
+    return await run_write(lambda: db.content.create(data=data))
+
+async def create_contents(contents: List[Dict[str, Any]], batch_size: Optional[int] = None) -> List[Any]:
+    """
+    Insert many contents with their child rows using one create_many per child table.
+
+    A nested create inserts the children of every content one by one. Here each batch of
+    contents costs one insert per content row plus one multi-row insert per child table,
+    all in a single transaction.
+
+    :param contents: Content data in the shape of a nested prisma.content.create, with the
+                     children under "<relation>": {"create": ...}.
+    :param batch_size: Contents per transaction. Defaults to database.bulk_insert_batch_size.
+    :return: The created Content rows with their assigned ids, in input order.
+    """
+    if batch_size is None:
+        batch_size = get_section('database').get('bulk_insert_batch_size', 100)
+
+    async def insert_batch(batch: List[Dict[str, Any]]) -> List[Any]:
+        created = []
+        async with db.tx() as transaction:
+            child_rows: Dict[str, List[Dict[str, Any]]] = {model: [] for model in CONTENT_CHILD_RELATIONS.values()}
+            for data in batch:
+                scalars = {key: value for key, value in data.items() if key not in CONTENT_CHILD_RELATIONS}
+                content = await transaction.content.create(data=scalars)
+                created.append(content)
+                for model, rows in _child_rows(data, content.id).items():
+                    child_rows[model].extend(rows)
+            for model, rows in child_rows.items():
+                if rows:
+                    await getattr(transaction, model).create_many(data=rows)
+        return created
+
+    created = []
+    for start in range(0, len(contents), batch_size):
+        created.extend(await run_write(lambda: insert_batch(contents[start:start + batch_size])))
+    return created
+
+def get_content_inserts() -> InsertBatcher:
+    """
+    Get the batcher of the process's single content inserts, built from the database section on first use.
+    """
+    global _content_inserts
+    if _content_inserts is None:
+        settings = get_section('database')
+        _content_inserts = InsertBatcher(
+            create_contents,
+            settings.get('bulk_insert_batch_size', 100),
+            settings.get('bulk_insert_window_ms', 20),
+        )
+    return _content_inserts
+
+async def insert_content(data: Dict[str, Any]) -> Any:
+    """
+    Insert one content with its child rows, together with the other contents the process
+    inserts at about the same time, see create_contents.
+
+    :param data: Content data in the shape accepted by create_contents.
+    :return: The created Content row.
+    """
+    return await get_content_inserts().insert(data)
+
+async def replace_content(content_id: int, data: Dict[str, Any]) -> Any:
+    """
+    Overwrite a content and its child rows with newly generated data, in one transaction.
+
+    The children of each relation in data are deleted and inserted again, except for the
+    APPEND_ONLY_RELATIONS, whose new rows are added to the existing ones.
+
+    :param content_id: Id of the content.
+    :param data: Content data in the shape accepted by create_contents.
+    :return: The updated Content row.
+    """
+    async def replace() -> Any:
+        async with db.tx() as transaction:
+            scalars = {key: value for key, value in data.items() if key not in CONTENT_CHILD_RELATIONS}
+            content = await transaction.content.update(where={"id": content_id}, data=scalars)
+            for relation, model in CONTENT_CHILD_RELATIONS.items():
+                if relation in data and relation not in APPEND_ONLY_RELATIONS:
+                    await getattr(transaction, model).delete_many(where={"contentId": content_id})
+            for model, rows in _child_rows(data, content_id).items():
+                if rows:
+                    await getattr(transaction, model).create_many(data=rows)
+        return content
+
+    content = await run_write(replace)
+    invalidate_contents([content_id])
+    return content
+
+def _child_rows(data: Dict[str, Any], content_id: int) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Collect the nested child creates of a content's data, by child model.
+    """
+    child_rows: Dict[str, List[Dict[str, Any]]] = {}
+    for relation, model in CONTENT_CHILD_RELATIONS.items():
+        if relation not in data:
+            continue
+        rows = data[relation]["create"]
+        child_rows[model] = [{**row, "contentId": content_id} for row in (rows if isinstance(rows, list) else [rows])]
+    return child_rows
 
-# Add more helper methods as needed
\ No newline at end of file
+# Add more helper methods as needed
@@ -1,6 +1,12 @@
+import asyncio
+import logging
 import os
+import threading
+from typing import Any, Awaitable, Dict, Optional
 from dotenv import load_dotenv
 from prisma import Prisma
+from .config import get_section
+from .database_writer import DatabaseWriter, WriteOperation
 
 # Load environment variables from .env file
 load_dotenv()
@@ -8,13 +14,112 @@ load_dotenv()
 # Set the PRISMA_SCHEMA_PATH environment variable to point to the shared schema
 os.environ['PRISMA_SCHEMA_PATH'] = '../../shared/prisma/schema.prisma'
 
-# Create a Prisma instance
-prisma = Prisma()
+def get_database_profile() -> Dict[str, Any]:
+    """
+    Get the startup profile selected by database.profile; SQLite databases only.
 
-# Function to initialize Prisma
+    :return: The profile's settings, or an empty dictionary for the default profile or another database.
+    """
+    settings = get_section('database')
+    if not os.getenv('DATABASE_URL', 'file:./dev.db').startswith('file:'):
+        return {}
+    return (settings.get('profiles') or {}).get(settings.get('profile', 'default')) or {}
+
+def _pooled_database_url() -> str:
+    """
+    Add the query engine's connection pool settings from the database section to DATABASE_URL.
+    """
+    url = os.getenv('DATABASE_URL', 'file:./dev.db')
+    settings = get_section('database')
+    busy_timeout = get_database_profile().get('busy_timeout')
+    pool_params = {
+        'connection_limit': settings.get('connection_limit'),
+        'pool_timeout': settings.get('pool_timeout'),
+        # For SQLite the engine applies socket_timeout as busy timeout on every pooled connection
+        'socket_timeout': busy_timeout / 1000 if busy_timeout is not None else None,
+    }
+    query = '&'.join(f"{key}={value}" for key, value in pool_params.items() if value is not None and f"{key}=" not in url)
+    if not query:
+        return url
+    return f"{url}{'&' if '?' in url else '?'}{query}"
+
+# The one Prisma instance of the process; every module imports it from here
+prisma = Prisma(datasource={'url': _pooled_database_url()})
+
+# Queues the writes of the process when the database profile asks for a single writer
+database_writer = DatabaseWriter()
+
+# Function to initialize Prisma; safe to call more than once
 async def init_prisma():
-    await prisma.connect()
+    if not prisma.is_connected():
+        await prisma.connect()
+        await apply_database_profile()
+
+async def apply_database_profile():
+    """
+    Apply the journal mode of the selected database profile.
+
+    journal_mode is stored in the database file, so setting it over any pooled connection
+    holds for all of them. busy_timeout holds per connection and is passed in the datasource
+    URL instead, which the engine applies to every connection it opens.
+    """
+    profile = get_database_profile()
+    if profile.get('journal_mode'):
+        mode = await prisma.query_raw(f"PRAGMA journal_mode = {profile['journal_mode']}")
+        logging.getLogger(__name__).info(f"SQLite journal mode: {mode}")
+
+async def run_write(operation: WriteOperation) -> Any:
+    """
+    Run a write through the process's single writer if the database profile enables it.
+
+    :param operation: Coroutine function performing the write; it must not call run_write itself.
+    :return: The operation's result.
+    """
+    if get_database_profile().get('single_writer'):
+        return await database_writer.submit(operation)
+    return await operation()
 
 # Function to disconnect Prisma
 async def disconnect_prisma():
-    await prisma.disconnect()
\ No newline at end of file
+    if prisma.is_connected():
+        await database_writer.close()
+        await prisma.disconnect()
+
+# Flask runs every async view in its own short-lived event loop, while the client's pooled
+# connections belong to the loop that connected it. The app therefore keeps the client on one
+# long-lived loop in a background thread and submits database coroutines to it.
+_database_loop: Optional[asyncio.AbstractEventLoop] = None
+_database_loop_lock = threading.Lock()
+
+def get_database_loop() -> asyncio.AbstractEventLoop:
+    global _database_loop
+    with _database_loop_lock:
+        if _database_loop is None:
+            _database_loop = asyncio.new_event_loop()
+            threading.Thread(target=_database_loop.run_forever, name='prisma-loop', daemon=True).start()
+    return _database_loop
+
+async def run_on_database_loop(coroutine: Awaitable[Any]) -> Any:
+    """
+    Await a coroutine that uses the shared client on the process-wide database loop.
+
+    :param coroutine: Coroutine using the shared Prisma client.
+    :return: The coroutine's result.
+    """
+    future = asyncio.run_coroutine_threadsafe(coroutine, get_database_loop())
+    return await asyncio.wrap_future(future)
+
+def connect_on_startup():
+    """
+    Connect the shared client once, on the database loop.
+    """
+    asyncio.run_coroutine_threadsafe(init_prisma(), get_database_loop()).result()
+
+def disconnect_on_shutdown(timeout: float = 10):
+    """
+    Disconnect the shared client and stop the database loop.
+    """
+    if _database_loop is None:
+        return
+    asyncio.run_coroutine_threadsafe(disconnect_prisma(), _database_loop).result(timeout)
+    _database_loop.call_soon_threadsafe(_database_loop.stop)
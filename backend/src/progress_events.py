@@ -0,0 +1,245 @@
+import json
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+Event = Tuple[int, Dict[str, Any]]
+
+class ProgressSubscription:
+    def __init__(self, broker: "ProgressBroker", content_id: int):
+        self.broker = broker
+        self.content_id = content_id
+        self.events: "queue.Queue[Event]" = queue.Queue()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Event]:
+        """
+        Wait for the next event.
+
+        :param timeout: Seconds to wait.
+        :return: (event id, data), or None if no event arrived in time.
+        """
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def __enter__(self) -> "ProgressSubscription":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class ProgressBroker:
+    def __init__(self, history_size: int = 50, max_contents: int = 1000):
+        """
+        Initialize an in-memory fan-out of progress events per content id.
+
+        :param history_size: Events kept per content to resume from a Last-Event-ID.
+        :param max_contents: Contents whose history is kept; the least recently updated without subscribers are dropped first.
+        """
+        self.history_size = history_size
+        self.max_contents = max_contents
+        self._lock = threading.Lock()
+        self._history: "OrderedDict[int, Deque[Event]]" = OrderedDict()
+        self._subscribers: Dict[int, Set[ProgressSubscription]] = {}
+
+    def publish(self, content_id: int, data: Dict[str, Any], event_id: Optional[int] = None, only_if_changed: bool = False) -> Optional[int]:
+        """
+        Send an event to every subscriber of a content.
+
+        :param content_id: Id of the content the event belongs to.
+        :param data: Event payload.
+        :param event_id: Preferred event id, e.g. the update time in milliseconds. Ids are kept strictly increasing.
+        :param only_if_changed: Skip the event if it equals the last one published for this content.
+        :return: The id of the published event, or None if it was skipped.
+        """
+        with self._lock:
+            history = self._history.get(content_id)
+            if history is None:
+                history = self._history[content_id] = deque(maxlen=self.history_size)
+                self._evict()
+            self._history.move_to_end(content_id)
+            if only_if_changed and history and history[-1][1] == data:
+                return None
+            last_id = history[-1][0] if history else 0
+            event_id = max(last_id + 1, event_id if event_id is not None else int(time.time() * 1000))
+            history.append((event_id, data))
+            for subscription in self._subscribers.get(content_id, ()):
+                subscription.events.put((event_id, data))
+            return event_id
+
+    def subscribe(self, content_id: int, last_event_id: Optional[int] = None) -> ProgressSubscription:
+        """
+        Subscribe to the events of a content.
+
+        Events newer than last_event_id are replayed first; without a last_event_id only the
+        latest known event is replayed, as the current state.
+
+        :param content_id: Id of the content.
+        :param last_event_id: Value of the client's Last-Event-ID header.
+        :return: The subscription; close it when the client goes away.
+        """
+        subscription = ProgressSubscription(self, content_id)
+        with self._lock:
+            history = list(self._history.get(content_id, ()))
+            if last_event_id is None:
+                history = history[-1:]
+            for event_id, data in history:
+                if last_event_id is None or event_id > last_event_id:
+                    subscription.events.put((event_id, data))
+            self._subscribers.setdefault(content_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: ProgressSubscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.content_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.content_id]
+
+    def latest(self, content_id: int) -> Optional[Event]:
+        """
+        Get the last event published for a content, or None if none is known.
+        """
+        with self._lock:
+            history = self._history.get(content_id)
+            return history[-1] if history else None
+
+    def active_content_ids(self) -> List[int]:
+        with self._lock:
+            return list(self._subscribers.keys())
+
+    def _evict(self):
+        for content_id in list(self._history.keys()):
+            if len(self._history) <= self.max_contents:
+                return
+            if content_id not in self._subscribers:
+                del self._history[content_id]
+
+class ProgressFeed:
+    def __init__(self, broker: ProgressBroker, fetch: Callable[[List[int]], List[Dict[str, Any]]], interval: float = 1.0):
+        """
+        Initialize a background feed that publishes stored progress of subscribed contents.
+
+        Without a RedisProgressChannel, pipelines running in other processes only share progress
+        through the database, so a single query per interval covers every subscriber of this process.
+
+        :param broker: Broker receiving the events.
+        :param fetch: Function returning one snapshot per content id, each with 'contentId' and
+                      optionally 'eventId', plus the fields to publish.
+        :param interval: Seconds between two queries.
+        """
+        self.broker = broker
+        self.fetch = fetch
+        self.interval = interval
+        self.logger = logging.getLogger(__name__)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='progress-feed', daemon=True)
+                self._thread.start()
+
+    def poll(self):
+        content_ids = self.broker.active_content_ids()
+        if not content_ids:
+            return
+        for snapshot in self.fetch(content_ids):
+            snapshot = dict(snapshot)
+            content_id = snapshot['contentId']
+            event_id = snapshot.pop('eventId', None)
+            self.broker.publish(content_id, snapshot, event_id=event_id, only_if_changed=True)
+
+    def _run(self):
+        while True:
+            try:
+                self.poll()
+            except Exception as e:
+                self.logger.error(f"Error polling content progress: {str(e)}")
+            time.sleep(self.interval)
+
+class RedisProgressChannel:
+    def __init__(self, url: Optional[str] = None, channel: str = 'content-progress', client: Any = None):
+        """
+        Initialize a Redis pub/sub channel carrying progress events from the worker processes
+        to the server processes that stream them, as they happen.
+
+        Events are sent from a background thread, so publishing never blocks the pipeline, and
+        a failed send only loses that event: the stored progress is written separately.
+
+        :param url: Redis URL, e.g. redis://localhost:6379/0.
+        :param channel: Name of the pub/sub channel.
+        :param client: Redis client to use instead of connecting to url.
+        """
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise RuntimeError("The redis progress channel requires the 'redis' package") from e
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.channel = channel
+        self.logger = logging.getLogger(__name__)
+        self._outbox: "queue.Queue[str]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._sender: Optional[threading.Thread] = None
+        self._listener: Optional[threading.Thread] = None
+
+    def publish(self, content_id: int, data: Dict[str, Any]):
+        """
+        Queue an event of a content for every process listening on the channel.
+        """
+        self._outbox.put(json.dumps({"contentId": content_id, "data": data}))
+        with self._lock:
+            if self._sender is None:
+                self._sender = threading.Thread(target=self._send, name='progress-channel-sender', daemon=True)
+                self._sender.start()
+
+    def start(self, broker: ProgressBroker):
+        """
+        Forward the events of the channel to a broker, from a background thread.
+        """
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, args=(broker,), name='progress-channel-listener', daemon=True)
+                self._listener.start()
+
+    def deliver(self, broker: ProgressBroker, message: Any):
+        """
+        Publish an event received from the channel to a broker.
+        """
+        event = json.loads(message)
+        broker.publish(event["contentId"], event["data"])
+
+    def _send(self):
+        while True:
+            message = self._outbox.get()
+            try:
+                self.client.publish(self.channel, message)
+            except Exception as e:
+                self.logger.warning(f"Failed to publish a progress event: {str(e)}")
+
+    def _listen(self, broker: ProgressBroker):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    self.deliver(broker, message["data"])
+            except Exception as e:
+                self.logger.error(f"Error listening for progress events, resubscribing: {str(e)}")
+                time.sleep(1)
+
+def format_sse(event_id: int, data: Dict[str, Any]) -> str:
+    return f"id: {event_id}\ndata: {json.dumps(data)}\n\n"
+
+progress_broker = ProgressBroker()
@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+ProgressWrite = Callable[[Dict[int, Dict[str, Any]]], Awaitable[None]]
+
+class ProgressWriteBuffer:
+    def __init__(self, write: ProgressWrite, flush_interval_ms: float = 500):
+        """
+        Initialize a write-behind buffer for content progress.
+
+        Updates are merged per content id and written together every flush interval, so a
+        pipeline never waits on the database to report progress.
+
+        :param write: Coroutine function persisting {content id: column values} in one transaction.
+        :param flush_interval_ms: Milliseconds between the first buffered update and its flush.
+        """
+        self.write = write
+        self.flush_interval = flush_interval_ms / 1000
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._stats = {"updates": 0, "flushes": 0, "rows_written": 0, "failed_flushes": 0}
+
+    def record(self, content_id: int, data: Dict[str, Any]):
+        """
+        Buffer column values for a content; newer values replace older ones of the same column.
+
+        Called outside an event loop, the values wait for the next flush or for close().
+
+        :param content_id: Id of the content row.
+        :param data: Column values to write.
+        """
+        with self._lock:
+            self._pending.setdefault(content_id, {}).update(data)
+            self._stats["updates"] += 1
+            self._schedule_flush()
+
+    async def flush(self) -> int:
+        """
+        Write all buffered updates now.
+
+        :return: Number of content rows written; 0 if the write failed and the updates were kept.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        try:
+            await self.write(pending)
+        except asyncio.CancelledError:
+            self._requeue(pending)
+            raise
+        except Exception as e:
+            self.logger.warning(f"Failed to persist progress of {len(pending)} contents, retrying on the next flush: {str(e)}")
+            self._requeue(pending)
+            with self._lock:
+                self._stats["failed_flushes"] += 1
+            return 0
+        with self._lock:
+            self._stats["flushes"] += 1
+            self._stats["rows_written"] += len(pending)
+        return len(pending)
+
+    async def close(self):
+        """
+        Stop the scheduled flush and write what is left; call before disconnecting the database.
+        """
+        task = self._flush_task
+        if task is not None and not task.done() and task.get_loop() is asyncio.get_running_loop():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        self._flush_task = None
+        await self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = len(self._pending)
+        stats["coalescing_ratio"] = round(stats["updates"] / stats["rows_written"], 2) if stats["rows_written"] else 0
+        return stats
+
+    def _schedule_flush(self):
+        # Called with the lock held
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = self._flush_task
+        if task is None or task.done() or task.get_loop() is not loop:
+            self._flush_task = loop.create_task(self._flush_periodically())
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+            with self._lock:
+                if not self._pending:
+                    self._flush_task = None
+                    return
+
+    def _requeue(self, pending: Dict[int, Dict[str, Any]]):
+        with self._lock:
+            for content_id, data in pending.items():
+                # Values recorded while the write was in flight are newer
+                self._pending[content_id] = {**data, **self._pending.get(content_id, {})}
@@ -1,9 +1,41 @@
 import time
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from .config import get_section
+from .models import invalidate_contents
+from .prisma import prisma, run_write
+from .progress_events import RedisProgressChannel, progress_broker
+from .progress_store import ProgressWriteBuffer
+
+async def _write_progress(pending: Dict[int, Dict[str, Any]]):
+    async def write():
+        async with prisma.batch_() as batcher:
+            for content_id, data in pending.items():
+                # update_many does not fail the whole batch for a content deleted meanwhile
+                batcher.content.update_many(where={"id": content_id}, data=data)
+
+    await run_write(write)
+    invalidate_contents(pending.keys())
+
+# Shared by every tracker of the process, so concurrent pipelines flush together
+progress_writer = ProgressWriteBuffer(_write_progress, get_section('progress').get('flush_interval_ms', 500))
+
+_progress_channel: Optional[RedisProgressChannel] = None
+
+def get_progress_channel() -> Optional[RedisProgressChannel]:
+    """
+    Get the channel pushing progress events between processes, or None if progress.channel
+    is "poll" and servers read the stored progress instead.
+    """
+    global _progress_channel
+    settings = get_section('progress')
+    if _progress_channel is None and settings.get('channel', 'poll') == 'redis':
+        _progress_channel = RedisProgressChannel(settings['redis_url'])
+    return _progress_channel
 
 class ProgressTracker:
-    def __init__(self, total_steps: int):
+    def __init__(self, total_steps: int, writer: Optional[ProgressWriteBuffer] = None):
         self.total_steps = total_steps
+        self.writer = writer or progress_writer
         self.current_step = 0
         self.start_time = time.time()
         self.step_times: Dict[int, float] = {}
@@ -15,6 +47,43 @@ class ProgressTracker:
             print(f"Step {step}/{self.total_steps} completed. Info: {info}")
         else:
             print(f"Step {step}/{self.total_steps} completed.")
+        if info and info.get("contentId") is not None:
+            self._publish(info)
+
+    def _publish(self, info: Dict[str, Any]):
+        # Only the committed final write completes a content, see complete()
+        self._record(info["contentId"], {
+            "status": "processing",
+            "progress": info.get("progress", 0),
+            "currentStep": info.get("status"),
+        })
+
+    def complete(self, content_id: int):
+        """
+        Report a content whose final write, which stores its status, has been committed.
+
+        Recording the status again keeps a progress update still buffered from overwriting it.
+        """
+        self._record(content_id, {"status": "completed", "progress": 100})
+
+    def fail(self, content_id: int, error: str, retrying: bool = False):
+        """
+        Report a content whose creation failed.
+
+        :param content_id: Id of the content row.
+        :param error: Error message, stored as the current step.
+        :param retrying: The job will run again, so the content goes back to pending instead of failed.
+        """
+        step = f"Retrying after error: {error}" if retrying else f"Failed: {error}"
+        self._record(content_id, {"status": "pending" if retrying else "failed", "currentStep": step[:500]})
+
+    def _record(self, content_id: int, state: Dict[str, Any]):
+        event = {"contentId": content_id, **state}
+        progress_broker.publish(content_id, event)
+        channel = get_progress_channel()
+        if channel is not None:
+            channel.publish(content_id, event)
+        self.writer.record(content_id, state)
 
     def get_progress(self) -> Dict[str, Any]:
         elapsed_time = time.time() - self.start_time
@@ -1,28 +1,207 @@
 # src/prompt_generator.py
 
+import os
 import yaml
 import logging
-from string import Template
-from typing import Dict, Any, List
+import threading
+import time
+from string import Formatter
+from typing import Dict, Any, FrozenSet, Iterable, Iterator, List, Mapping, Optional, Sequence, Set, Tuple, Union
 import re
 
+_formatter = Formatter()
+# Same identifiers and escape as string.Template: $name, ${name} and $$
+_dollar_pattern = re.compile(r'\$(?:(\$)|([_a-zA-Z][_a-zA-Z0-9]*)|\{([_a-zA-Z][_a-zA-Z0-9]*)\})')
+_component_pattern = re.compile(r'\{component:(\w+)\}')
+_field_root_pattern = re.compile(r'[^.\[]*')
+
+class _Field:
+    __slots__ = ('name', 'field_name', 'conversion', 'format_spec', 'required')
+
+    def __init__(self, name: str, field_name: str, conversion: Optional[str], format_spec: str, required: bool):
+        self.name = name
+        self.field_name = field_name
+        self.conversion = conversion
+        self.format_spec = format_spec
+        self.required = required
+
+class CompiledTemplate:
+    __slots__ = ('name', 'text', 'placeholders', 'required', 'variables', '_parts', '_simple')
+
+    def __init__(self, name: str, text: str, parts: List[Union[str, _Field]]):
+        """
+        A template parsed once into literal text and placeholder fields.
+
+        :param name: Name of the template.
+        :param text: Template text with the components expanded.
+        :param parts: Literal strings and fields, in order.
+        """
+        self.name = name
+        self.text = text
+        self._parts = parts
+        self.variables = list(dict.fromkeys(part.name for part in parts if isinstance(part, _Field)))
+        self.placeholders: FrozenSet[str] = frozenset(self.variables)
+        # {name} fields; $name placeholders may stay unfilled
+        self.required: FrozenSet[str] = frozenset(part.name for part in parts if isinstance(part, _Field) and part.required)
+        # Fields that are plain {name} or $name render without going through format()
+        self._simple = all(
+            isinstance(part, str) or (part.required and part.field_name == part.name and not part.conversion and not part.format_spec)
+            for part in parts
+        )
+
+    def render(self, values: Dict[str, Any]) -> str:
+        """
+        Fill in the template.
+
+        {name} placeholders are required, as with str.format; $name placeholders without a
+        value are left as they are, as with string.Template.safe_substitute.
+
+        :param values: Placeholder values.
+        :return: The rendered text.
+        :raises KeyError: If a {name} placeholder has no value.
+        """
+        if self._simple:
+            return ''.join([part if part.__class__ is str else format(values[part.name]) for part in self._parts])
+        return ''.join([part if part.__class__ is str else self._render_field(part, values) for part in self._parts])
+
+    def render_parts(self, values: Dict[str, Any]) -> List[str]:
+        """
+        Fill in the template without joining it: the literal parts are returned as the same
+        string objects on every call, so per-part results such as token counts can be cached.
+
+        :param values: Placeholder values.
+        :return: Literal texts and field values in order; joined, they are render(values).
+        """
+        return [part if part.__class__ is str else self._render_field(part, values) for part in self._parts]
+
+    def _render_field(self, field: _Field, values: Dict[str, Any]) -> str:
+        if not field.required and field.name not in values:
+            return f"${field.name}"
+        if field.field_name == field.name:
+            value = values[field.name]
+        else:
+            value = _formatter.get_field(field.field_name, (), values)[0]
+        value = _formatter.convert_field(value, field.conversion)
+        format_spec = _formatter.vformat(field.format_spec, (), values) if '{' in field.format_spec else field.format_spec
+        return format(value, format_spec)
+
+def expand_components(template: str, components: Dict[str, str]) -> str:
+    """
+    Expand component placeholders in a template.
+
+    :param template: Template string potentially containing {component:name} placeholders.
+    :param components: Component texts by name.
+    :return: Template string with component placeholders expanded.
+    :raises: ValueError if a component is unknown.
+    """
+    def expand(match: re.Match) -> str:
+        if match.group(1) not in components:
+            raise ValueError(f"Unknown component '{match.group(1)}'")
+        return components[match.group(1)]
+
+    return _component_pattern.sub(expand, template)
+
+def compile_template(name: str, template: str, components: Dict[str, str]) -> CompiledTemplate:
+    """
+    Parse a template into its compiled form.
+
+    Both str.format fields ({name}, with {{ and }} as escapes) and string.Template
+    placeholders ($name, ${name}, with $$ as escape) are recognized.
+
+    :param name: Name of the template.
+    :param template: Template string.
+    :param components: Component texts by name, expanded before parsing.
+    :return: The compiled template.
+    :raises: ValueError if the template is malformed or uses an unknown component.
+    """
+    text = expand_components(template, components)
+    parts: List[Union[str, _Field]] = []
+
+    def add_format_fields(literal: str):
+        for text_part, field_name, format_spec, conversion in _formatter.parse(literal):
+            parts.append(text_part)
+            if field_name is not None:
+                root = _field_root_pattern.match(field_name).group(0)
+                parts.append(_Field(root, field_name, conversion, format_spec or '', required=True))
+
+    # $ placeholders first, so that ${name} is not taken for a {name} field
+    position = 0
+    for match in _dollar_pattern.finditer(text):
+        add_format_fields(text[position:match.start()])
+        if match.group(1):
+            parts.append('$')
+        else:
+            variable = match.group(2) or match.group(3)
+            parts.append(_Field(variable, variable, None, '', required=False))
+        position = match.end()
+    add_format_fields(text[position:])
+
+    # Merge neighbouring literals so rendering joins as few strings as possible
+    merged: List[Union[str, _Field]] = []
+    for part in parts:
+        if isinstance(part, str):
+            if not part:
+                continue
+            if merged and isinstance(merged[-1], str):
+                merged[-1] += part
+                continue
+        merged.append(part)
+    return CompiledTemplate(name, text, merged)
+
+_cache_lock = threading.Lock()
+_template_files: Dict[str, Tuple[Tuple[int, int], Tuple[Tuple[str, str], ...], Dict[str, Any], Dict[str, CompiledTemplate]]] = {}
+
+def _file_version(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+def load_templates(template_file: str, components: Dict[str, str]) -> Tuple[Tuple[int, int], Dict[str, Any], Dict[str, CompiledTemplate]]:
+    """
+    Load and compile a template file, once per process for each version of the file.
+
+    The compiled templates are shared by every PromptGenerator of the process and are
+    compiled again only when the file's modification time or size changes.
+
+    :param template_file: Path to the YAML file containing prompt templates.
+    :param components: Component texts by name.
+    :return: The file version, the templates as loaded from YAML, and the compiled templates.
+    """
+    path = os.path.abspath(template_file)
+    version = _file_version(path)
+    components_key = tuple(sorted(components.items()))
+    with _cache_lock:
+        entry = _template_files.get(path)
+    if entry is not None and entry[0] == version and entry[1] == components_key:
+        return entry[0], entry[2], entry[3]
+
+    with open(path, 'r') as file:
+        templates = yaml.safe_load(file)
+    compiled = {name: compile_template(name, template['template'], components) for name, template in templates.items()}
+    with _cache_lock:
+        _template_files[path] = (version, components_key, templates, compiled)
+    return version, templates, compiled
+
 class PromptGenerator:
-    def __init__(self, template_file: str):
+    def __init__(self, template_file: str, reload_interval: float = 1.0):
         """
         Initialize the PromptGenerator with a template file.
-        
+
         :param template_file: Path to the YAML file containing prompt templates.
+        :param reload_interval: Seconds between checks of the file for changes; it is reloaded when it changed.
         """
         self.logger = logging.getLogger(__name__)
-        self.logger.info(f"Loading templates from: {template_file}")
-        with open(template_file, 'r') as file:
-            self.templates = yaml.safe_load(file)
-        self.logger.info(f"Loaded templates: {list(self.templates.keys())}")
+        self.template_file = template_file
+        self.reload_interval = reload_interval
+        self.components = self._load_components()
+        self._added: Dict[str, Tuple[Dict[str, Any], CompiledTemplate]] = {}
+        self._removed: Set[str] = set()
+        self._load()
+        self.logger.info(f"Loaded templates from {template_file}: {list(self.templates.keys())}")
 
     def _load_components(self) -> Dict[str, str]:
         """
         Load reusable components for prompt templates.
-        
+
         :return: Dictionary of component names and their content.
         """
         # This is a placeholder implementation. In a real-world scenario,
@@ -32,47 +211,134 @@ class PromptGenerator:
             "closing": "Thank you for using our service.",
         }
 
-    def generate_prompt(self, template_name: str, **kwargs) -> str:
+    def _load(self):
+        self._version, templates, compiled = load_templates(self.template_file, self.components)
+        self._checked_at = time.monotonic()
+        self.templates = {name: template for name, template in templates.items() if name not in self._removed}
+        self._compiled = {name: template for name, template in compiled.items() if name not in self._removed}
+        for name, (template, compiled_template) in self._added.items():
+            self.templates[name] = template
+            self._compiled[name] = compiled_template
+
+    def _refresh(self):
+        """
+        Reload the templates if the file changed since they were loaded, at most once per reload_interval.
+        """
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return
+        self._checked_at = now
+        try:
+            if _file_version(os.path.abspath(self.template_file)) != self._version:
+                self._load()
+                self.logger.info(f"Reloaded templates from {self.template_file}: {list(self.templates.keys())}")
+        except (OSError, yaml.YAMLError, ValueError, KeyError, TypeError) as e:
+            # Keep serving the last good templates while the file is being edited
+            self.logger.error(f"Error reloading templates from {self.template_file}: {str(e)}")
+
+    def generate_prompt(self, template_name: str, variables: Optional[Dict[str, Any]] = None, **kwargs) -> str:
         """
         Generate a prompt using a specified template and variables.
-        
+
         :param template_name: Name of the template to use.
+        :param variables: Optional dictionary of variables; kwargs take precedence.
         :param kwargs: Dictionary of variables to fill in the template.
         :return: Generated prompt string.
         :raises: ValueError if the template is not found.
         """
-        self.logger.info(f"Generating prompt for template: {template_name}")
-        if template_name not in self.templates:
-            raise ValueError(f"Template '{template_name}' not found. Available templates: {list(self.templates.keys())}")
-        template = self.templates[template_name]['template']
-        
-        # Filter kwargs to only include keys that are in the template
-        filtered_kwargs = {k: v for k, v in kwargs.items() if f"{{{k}}}" in template}
-        
+        self.logger.debug(f"Generating prompt for template: {template_name}")
+        template = self.get_template(template_name)
+
+        if variables:
+            kwargs = {**variables, **kwargs}
+
         # Log any unused kwargs
-        unused_kwargs = set(kwargs.keys()) - set(filtered_kwargs.keys())
+        unused_kwargs = kwargs.keys() - template.placeholders
         if unused_kwargs:
             self.logger.warning(f"Unused kwargs for template '{template_name}': {unused_kwargs}")
-        
-        return template.format(**filtered_kwargs)
 
-    def _expand_components(self, template: str) -> str:
+        return template.render(kwargs)
+
+    def get_template(self, template_name: str) -> CompiledTemplate:
         """
-        Expand component placeholders in a template.
-        
-        :param template: Template string potentially containing component placeholders.
-        :return: Template string with component placeholders expanded.
+        Get the compiled form of a template.
+
+        :raises: ValueError if the template is not found.
         """
-        for component_name, component_template in self.components.items():
-            placeholder = f"{{component:{component_name}}}"
-            if placeholder in template:
-                template = template.replace(placeholder, component_template)
+        self._refresh()
+        template = self._compiled.get(template_name)
+        if template is None:
+            raise ValueError(f"Template '{template_name}' not found. Available templates: {list(self.templates.keys())}")
         return template
 
+    def render_many(
+        self,
+        template_name: str,
+        rows: Union[Iterable[Mapping[str, Any]], Mapping[str, Sequence[Any]]],
+        strict: bool = True,
+    ) -> Iterator[Optional[str]]:
+        """
+        Render a template for many rows of variables, lazily.
+
+        The template is looked up once, and rows with the same keys share one check of the
+        placeholders they leave unfilled. As with generate_prompt, a row is invalid if it
+        leaves a {name} placeholder unfilled, while unfilled $name placeholders stay in the
+        prompt as they are. Each prompt is checked against max_length, and a single summary
+        is logged once the rows are exhausted.
+
+        :param template_name: Name of the template to use.
+        :param rows: Dictionaries of variables, or columns: a dictionary of equally long sequences.
+        :param strict: Raise on the first invalid row; otherwise yield None in its place.
+        :return: Iterator over the prompts, in row order.
+        :raises: ValueError if the template is not found, or, when strict, once an invalid row is reached.
+        """
+        template = self.get_template(template_name)
+        if isinstance(rows, Mapping):
+            names = list(rows.keys())
+            rows = (dict(zip(names, values)) for values in zip(*rows.values()))
+        return self._render_rows(template, self.templates[template_name].get('max_length', 1000), rows, strict)
+
+    def _render_rows(self, template: CompiledTemplate, max_length: int, rows: Iterable[Mapping[str, Any]], strict: bool) -> Iterator[Optional[str]]:
+        # Unfilled required placeholders by row keys; bulk rows almost always share their keys
+        missing_by_keys: Dict[Tuple[str, ...], FrozenSet[str]] = {}
+        unused: Set[str] = set()
+        rendered = 0
+        invalid = 0
+        try:
+            for index, row in enumerate(rows):
+                keys = tuple(row)
+                missing = missing_by_keys.get(keys)
+                if missing is None:
+                    missing = missing_by_keys[keys] = template.required.difference(keys)
+                    unused.update(set(keys) - template.placeholders)
+
+                error = None
+                if missing:
+                    error = f"unfilled placeholders {sorted(missing)}"
+                else:
+                    prompt = template.render(row)
+                    if len(prompt) > max_length:
+                        error = f"exceeds maximum length of {max_length} characters"
+                if error is not None:
+                    invalid += 1
+                    if strict:
+                        raise ValueError(f"Row {index} for template '{template.name}': {error}")
+                    yield None
+                    continue
+                rendered += 1
+                yield prompt
+        finally:
+            if unused:
+                self.logger.warning(f"Unused kwargs for template '{template.name}': {unused}")
+            if invalid:
+                self.logger.warning(f"Rendered {rendered} prompts for template '{template.name}', {invalid} rows invalid")
+            else:
+                self.logger.info(f"Rendered {rendered} prompts for template '{template.name}'")
+
     def validate_prompt(self, prompt: str, template_name: str) -> bool:
         """
         Validate a generated prompt.
-        
+
         :param prompt: The prompt to validate.
         :param template_name: Name of the template used to generate the prompt.
         :return: True if the prompt is valid, False otherwise.
@@ -80,54 +346,61 @@ class PromptGenerator:
         if not prompt.strip():
             self.logger.warning("Generated prompt is empty")
             return False
-        
+
         if re.search(r'\{[^}]+\}', prompt):
             self.logger.warning(f"Prompt for '{template_name}' contains unfilled placeholders")
             return False
-        
+
         max_length = self.templates[template_name].get('max_length', 1000)
         if len(prompt) > max_length:
             self.logger.warning(f"Prompt for '{template_name}' exceeds maximum length of {max_length} characters")
             return False
-        
+
         return True
 
     def get_required_variables(self, template_name: str) -> List[str]:
         """
         Get the list of required variables for a template.
-        
+
         :param template_name: Name of the template.
-        :return: List of variable names required by the template.
+        :return: List of variable names required by the template, in order of first use.
         :raises: ValueError if the template is not found.
         """
-        if template_name not in self.templates:
+        if template_name not in self._compiled:
             raise ValueError(f"Template '{template_name}' not found")
-        
-        template = self.templates[template_name]['template']
-        return re.findall(r'\$(\w+)', template)
+
+        return list(self._compiled[template_name].variables)
 
     def add_template(self, name: str, template: str, max_length: int = 1000):
         """
         Add a new template to the PromptGenerator.
-        
+
         :param name: Name of the new template.
         :param template: Template string.
         :param max_length: Maximum allowed length for prompts generated from this template.
         """
-        self.templates[name] = {
+        entry = {
             'template': template,
             'max_length': max_length
         }
+        compiled = compile_template(name, template, self.components)
+        self._added[name] = (entry, compiled)
+        self._removed.discard(name)
+        self.templates[name] = entry
+        self._compiled[name] = compiled
         self.logger.info(f"Added new template: {name}")
 
     def remove_template(self, name: str):
         """
         Remove a template from the PromptGenerator.
-        
+
         :param name: Name of the template to remove.
         """
         if name in self.templates:
             del self.templates[name]
+            del self._compiled[name]
+            self._added.pop(name, None)
+            self._removed.add(name)
             self.logger.info(f"Removed template: {name}")
         else:
-            self.logger.warning(f"Attempted to remove non-existent template: {name}")
\ No newline at end of file
+            self.logger.warning(f"Attempted to remove non-existent template: {name}")
@@ -0,0 +1,241 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """
+    Check whether an exception raised by a provider client is an HTTP 429.
+
+    :param error: The exception raised by the call.
+    :return: True if the provider rejected the call because of rate limiting.
+    """
+    status_code = getattr(error, 'status_code', None)
+    if status_code is None:
+        status_code = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status_code == 429
+
+class TokenBucket:
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize a token bucket that refills continuously.
+
+        :param rate_per_minute: Number of tokens added per minute.
+        :param capacity: Maximum burst size. Defaults to one minute worth of tokens.
+        :param clock: Monotonic clock returning seconds.
+        """
+        self.rate_per_second = rate_per_minute / 60
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated_at = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_second)
+        self.updated_at = now
+
+    def try_acquire(self, amount: float = 1) -> float:
+        """
+        Take tokens from the bucket if enough are available.
+
+        :param amount: Number of tokens to take. Amounts above the capacity are clamped to it.
+        :return: 0 if the tokens were taken, otherwise the number of seconds to wait before retrying.
+        """
+        amount = min(amount, self.capacity)
+        self._refill()
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return 0
+        return (amount - self.tokens) / self.rate_per_second
+
+    async def acquire(self, amount: float = 1):
+        """
+        Wait until tokens are available and take them. Waiters are served in arrival order.
+
+        :param amount: Number of tokens to take.
+        """
+        async with self._lock:
+            wait_time = self.try_acquire(amount)
+            while wait_time > 0:
+                await asyncio.sleep(wait_time)
+                wait_time = self.try_acquire(amount)
+
+    def adjust(self, amount: float):
+        """
+        Correct the bucket after the real cost of a call is known.
+
+        :param amount: Extra tokens to charge (positive) or tokens to give back (negative).
+        """
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+class AdaptiveConcurrency:
+    def __init__(self, max_limit: int, min_limit: int = 1, decrease_factor: float = 0.5, latency_spike_factor: float = 2.0):
+        """
+        Initialize an AIMD concurrency window.
+
+        The window grows by one slot per window of successful calls and is multiplied by
+        decrease_factor on a 429 or when a call takes latency_spike_factor times the average latency.
+
+        :param max_limit: Upper bound of the window.
+        :param min_limit: Lower bound of the window.
+        :param decrease_factor: Multiplicative decrease applied on congestion.
+        :param latency_spike_factor: Ratio to the average latency that counts as a spike.
+        """
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.decrease_factor = decrease_factor
+        self.latency_spike_factor = latency_spike_factor
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self.average_latency: Optional[float] = None
+        self.samples = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        """
+        Wait for a free slot in the current window.
+        """
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, latency: float, throttled: bool = False):
+        """
+        Free a slot and adapt the window to the outcome of the call.
+
+        :param latency: Duration of the call in seconds.
+        :param throttled: True if the provider answered with a 429.
+        """
+        async with self._condition:
+            self.in_flight -= 1
+            if throttled or self._is_latency_spike(latency):
+                self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            if not throttled:
+                self._record_latency(latency)
+            self._condition.notify_all()
+
+    def _is_latency_spike(self, latency: float) -> bool:
+        return self.samples >= 5 and latency > self.average_latency * self.latency_spike_factor
+
+    def _record_latency(self, latency: float):
+        self.samples += 1
+        if self.average_latency is None:
+            self.average_latency = latency
+        else:
+            self.average_latency = 0.8 * self.average_latency + 0.2 * latency
+
+class ProviderRateLimiter:
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: float,
+        tokens_per_minute: Optional[float] = None,
+        max_concurrency: int = 5,
+        latency_spike_factor: float = 2.0,
+    ):
+        """
+        Initialize the limiter of a single upstream provider.
+
+        :param name: Provider name, used in logs.
+        :param requests_per_minute: Allowed requests per minute.
+        :param tokens_per_minute: Allowed tokens per minute, or None if the provider does not meter tokens.
+        :param max_concurrency: Upper bound of the adaptive concurrency window.
+        :param latency_spike_factor: Ratio to the average latency that shrinks the window.
+        """
+        self.name = name
+        self.logger = logging.getLogger(__name__)
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.concurrency = AdaptiveConcurrency(max_concurrency, latency_spike_factor=latency_spike_factor)
+        self.throttled_calls = 0
+
+    @asynccontextmanager
+    async def limit(self, tokens: int = 0) -> AsyncIterator["ProviderRateLimiter"]:
+        """
+        Hold a concurrency slot plus request and token budget for the duration of one call.
+
+        :param tokens: Estimated tokens consumed by the call.
+        """
+        await self.concurrency.acquire()
+        throttled = False
+        start_time = time.monotonic()
+        try:
+            await self.requests.acquire(1)
+            if self.tokens and tokens:
+                await self.tokens.acquire(tokens)
+            start_time = time.monotonic()
+            yield self
+        except Exception as e:
+            throttled = is_rate_limit_error(e)
+            if throttled:
+                self.throttled_calls += 1
+                self.logger.warning(f"Provider '{self.name}' returned 429, shrinking concurrency window")
+            raise
+        finally:
+            await self.concurrency.release(time.monotonic() - start_time, throttled)
+
+    def record_tokens(self, estimated: int, actual: int):
+        """
+        Charge or refund the difference between estimated and actual token usage.
+
+        :param estimated: Tokens reserved before the call.
+        :param actual: Tokens reported by the provider.
+        """
+        if self.tokens:
+            self.tokens.adjust(actual - estimated)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "provider": self.name,
+            "concurrency_limit": round(self.concurrency.limit, 2),
+            "in_flight": self.concurrency.in_flight,
+            "throttled_calls": self.throttled_calls,
+        }
+
+class RateLimiterRegistry:
+    def __init__(self, limits: Dict[str, Dict[str, Any]], headroom: float = 0.9, processes: int = 1):
+        """
+        Initialize one limiter per provider.
+
+        :param limits: Mapping of provider name to requests_per_minute, tokens_per_minute,
+                       max_concurrency and latency_spike_factor.
+        :param headroom: Fraction of each published limit actually used, to stay just under it.
+        :param processes: Number of processes calling the providers with the same limits. Each
+                          gets an equal share, so that together they stay under the published limits.
+        :raises: ValueError if processes is lower than 1.
+        """
+        if processes < 1:
+            raise ValueError(f"processes must be at least 1, got {processes}")
+        self.limiters: Dict[str, ProviderRateLimiter] = {}
+        share = headroom / processes
+        for name, settings in limits.items():
+            tokens_per_minute = settings.get('tokens_per_minute')
+            self.limiters[name] = ProviderRateLimiter(
+                name,
+                requests_per_minute=settings['requests_per_minute'] * share,
+                tokens_per_minute=tokens_per_minute * share if tokens_per_minute else None,
+                # Every process keeps at least one call in flight
+                max_concurrency=max(1, settings.get('max_concurrency', 5) // processes),
+                latency_spike_factor=settings.get('latency_spike_factor', 2.0),
+            )
+
+    def get(self, provider: str) -> ProviderRateLimiter:
+        """
+        Get the limiter of a provider.
+
+        :param provider: Provider name as listed in api.rate_limits.
+        :return: The provider's limiter.
+        :raises: ValueError if the provider is not configured.
+        """
+        if provider not in self.limiters:
+            raise ValueError(f"No rate limits configured for provider '{provider}'. Available providers: {list(self.limiters.keys())}")
+        return self.limiters[provider]
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: limiter.get_stats() for name, limiter in self.limiters.items()}
@@ -0,0 +1,145 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+class MemoryCacheBackend:
+    def __init__(self, max_entries: int = 1000):
+        """
+        Initialize an in-process LRU backend.
+
+        :param max_entries: Entries kept before the least recently used one is evicted.
+        """
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[bytes, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl_seconds: Optional[float] = None):
+        expires_at = time.monotonic() + ttl_seconds if ttl_seconds is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+class RedisCacheBackend:
+    def __init__(self, url: str, prefix: str = 'content-cache:'):
+        """
+        Initialize a backend shared by every process connected to the same Redis.
+
+        :param url: Redis URL, e.g. redis://localhost:6379/0.
+        :param prefix: Prefix of the keys written by this cache.
+        """
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("The redis cache backend requires the 'redis' package") from e
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl_seconds: Optional[float] = None):
+        self.client.set(self.prefix + key, value, px=int(ttl_seconds * 1000) if ttl_seconds is not None else None)
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+class ResponseCache:
+    def __init__(self, backend: Any, ttl_seconds: Optional[float] = None):
+        """
+        Initialize a read-through cache of serialized responses.
+
+        :param backend: Object with get(key), set(key, value, ttl_seconds) and delete(key).
+        :param ttl_seconds: Lifetime of an entry; None keeps it until it is invalidated or evicted.
+        """
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.logger = logging.getLogger(__name__)
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0, "errors": 0}
+        self._lock = threading.Lock()
+        # Bumped by every invalidation, so that a load racing with a write is not cached
+        self._version = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            # A failing shared backend must not take the endpoint down
+            self.logger.warning(f"Response cache lookup failed for {key}: {str(e)}")
+            self._count("errors")
+            value = None
+        self._count("misses" if value is None else "hits")
+        return value
+
+    def set(self, key: str, value: bytes):
+        try:
+            self.backend.set(key, value, self.ttl_seconds)
+        except Exception as e:
+            self.logger.warning(f"Response cache store failed for {key}: {str(e)}")
+            self._count("errors")
+
+    async def get_or_load(self, key: str, load: Callable[[], Any]) -> Optional[bytes]:
+        """
+        Return the cached response, or load it and cache it if the loader allows.
+
+        :param key: Cache key.
+        :param load: Coroutine function returning (response bytes, cacheable), or None if there is nothing to return.
+        :return: The response bytes, or None.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        version = self._version
+        loaded = await load()
+        if loaded is None:
+            return None
+        value, cacheable = loaded
+        # An invalidation during the load may have come after the read it would have dropped
+        if cacheable and version == self._version:
+            self.set(key, value)
+        return value
+
+    def invalidate(self, keys: Iterable[str]):
+        with self._lock:
+            self._version += 1
+        for key in keys:
+            try:
+                self.backend.delete(key)
+            except Exception as e:
+                self.logger.warning(f"Response cache invalidation failed for {key}: {str(e)}")
+                self._count("errors")
+                continue
+            self._count("invalidations")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0
+        stats["evictions"] = getattr(self.backend, 'evictions', None)
+        return stats
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
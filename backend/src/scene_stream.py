@@ -0,0 +1,71 @@
+import json
+from typing import Any, Dict, List, Optional
+
+class SceneStreamParser:
+    def __init__(self, array_key: str = 'main_scenes'):
+        """
+        Initialize an incremental parser that extracts scene objects from a streamed JSON script.
+
+        Only the objects directly inside the top-level array named array_key are emitted;
+        the rest of the document is tracked just enough to know where that array is.
+
+        :param array_key: Key of the top-level array holding the scenes.
+        """
+        self.array_key = array_key
+        self.buffer = ''
+        self.scenes_emitted = 0
+        self._position = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._pending_key: Optional[str] = None
+        self._array_depth: Optional[int] = None
+        self._scene_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        Consume the next piece of streamed text.
+
+        :param chunk: Text delta received from the model.
+        :return: Scene objects completed by this chunk, in document order.
+        :raises: json.JSONDecodeError if a completed scene object is not valid JSON.
+        """
+        self.buffer += chunk
+        scenes = []
+        while self._position < len(self.buffer):
+            char = self.buffer[self._position]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._last_string = self.buffer[self._string_start + 1:self._position]
+            elif char == '"':
+                self._in_string = True
+                self._string_start = self._position
+            elif char == ':':
+                self._pending_key = self._last_string
+            elif char == ',':
+                self._pending_key = None
+            elif char in '{[':
+                if char == '[' and self._stack == ['{'] and self._pending_key == self.array_key:
+                    self._array_depth = len(self._stack) + 1
+                elif char == '{' and self._array_depth is not None and len(self._stack) == self._array_depth:
+                    self._scene_start = self._position
+                self._stack.append(char)
+                self._pending_key = None
+            elif char in '}]':
+                self._stack.pop()
+                if char == '}' and self._scene_start is not None and len(self._stack) == self._array_depth:
+                    scenes.append(json.loads(self.buffer[self._scene_start:self._position + 1]))
+                    self._scene_start = None
+                elif char == ']' and self._array_depth is not None and len(self._stack) < self._array_depth:
+                    self._array_depth = None
+            self._position += 1
+
+        self.scenes_emitted += len(scenes)
+        return scenes
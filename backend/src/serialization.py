@@ -0,0 +1,118 @@
+import datetime
+import json
+import uuid
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class RawJSON:
+    def __init__(self, data: Union[str, bytes, None]):
+        """
+        Mark an already serialized JSON document to be embedded as is, without parsing it.
+
+        :param data: Serialized JSON; None is embedded as null.
+        """
+        self.data = data.encode() if isinstance(data, str) else (data if data is not None else b'null')
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if hasattr(value, 'model_dump'):
+        return value.model_dump()
+    if hasattr(value, 'dict'):
+        return value.dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class JSONSerializer:
+    name = "json"
+
+    def dumps(self, value: Any) -> bytes:
+        """
+        Serialize a value to compact UTF-8 JSON, embedding RawJSON values as they are.
+        """
+        fragments: Dict[str, bytes] = {}
+        prefix = f"__raw_json_{uuid.uuid4().hex}_"
+
+        def default(item: Any) -> Any:
+            if isinstance(item, RawJSON):
+                return self._placeholder(item, prefix, fragments)
+            return _default(item)
+
+        data = self._dumps(value, default)
+        for token, fragment in fragments.items():
+            data = data.replace(b'"' + token.encode() + b'"', fragment, 1)
+        return data
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+    def dump_model(self, model: Any, raw_fields: Optional[Dict[str, Union[str, bytes, None]]] = None) -> bytes:
+        """
+        Serialize a Pydantic model to JSON bytes.
+
+        Pydantic v2 writes the JSON directly from the model, without building a dict first.
+
+        :param model: The model.
+        :param raw_fields: Fields whose values are already serialized JSON, embedded without parsing.
+        :return: The JSON document.
+        """
+        exclude = set(raw_fields) if raw_fields else None
+        if hasattr(model, 'model_dump_json'):
+            data = model.model_dump_json(exclude=exclude).encode()
+        else:
+            data = self.dumps(model.dict(exclude=exclude))
+        if not raw_fields:
+            return data
+        members = b','.join(self.dumps(name) + b':' + RawJSON(value).data for name, value in raw_fields.items())
+        return b'{' + members + (b',' + data[1:] if data != b'{}' else b'}')
+
+    def _dumps(self, value: Any, default: Callable[[Any], Any]) -> bytes:
+        return json.dumps(value, default=default, separators=(',', ':'), ensure_ascii=False).encode()
+
+    def _placeholder(self, raw: RawJSON, prefix: str, fragments: Dict[str, bytes]) -> str:
+        token = f"{prefix}{len(fragments)}"
+        fragments[token] = raw.data
+        return token
+
+class OrjsonSerializer(JSONSerializer):
+    name = "orjson"
+
+    def dumps(self, value: Any) -> bytes:
+        if hasattr(orjson, 'Fragment'):
+            def default(item: Any) -> Any:
+                if isinstance(item, RawJSON):
+                    return orjson.Fragment(item.data)
+                return _default(item)
+
+            return orjson.dumps(value, default=default, option=orjson.OPT_NON_STR_KEYS)
+        # orjson < 3.9 cannot embed raw JSON; fall back to placeholders
+        return super().dumps(value)
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return orjson.loads(data)
+
+    def _dumps(self, value: Any, default: Callable[[Any], Any]) -> bytes:
+        return orjson.dumps(value, default=default, option=orjson.OPT_NON_STR_KEYS)
+
+@lru_cache(maxsize=None)
+def get_serializer(library: Optional[str] = 'auto') -> JSONSerializer:
+    """
+    Get the JSON serializer for a library name.
+
+    :param library: 'orjson', 'json', or 'auto' for orjson when it is installed.
+    :return: The serializer.
+    :raises ValueError: If the library is unknown or not installed.
+    """
+    if library in (None, 'auto'):
+        return OrjsonSerializer() if orjson is not None else JSONSerializer()
+    if library == 'orjson':
+        if orjson is None:
+            raise ValueError("JSON library 'orjson' is not installed")
+        return OrjsonSerializer()
+    if library == 'json':
+        return JSONSerializer()
+    raise ValueError(f"Unknown JSON library: {library}")
@@ -1,19 +1,20 @@
-from openai import OpenAI
-import os
 from dotenv import load_dotenv
+import asyncio
 import logging
-from typing import Dict, Any, List
+import threading
+import weakref
+from typing import Dict, Any, List, Optional, Callable, Tuple
 from pydantic import BaseModel
+from .llm_client import create_chat_completion, stream_chat_completion
+from .config import get_section
+from .rate_limiter import RateLimiterRegistry, is_rate_limit_error
+from .llm_cache import LLMResponseCache
+from .scene_stream import SceneStreamParser
+from .token_budget import TokenBudget, TokenCounter, TokenEstimate
 
-# Load environment variables
+# Load environment variables, including the OPENAI_API_KEY read by llm_client
 load_dotenv()
 
-# Use os.getenv to get the API key
-OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
-
-# Initialize OpenAI client
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-
 class Scene(BaseModel):
     scene_description: str
     visual_prompt: str
@@ -23,80 +24,286 @@ class VideoContent(BaseModel):
     description: str
     main_scenes: List[Scene]
 
-class OpenAIService:
-    def __init__(self, api_key):
-        self.client = OpenAI(api_key=api_key)
-
-    def generate_content(self, prompt):
-        response = self.client.chat.completions.create(
-            model="gpt-3.5-turbo-1106",
-            messages=[
-                {"role": "system", "content": "You are a creative video content creator."},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={
-                "type": "json_object",
-                "schema": {
-                    "type": "object",
-                    "properties": {
-                        "title": {"type": "string"},
-                        "description": {"type": "string"},
-                        "scenes": {
-                            "type": "array",
-                            "items": {
-                                "type": "object",
-                                "properties": {
-                                    "scene_number": {"type": "integer"},
-                                    "description": {"type": "string"},
-                                    "duration": {"type": "number"}
-                                }
-                            }
-                        }
-                    }
-                }
-            },
-            temperature=0.7,
-        )
-        # ... rest of the method
-
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Initialize the OpenAI service
-openai_service = OpenAIService(api_key=OPENAI_API_KEY)
+# Rough completion size of a video script, used when the scene amount is not known
+SCRIPT_COMPLETION_TOKENS = 1500
+SCRIPT_TEMPERATURE = 0.7
+SCRIPT_SYSTEM_MESSAGE = "You are a creative video content creator. Please provide your response in JSON format."
+SCRIPT_PROMPT_SUFFIX = "\n\nPlease format your response as a JSON object."
+# Tokens the chat format adds per message and to prime the reply
+MESSAGE_OVERHEAD_TOKENS = 3
 
-def generate_content_with_openai(prompt: str) -> Dict[str, Any]:
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-2024-08-06",  # Updated to the new model
-            messages=[
-                {"role": "system", "content": "You are a creative video content creator. Please provide your response in JSON format."},
-                {"role": "user", "content": f"{prompt}\n\nPlease format your response as a JSON object."}
-            ],
-            response_format={"type": "json_object"},
-            temperature=0.7,
+# Seconds to wait before retrying a call the provider rejected with a 429, doubled per attempt
+RATE_LIMIT_BACKOFF_SECONDS = 1.0
+
+# One registry per event loop: the limiters wait on asyncio locks bound to the loop that uses them.
+_rate_limiters: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, RateLimiterRegistry]" = weakref.WeakKeyDictionary()
+
+def rate_limit_processes() -> int:
+    """
+    Number of processes sharing the provider limits: api.rate_limit_processes if set, otherwise
+    every worker process of the pool, job_queue.hosts times job_queue.processes_per_host.
+    """
+    processes = get_section('api').get('rate_limit_processes')
+    if processes is None:
+        settings = get_section('job_queue')
+        processes = settings.get('hosts', 1) * settings.get('processes_per_host', 1)
+    return processes
+
+def get_rate_limiters() -> RateLimiterRegistry:
+    """
+    Get the per-provider rate limiters of the running event loop, configured in the
+    api.rate_limits section and created on first use.
+
+    The buckets live in the process, so each process is given its share of the limits,
+    see rate_limit_processes.
+    """
+    loop = asyncio.get_running_loop()
+    registry = _rate_limiters.get(loop)
+    if registry is None:
+        api_config = get_section('api')
+        registry = RateLimiterRegistry(
+            api_config.get('rate_limits', {}),
+            headroom=api_config.get('rate_limit_headroom', 0.9),
+            processes=rate_limit_processes(),
+        )
+        _rate_limiters[loop] = registry
+    return registry
+
+_llm_cache: Optional[LLMResponseCache] = None
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """
+    Get the script response cache configured in the llm_cache section, or None if it is disabled.
+    """
+    global _llm_cache
+    settings = get_section('llm_cache')
+    if _llm_cache is None and settings.get('enabled', False):
+        _llm_cache = LLMResponseCache(
+            settings.get('path', 'cache/llm_responses.db'),
+            ttl_seconds=settings.get('ttl_seconds', 7 * 24 * 3600),
+            max_entries=settings.get('max_entries', 10000),
+        )
+    return _llm_cache
+
+_token_budget: Optional[TokenBudget] = None
+_token_budget_lock = threading.Lock()
+
+def get_token_budget() -> TokenBudget:
+    """
+    Get the token budget of the script model, configured in the token_budget section, creating it on first use.
+
+    Creating it loads the tokenizer's encoding, which tiktoken downloads on first use: call
+    it at startup, or use load_token_budget from a coroutine.
+    """
+    global _token_budget
+    with _token_budget_lock:
+        if _token_budget is not None:
+            return _token_budget
+        settings = get_section('token_budget')
+        model = get_section('llm_client').get('model', 'gpt-4o-2024-08-06')
+        _token_budget = TokenBudget(
+            TokenCounter(model, cache_size=settings.get('count_cache_size', 4096)),
+            context_window=settings.get('context_windows', {}).get(model, settings.get('default_context_window', 16385)),
+            max_prompt_tokens=settings.get('max_prompt_tokens'),
+            on_oversize=settings.get('on_oversize', 'trim'),
+            trim_variables=settings.get('trim_variables', []),
         )
-        return VideoContent.parse_raw(response.choices[0].message.content)
+        return _token_budget
+
+async def load_token_budget() -> TokenBudget:
+    """
+    Get the token budget without blocking the event loop, creating it in a thread if needed.
+    """
+    if _token_budget is not None:
+        return _token_budget
+    return await asyncio.to_thread(get_token_budget)
+
+def estimate_script_completion_tokens(scene_amount: Optional[int] = None) -> int:
+    """
+    Expected completion tokens of a video script with the given number of scenes.
+    """
+    if not scene_amount:
+        return SCRIPT_COMPLETION_TOKENS
+    settings = get_section('token_budget')
+    return settings.get('completion_base_tokens', 200) + settings.get('completion_tokens_per_scene', 150) * int(scene_amount)
+
+def _script_overhead_tokens(counter: TokenCounter) -> int:
+    return counter.count(SCRIPT_SYSTEM_MESSAGE) + counter.count(SCRIPT_PROMPT_SUFFIX) + MESSAGE_OVERHEAD_TOKENS * 3
+
+def build_script_prompt(template: Any, values: Dict[str, Any], scene_amount: Optional[int] = None,
+                        budget: Optional[TokenBudget] = None) -> Tuple[str, TokenEstimate]:
+    """
+    Render the script prompt within the token budget, before any network call.
+
+    :param template: Compiled script template, from PromptGenerator.get_template.
+    :param values: Template variables.
+    :param scene_amount: Number of scenes requested, which sizes the expected completion.
+    :param budget: Token budget, from load_token_budget in a coroutine. Defaults to get_token_budget().
+    :return: The prompt and its token estimate.
+    :raises TokenBudgetExceeded: If the prompt does not fit and cannot be trimmed enough.
+    """
+    budget = budget or get_token_budget()
+    return budget.fit(template, values, estimate_script_completion_tokens(scene_amount), _script_overhead_tokens(budget.counter))
+
+def _token_usage_entry(stage: str, model: str, estimate: TokenEstimate, usage: Any = None, cached: bool = False) -> Dict[str, Any]:
+    return {
+        "stage": stage,
+        "model": model,
+        "promptTokens": usage.prompt_tokens if usage else 0,
+        "completionTokens": usage.completion_tokens if usage else 0,
+        "estimatedPromptTokens": estimate.prompt_tokens,
+        "estimatedCompletionTokens": estimate.completion_tokens,
+        "cached": cached,
+    }
+
+async def generate_content_with_openai(
+    prompt: str,
+    timeout: Optional[float] = None,
+    total_timeout: Optional[float] = None,
+    use_cache: bool = True,
+    on_scene: Optional[Callable[[int, Scene], Any]] = None,
+    estimate: Optional[TokenEstimate] = None,
+    on_usage: Optional[Callable[[Dict[str, Any]], Any]] = None,
+) -> VideoContent:
+    """
+    Generate the video script for a prompt.
+
+    When on_scene is given the completion is streamed and on_scene(scene_number, scene) is called
+    for each entry of main_scenes as soon as it is complete, while the rest of the script is
+    still being generated. The returned VideoContent is the same in both modes.
+
+    :param estimate: Token estimate from build_script_prompt; without it the prompt is checked here.
+    :param on_usage: Called with the token usage ledger entry of the call, also for cache hits.
+    :raises TokenBudgetExceeded: If the prompt does not fit the model's budget; nothing is sent.
+    """
+    model = get_section('llm_client').get('model', 'gpt-4o-2024-08-06')
+    temperature = SCRIPT_TEMPERATURE
+    response_format = {"type": "json_object"}
+    messages = [
+        {"role": "system", "content": SCRIPT_SYSTEM_MESSAGE},
+        {"role": "user", "content": f"{prompt}{SCRIPT_PROMPT_SUFFIX}"}
+    ]
+    if estimate is None:
+        budget = await load_token_budget()
+        estimate = budget.check(prompt, SCRIPT_COMPLETION_TOKENS, _script_overhead_tokens(budget.counter))
+
+    cache = get_llm_cache() if use_cache else None
+    cache_key = LLMResponseCache.make_key(prompt, model, temperature, response_format)
+    if cache:
+        cached = await cache.aget(cache_key)
+        if cached is not None:
+            logging.info(f"Using cached script for prompt: {prompt[:50]}...")
+            video_content = VideoContent.parse_raw(cached)
+            if on_usage:
+                on_usage(_token_usage_entry("script", model, estimate, cached=True))
+            if on_scene:
+                for scene_number, scene in enumerate(video_content.main_scenes, start=1):
+                    on_scene(scene_number, scene)
+            return video_content
+
+    limiter = get_rate_limiters().get('openai')
+    estimated_tokens = estimate.total_tokens
+    # 429s are retried here rather than inside the client, so that each one shrinks the limiter's window
+    attempts = get_section('llm_client').get('max_retries', 2) + 1
+    try:
+        for attempt in range(1, attempts + 1):
+            try:
+                async with limiter.limit(tokens=estimated_tokens):
+                    if on_scene:
+                        raw_content, usage = await _stream_script(messages, timeout, total_timeout, model, response_format, temperature, on_scene)
+                    else:
+                        response = await create_chat_completion(
+                            messages=messages,
+                            timeout=timeout,
+                            total_timeout=total_timeout,
+                            model=model,
+                            response_format=response_format,
+                            temperature=temperature,
+                            max_retries=0,
+                        )
+                        raw_content, usage = response.choices[0].message.content, response.usage
+                break
+            except Exception as e:
+                if attempt == attempts or not is_rate_limit_error(e):
+                    raise
+                logging.warning(f"OpenAI rate limited the script call, retrying (attempt {attempt + 1}/{attempts})")
+                await asyncio.sleep(RATE_LIMIT_BACKOFF_SECONDS * 2 ** (attempt - 1))
+        if usage:
+            limiter.record_tokens(estimated_tokens, usage.total_tokens)
+        if on_usage:
+            on_usage(_token_usage_entry("script", model, estimate, usage))
+        video_content = VideoContent.parse_raw(raw_content)
+        if cache:
+            await cache.aset(cache_key, video_content.json())
+        return video_content
     except Exception as e:
         logging.error(f"Error in OpenAI API call: {str(e)}")
         raise Exception(f"Error in OpenAI API call: {str(e)}")
 
+async def _stream_script(
+    messages: List[Dict[str, str]],
+    timeout: Optional[float],
+    total_timeout: Optional[float],
+    model: str,
+    response_format: Dict[str, Any],
+    temperature: float,
+    on_scene: Callable[[int, Scene], Any],
+) -> Tuple[str, Any]:
+    """
+    Stream the script completion and report each scene as soon as it is complete.
+
+    :param messages: Chat messages sent to the model.
+    :param timeout: Timeout in seconds for a single HTTP attempt.
+    :param total_timeout: Deadline in seconds for the whole stream.
+    :param model: Model generating the script.
+    :param response_format: Response format passed to the completion.
+    :param temperature: Sampling temperature.
+    :param on_scene: Called with (scene number, scene) for each entry of main_scenes.
+    :return: The raw completion text and the usage reported by the last chunk, or None.
+    """
+    parser = SceneStreamParser()
+    usage = None
+    async for chunk in stream_chat_completion(
+        messages=messages,
+        timeout=timeout,
+        total_timeout=total_timeout,
+        model=model,
+        response_format=response_format,
+        temperature=temperature,
+        stream_options={"include_usage": True},
+        max_retries=0,
+    ):
+        if chunk.usage:
+            usage = chunk.usage
+        if not chunk.choices or not chunk.choices[0].delta.content:
+            continue
+        for scene in parser.feed(chunk.choices[0].delta.content):
+            on_scene(parser.scenes_emitted, Scene.parse_obj(scene))
+    return parser.buffer, usage
+
 # Mock implementations for new services
-def generate_image(prompt: str) -> str:
-    logging.info(f"Generating image with prompt: {prompt[:50]}...")
-    return "http://example.com/generated_image.jpg"
+async def generate_image(prompt: str) -> str:
+    async with get_rate_limiters().get('black_forest').limit():
+        logging.info(f"Generating image with prompt: {prompt[:50]}...")
+        return "http://example.com/generated_image.jpg"
 
-def generate_voice(script: str) -> str:
-    logging.info(f"Generating voice for script: {script[:50]}...")
-    return "http://example.com/generated_voice.mp3"
+async def generate_voice(script: str) -> str:
+    async with get_rate_limiters().get('elevenlabs').limit(tokens=len(script)):
+        logging.info(f"Generating voice for script: {script[:50]}...")
+        return "http://example.com/generated_voice.mp3"
 
-def generate_music(prompt: str) -> str:
-    logging.info(f"Generating music with prompt: {prompt[:50]}...")
-    return "http://example.com/generated_music.mp3"
+async def generate_music(prompt: str) -> str:
+    async with get_rate_limiters().get('suna').limit():
+        logging.info(f"Generating music with prompt: {prompt[:50]}...")
+        return "http://example.com/generated_music.mp3"
 
-def generate_video(video_data: Dict[str, Any]) -> str:
-    logging.info(f"Generating video with data: {str(video_data)[:100]}...")
-    return "http://example.com/generated_video.mp4"
+async def generate_video(video_data: Dict[str, Any]) -> str:
+    async with get_rate_limiters().get('luma').limit():
+        logging.info(f"Generating video with data: {str(video_data)[:100]}...")
+        return "http://example.com/generated_video.mp4"
 
 # Ensure all functions are available when imported
 __all__ = ['generate_content_with_openai', 'generate_image', 'generate_voice', 'generate_music', 'generate_video']
\ No newline at end of file
@@ -0,0 +1,77 @@
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+def request_hash(payload: Dict[str, Any]) -> str:
+    """
+    Hash a request payload independently of its key order.
+
+    :param payload: JSON-compatible request data, e.g. ContentCreationRequest.dict().
+    :return: SHA-256 hex digest of the canonical JSON.
+    """
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+class _Call:
+    __slots__ = ('task', 'waiters')
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+class SingleFlight:
+    def __init__(self):
+        """
+        Initialize a group of calls where concurrent calls with the same key share one execution.
+        """
+        self.logger = logging.getLogger(__name__)
+        self.calls = 0
+        self.coalesced = 0
+        self._calls: Dict[str, _Call] = {}
+
+    async def run(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run func, or wait for the run of func already in flight under the same key.
+
+        The run continues while any caller still waits for it: a cancelled caller only stops
+        waiting, and the run is cancelled with the last one.
+
+        :param key: Identity of the call, e.g. a request_hash.
+        :param func: Coroutine function performing the call.
+        :return: The result of the shared run; its exception is raised in every caller.
+        """
+        loop = asyncio.get_running_loop()
+        call = self._calls.get(key)
+        if call is None or call.task.done() or call.task.get_loop() is not loop:
+            call = _Call(loop.create_task(func()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda task: self._finish(key, call))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+            self.logger.info(f"Attached to the call in flight for {key[:12]}")
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": self.in_flight()}
+
+    def _finish(self, key: str, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        # Every waiter may have been cancelled; retrieve the exception so it is not reported as lost
+        if not call.task.cancelled():
+            call.task.exception()
@@ -0,0 +1,72 @@
+from typing import Any, Dict, Iterable, List, Set
+from .single_flight import request_hash
+
+# Stages whose output feeds each stage, in the order the pipeline runs them. Music is made
+# from the request alone, so a new script does not invalidate it.
+STAGE_INPUT_STAGES = {
+    "script": [],
+    "image": ["script"],
+    "voice": ["script"],
+    "music": [],
+    "video": ["script", "image", "voice", "music"],
+}
+
+def stage_fingerprints(request: Dict[str, Any], script_prompt: str, model: str, temperature: float) -> Dict[str, str]:
+    """
+    Fingerprint the inputs of every stage of a content request.
+
+    The script's fingerprint covers the prompt exactly as it is sent, so any change of the
+    template or of a value it renders regenerates the script, and nothing else does. The
+    other stages cover the request fields they read and the fingerprints of the stages
+    they build on, so a changed script also changes the images, narration and video.
+
+    :param request: The content creation request, as ContentCreationRequest.dict().
+    :param script_prompt: Script prompt rendered for the request, by build_script_prompt.
+    :param model: Model generating the script.
+    :param temperature: Sampling temperature of the script.
+    :return: Fingerprint by stage name.
+    """
+    general = request.get("generalOptions") or {}
+    services = general.get("services") or {}
+    fingerprints = {
+        "script": request_hash({"prompt": script_prompt, "model": model, "temperature": temperature}),
+    }
+    fingerprints["image"] = request_hash({"script": fingerprints["script"], "visualPromptOptions": request.get("visualPromptOptions")})
+    fingerprints["voice"] = request_hash({
+        "script": fingerprints["script"],
+        "tone": general.get("tone"),
+        "vocabulary": general.get("vocabulary"),
+        "pacing": (request.get("contentOptions") or {}).get("pacing"),
+    })
+    fingerprints["music"] = request_hash({"style": general.get("style"), "videoSubject": request.get("videoSubject")})
+    fingerprints["video"] = request_hash({
+        name: fingerprints[name] if name == "script" or services.get(f"generate_{name}") else None
+        for name in STAGE_INPUT_STAGES["video"]
+    })
+    return fingerprints
+
+def reusable_stages(stored: Dict[str, str], current: Dict[str, str], available: Iterable[str], enabled: Iterable[str]) -> List[str]:
+    """
+    Select the stages whose stored results can be reused instead of running them again.
+
+    A stage is reusable when its fingerprint is unchanged, its result is stored, and every
+    enabled stage it builds on is reusable as well: when the script is generated again its
+    scene rows are replaced, and the scene assets with them.
+
+    :param stored: Fingerprints stored with the content.
+    :param current: Fingerprints of the new request.
+    :param available: Stages whose results are stored.
+    :param enabled: Stages of the new request's stage graph.
+    :return: Reusable stage names, in pipeline order.
+    """
+    available = set(available)
+    enabled = set(enabled)
+    reusable: Set[str] = set()
+    for name, inputs in STAGE_INPUT_STAGES.items():
+        if (
+            stored.get(name) == current.get(name)
+            and name in available
+            and all(dependency in reusable for dependency in inputs if dependency in enabled)
+        ):
+            reusable.add(name)
+    return [name for name in STAGE_INPUT_STAGES if name in reusable]
@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+class StageError(Exception):
+    def __init__(self, stage: str, error: Exception):
+        super().__init__(f"Stage '{stage}' failed: {str(error)}")
+        self.stage = stage
+        self.error = error
+
+class StageCancelledError(Exception):
+    pass
+
+class Stage:
+    def __init__(self, name: str, func: Callable[[Dict[str, Any]], Awaitable[Any]], depends_on: Iterable[str] = ()):
+        """
+        Initialize a pipeline stage.
+
+        :param name: Unique name of the stage.
+        :param func: Coroutine function called with the results of all finished stages.
+        :param depends_on: Names of the stages that must complete before this one starts.
+        """
+        self.name = name
+        self.func = func
+        self.depends_on = list(depends_on)
+
+class StageScheduler:
+    def __init__(self, stages: List[Stage]):
+        """
+        Initialize the scheduler with a dependency graph of stages.
+
+        :param stages: Stages of the graph, in any order.
+        :raises: ValueError if a dependency is unknown or the graph has a cycle.
+        """
+        self.logger = logging.getLogger(__name__)
+        self.stages = {stage.name: stage for stage in stages}
+        self.order = self._topological_order()
+        self.timings: Dict[str, float] = {}
+        self.status: Dict[str, str] = {}
+
+    def _topological_order(self) -> List[str]:
+        order: List[str] = []
+        visiting = set()
+
+        def visit(name: str):
+            if name in order:
+                return
+            if name in visiting:
+                raise ValueError(f"Stage graph has a cycle through '{name}'")
+            visiting.add(name)
+            for dependency in self.stages[name].depends_on:
+                if dependency not in self.stages:
+                    raise ValueError(f"Stage '{name}' depends on unknown stage '{dependency}'")
+                visit(dependency)
+            visiting.discard(name)
+            order.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    async def run(
+        self,
+        results: Optional[Dict[str, Any]] = None,
+        on_complete: Optional[Callable[[str, Any], Awaitable[None]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Run every stage as soon as its dependencies are done, independent stages concurrently.
+
+        When a stage fails, the stages depending on it are cancelled while unrelated branches
+        finish normally.
+
+        :param results: Results of stages that already completed; those stages are not run again.
+        :param on_complete: Coroutine function awaited with (stage name, result) after each stage
+                            completes and before its dependents start, e.g. to checkpoint it.
+        :return: Results of all stages by name.
+        :raises: StageError for the first stage that failed, or the error raised by on_complete.
+        """
+        results = dict(results or {})
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_stage(stage: Stage) -> Any:
+            outcomes = await asyncio.gather(*(tasks[name] for name in stage.depends_on), return_exceptions=True)
+            if any(isinstance(outcome, BaseException) for outcome in outcomes):
+                self.status[stage.name] = "cancelled"
+                raise StageCancelledError(f"Stage '{stage.name}' cancelled because a dependency failed")
+
+            self.status[stage.name] = "running"
+            start_time = time.monotonic()
+            try:
+                result = await stage.func(results)
+            except Exception as e:
+                self.status[stage.name] = "failed"
+                raise StageError(stage.name, e) from e
+            finally:
+                self.timings[stage.name] = round(time.monotonic() - start_time, 3)
+            results[stage.name] = result
+            if on_complete:
+                await on_complete(stage.name, result)
+            self.status[stage.name] = "completed"
+            return result
+
+        for name in self.order:
+            if name in results:
+                self.status[name] = "skipped"
+                tasks[name] = asyncio.ensure_future(asyncio.sleep(0, results[name]))
+            else:
+                tasks[name] = asyncio.ensure_future(run_stage(self.stages[name]))
+
+        outcomes = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        self.logger.info(f"Stage timings: {self.timings}")
+
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException) and not isinstance(outcome, StageCancelledError):
+                raise outcome
+        return results
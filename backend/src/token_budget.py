@@ -0,0 +1,206 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Characters per token of English text, used when no tokenizer is available
+HEURISTIC_CHARS_PER_TOKEN = 4
+
+class TokenBudgetExceeded(ValueError):
+    def __init__(self, message: str, prompt_tokens: int, completion_tokens: int, limit: int):
+        super().__init__(message)
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.limit = limit
+
+class TokenEstimate:
+    def __init__(self, prompt_tokens: int, completion_tokens: int, trimmed: Optional[List[str]] = None):
+        """
+        Expected size of an LLM call.
+
+        :param prompt_tokens: Tokens of the prompt, including the message overhead.
+        :param completion_tokens: Tokens expected in the completion.
+        :param trimmed: Variables shortened to fit the budget.
+        """
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.trimmed = trimmed or []
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+class TokenCounter:
+    def __init__(self, model: Optional[str] = None, cache_size: int = 4096, max_cached_length: int = 8192):
+        """
+        Initialize a token counter for a model, with an LRU cache of counts.
+
+        Uses tiktoken when it is installed and has the model's encoding, and a characters per
+        token estimate otherwise. Template text is counted once and then served from the cache;
+        texts longer than max_cached_length, such as large user inputs, are not cached.
+
+        :param model: Model name, used to pick the encoding.
+        :param cache_size: Number of counted texts kept.
+        :param max_cached_length: Longest text, in characters, whose count is cached.
+        """
+        self.logger = logging.getLogger(__name__)
+        self.cache_size = cache_size
+        self.max_cached_length = max_cached_length
+        self.encoding = self._load_encoding(model)
+        self.tokenizer = self.encoding.name if self.encoding is not None else "heuristic"
+        self.hits = 0
+        self.misses = 0
+        self._counts: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _load_encoding(self, model: Optional[str]) -> Any:
+        if tiktoken is None:
+            return None
+        try:
+            try:
+                return tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding("o200k_base")
+            except KeyError:
+                return tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            # The encoding files are downloaded on first use, which fails offline
+            self.logger.warning(f"Falling back to estimated token counts, tiktoken encoding unavailable: {str(e)}")
+            return None
+
+    def count(self, text: str) -> int:
+        if len(text) > self.max_cached_length:
+            return self._count(text)
+        with self._lock:
+            count = self._counts.get(text)
+            if count is not None:
+                self._counts.move_to_end(text)
+                self.hits += 1
+                return count
+            self.misses += 1
+        count = self._count(text)
+        with self._lock:
+            self._counts[text] = count
+            while len(self._counts) > self.cache_size:
+                self._counts.popitem(last=False)
+        return count
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """
+        Cut a text down to at most max_tokens tokens.
+        """
+        if max_tokens <= 0:
+            return ""
+        if self.encoding is None:
+            return text[:max_tokens * HEURISTIC_CHARS_PER_TOKEN]
+        tokens = self.encoding.encode(text, disallowed_special=())
+        return text if len(tokens) <= max_tokens else self.encoding.decode(tokens[:max_tokens])
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"tokenizer": self.tokenizer, "hits": self.hits, "misses": self.misses, "entries": len(self._counts)}
+
+    def _count(self, text: str) -> int:
+        if self.encoding is None:
+            return -(-len(text) // HEURISTIC_CHARS_PER_TOKEN)
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+class TokenBudget:
+    def __init__(
+        self,
+        counter: TokenCounter,
+        context_window: int,
+        max_prompt_tokens: Optional[int] = None,
+        on_oversize: str = "trim",
+        trim_variables: Sequence[str] = (),
+    ):
+        """
+        Initialize a budget that sizes prompts before they are sent.
+
+        :param counter: Token counter of the model.
+        :param context_window: Tokens the model accepts for prompt and completion together.
+        :param max_prompt_tokens: Cap on prompt tokens below the context window, to bound the cost of a call.
+        :param on_oversize: "trim" to shorten trim_variables until the prompt fits, "reject" to raise.
+        :param trim_variables: Template variables that may be shortened, typically free-text user input.
+        :raises: ValueError if on_oversize is unknown.
+        """
+        if on_oversize not in ("trim", "reject"):
+            raise ValueError(f"on_oversize must be 'trim' or 'reject', got {on_oversize}")
+        self.counter = counter
+        self.context_window = context_window
+        self.max_prompt_tokens = max_prompt_tokens
+        self.on_oversize = on_oversize
+        self.trim_variables = list(trim_variables)
+        self.logger = logging.getLogger(__name__)
+
+    def prompt_limit(self, completion_tokens: int) -> int:
+        limit = self.context_window - completion_tokens
+        if self.max_prompt_tokens is not None:
+            limit = min(limit, self.max_prompt_tokens)
+        return limit
+
+    def check(self, prompt: str, completion_tokens: int, overhead_tokens: int = 0) -> TokenEstimate:
+        """
+        Size an already rendered prompt.
+
+        :raises TokenBudgetExceeded: If the prompt does not fit.
+        """
+        estimate = TokenEstimate(overhead_tokens + self.counter.count(prompt), completion_tokens)
+        self._raise_if_over(estimate)
+        return estimate
+
+    def fit(self, template: Any, values: Dict[str, Any], completion_tokens: int, overhead_tokens: int = 0) -> Tuple[str, TokenEstimate]:
+        """
+        Render a compiled template within the budget.
+
+        The template's literal text is counted once per process through the counter's cache;
+        only the variable values are tokenized for each request. An oversized prompt has its
+        trim_variables shortened, longest first, or is rejected.
+
+        :param template: CompiledTemplate to render.
+        :param values: Template variables.
+        :param completion_tokens: Tokens expected in the completion.
+        :param overhead_tokens: Tokens added around the prompt, e.g. the system message.
+        :return: The prompt and its estimate.
+        :raises TokenBudgetExceeded: If the prompt does not fit and cannot be trimmed enough.
+        """
+        limit = self.prompt_limit(completion_tokens)
+        parts = template.render_parts(values)
+        prompt_tokens = overhead_tokens + sum(self.counter.count(part) for part in parts)
+        trimmed: List[str] = []
+
+        if prompt_tokens > limit and self.on_oversize == "trim":
+            values = dict(values)
+            candidates = [name for name in self.trim_variables if name in template.placeholders and values.get(name)]
+            candidates.sort(key=lambda name: self.counter.count(str(values[name])), reverse=True)
+            for name in candidates:
+                # Token counts of pieces are not exactly additive, so a second cut may be needed
+                for _ in range(3):
+                    text = str(values[name])
+                    if prompt_tokens <= limit or not text:
+                        break
+                    values[name] = self.counter.truncate(text, self.counter.count(text) - (prompt_tokens - limit))
+                    parts = template.render_parts(values)
+                    prompt_tokens = overhead_tokens + sum(self.counter.count(part) for part in parts)
+                    if name not in trimmed:
+                        trimmed.append(name)
+                if prompt_tokens <= limit:
+                    break
+
+        estimate = TokenEstimate(prompt_tokens, completion_tokens, trimmed)
+        self._raise_if_over(estimate)
+        if trimmed:
+            self.logger.warning(f"Trimmed {trimmed} of template '{template.name}' to fit {limit} prompt tokens")
+        return ''.join(parts), estimate
+
+    def _raise_if_over(self, estimate: TokenEstimate):
+        limit = self.prompt_limit(estimate.completion_tokens)
+        if estimate.prompt_tokens > limit:
+            raise TokenBudgetExceeded(
+                f"Prompt of {estimate.prompt_tokens} tokens exceeds the budget of {limit} tokens "
+                f"with {estimate.completion_tokens} completion tokens expected",
+                estimate.prompt_tokens, estimate.completion_tokens, limit,
+            )
@@ -0,0 +1,57 @@
+from typing import Any, Dict, List, Tuple
+
+class UnitOfWork:
+    def __init__(self, client: Any):
+        """
+        Initialize a unit of work that collects row updates and commits them in one batched transaction.
+
+        Updates of the same rows are merged, so a column written by several stages costs one statement.
+
+        :param client: Connected Prisma client.
+        """
+        self.client = client
+        self._updates: Dict[Tuple[str, Tuple[Tuple[str, Any], ...]], Dict[str, Any]] = {}
+        self.transactions = 0
+        self.statements = 0
+        # (model, where) of every update committed so far
+        self.committed: List[Tuple[str, Dict[str, Any]]] = []
+
+    def update(self, model: str, where: Dict[str, Any], data: Dict[str, Any]):
+        """
+        Stage an update of the rows matching a filter.
+
+        :param model: Prisma model accessor, e.g. 'content' or 'visualprompt'.
+        :param where: Equality filter on scalar columns.
+        :param data: Column values to write; later values replace earlier ones.
+        """
+        key = (model, tuple(sorted(where.items())))
+        self._updates.setdefault(key, {}).update(data)
+
+    def __len__(self) -> int:
+        return len(self._updates)
+
+    async def commit(self) -> int:
+        """
+        Write every staged update in one transaction.
+
+        The staged updates are kept if the transaction fails, so the commit can be retried.
+
+        :return: Number of statements written.
+        """
+        if not self._updates:
+            return 0
+        updates, self._updates = self._updates, {}
+        try:
+            async with self.client.batch_() as batcher:
+                for (model, where), data in updates.items():
+                    # update_many leaves the batch intact if a row was deleted meanwhile
+                    getattr(batcher, model).update_many(where=dict(where), data=data)
+        except BaseException:
+            for key, data in updates.items():
+                # Values staged while the transaction was in flight are newer
+                self._updates[key] = {**data, **self._updates.get(key, {})}
+            raise
+        self.transactions += 1
+        self.statements += len(updates)
+        self.committed.extend((model, dict(where)) for model, where in updates)
+        return len(updates)
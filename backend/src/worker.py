@@ -0,0 +1,190 @@
+# worker.py
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from typing import Any, Dict, Optional
+
+from shared.types.ContentCreation import ContentCreationRequest
+from .config import get_section
+from .content_pipeline import content_pipeline
+from .job_queue import JobQueue
+from .llm_client import close_llm_client
+from .progress_tracker import ProgressTracker, progress_writer
+from .prisma import init_prisma, disconnect_prisma
+from .services import get_token_budget
+
+class ContentWorker:
+    def __init__(self, worker_id: Optional[str] = None, queue: Optional[JobQueue] = None, concurrency: Optional[int] = None):
+        """
+        Initialize a worker that drains the content job queue.
+
+        :param worker_id: Unique identifier used as lease owner. Defaults to host:pid.
+        :param queue: Job queue to drain.
+        :param concurrency: Number of jobs processed at the same time. Defaults to job_queue.jobs_per_process.
+        """
+        settings = get_section('job_queue')
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.concurrency = concurrency or settings.get('jobs_per_process', 1)
+        self.queue = queue or JobQueue()
+        self.poll_interval = settings.get('poll_interval', 2)
+        self.heartbeat_interval = settings.get('heartbeat_interval', self.queue.lease_seconds / 3)
+        self.logger = logging.getLogger(__name__)
+        self._stopping = asyncio.Event()
+
+    def stop(self):
+        """
+        Stop claiming new jobs; the jobs in progress are finished first.
+        """
+        if not self._stopping.is_set():
+            self.logger.info(f"Worker {self.worker_id} draining")
+        self._stopping.set()
+
+    async def run(self):
+        self.logger.info(f"Worker {self.worker_id} started with {self.concurrency} job slots")
+        await asyncio.gather(*(self._drain() for _ in range(self.concurrency)))
+        self.logger.info(f"Worker {self.worker_id} stopped")
+
+    async def _drain(self):
+        while not self._stopping.is_set():
+            job = await self.queue.claim(self.worker_id)
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self.process_job(job)
+
+    async def process_job(self, job: Any):
+        input_data = ContentCreationRequest.parse_raw(job.payload)
+        checkpoint: Dict[str, Any] = json.loads(job.checkpoint) if job.checkpoint else {}
+        checkpoint_lock = asyncio.Lock()
+        progress_tracker = ProgressTracker(6)
+        content_id: Optional[int] = job.contentId
+
+        async def save_checkpoint(stage: str, stages: Dict[str, Any]):
+            nonlocal content_id
+            if "script" in stages:
+                content_id = stages["script"]["content_id"]
+            async with checkpoint_lock:
+                await self.queue.save_checkpoint(job.id, self.worker_id, stage, stages, content_id)
+
+        heartbeat = asyncio.ensure_future(self._heartbeat(job.id, asyncio.current_task()))
+        try:
+            content = await content_pipeline.create_content(
+                input_data, 1, 1, progress_tracker,
+                checkpoint=checkpoint,
+                on_checkpoint=save_checkpoint,
+                # Set up front for regenerations, after the script stage otherwise
+                content_id=job.contentId,
+                mark_failed=False,
+            )
+            await self.queue.complete(job.id, self.worker_id, content.id)
+        except Exception as e:
+            self.logger.error(f"Job {job.id} failed: {str(e)}", exc_info=True)
+            status = await self.queue.fail(job.id, self.worker_id, str(e), job.attempts)
+            if content_id is not None:
+                progress_tracker.fail(content_id, str(e), retrying=status == "queued")
+        except asyncio.CancelledError:
+            if heartbeat.done() and not heartbeat.cancelled():
+                # The lease was lost and the job may already be running elsewhere
+                self.logger.warning(f"Abandoned job {job.id} after losing its lease")
+                return
+            raise
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job_id: int, job_task: asyncio.Task):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            if not await self.queue.heartbeat(job_id, self.worker_id):
+                self.logger.warning(f"Worker {self.worker_id} lost the lease on job {job_id}")
+                job_task.cancel()
+                return
+
+async def main(worker_id: Optional[str] = None, concurrency: Optional[int] = None):
+    await init_prisma()
+    # Loads the tokenizer before any job, so that no job waits for its download
+    await asyncio.to_thread(get_token_budget)
+    worker = ContentWorker(worker_id, concurrency=concurrency)
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, worker.stop)
+    try:
+        await worker.run()
+    finally:
+        await progress_writer.close()
+        await close_llm_client()
+        await disconnect_prisma()
+
+def _run_process(concurrency: Optional[int]):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    asyncio.run(main(concurrency=concurrency))
+
+def run_pool(processes: int, concurrency: Optional[int] = None, drain_timeout: Optional[float] = None):
+    """
+    Run several worker processes on this host and drain them gracefully on SIGTERM or SIGINT.
+
+    Every process claims jobs on its own through the shared database, so pools on several
+    hosts pointing at the same DATABASE_URL cooperate without further coordination.
+
+    :param processes: Number of worker processes.
+    :param concurrency: Jobs processed at the same time by each process.
+    :param drain_timeout: Seconds to wait for in-flight jobs after a stop signal before killing
+                          the processes; their leases then expire and the jobs resume elsewhere.
+    """
+    logger = logging.getLogger(__name__)
+    context = multiprocessing.get_context('spawn')
+    children = [
+        context.Process(target=_run_process, args=(concurrency,), name=f"content-worker-{index}")
+        for index in range(processes)
+    ]
+    for child in children:
+        child.start()
+    logger.info(f"Started {processes} worker processes")
+
+    stop_requested_at: Optional[float] = None
+
+    def forward_signal(signum, frame):
+        nonlocal stop_requested_at
+        logger.info(f"Received signal {signum}, draining {processes} worker processes")
+        stop_requested_at = time.monotonic()
+        for child in children:
+            if child.is_alive():
+                os.kill(child.pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, forward_signal)
+    signal.signal(signal.SIGINT, forward_signal)
+
+    while any(child.is_alive() for child in children):
+        for child in children:
+            child.join(1)
+        if stop_requested_at is not None and drain_timeout is not None and time.monotonic() - stop_requested_at > drain_timeout:
+            for child in children:
+                if child.is_alive():
+                    logger.warning(f"{child.name} did not drain in time, killing it")
+                    child.kill()
+
+if __name__ == '__main__':
+    settings = get_section('job_queue')
+    parser = argparse.ArgumentParser(description="Drain the content creation job queue.")
+    parser.add_argument('--worker-id', help="Lease owner id, defaults to host:pid (single process only)")
+    parser.add_argument('--processes', type=int, default=settings.get('processes_per_host', 1),
+                        help="Number of worker processes on this host. Provider rate limits are split "
+                             "by job_queue.processes_per_host, or api.rate_limit_processes, so keep them in line")
+    parser.add_argument('--concurrency', type=int, default=settings.get('jobs_per_process', 1),
+                        help="Jobs processed at the same time by each process")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    print("Worker is running. Press CTRL+C to stop the worker.")
+    if args.processes > 1:
+        run_pool(args.processes, args.concurrency, settings.get('drain_timeout'))
+    else:
+        asyncio.run(main(args.worker_id, args.concurrency))
@@ -0,0 +1,238 @@
+import asyncio
+import copy
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from prisma.errors import UniqueViolationError
+
+class FakeRecord:
+    """
+    Row returned by the fake client; fields that were never set read as None, like nullable columns.
+    """
+    def __init__(self, fields: Dict[str, Any]):
+        self.__dict__.update(fields)
+
+    def __getattr__(self, name: str) -> Any:
+        return None
+
+    def __repr__(self) -> str:
+        return f"FakeRecord({self.__dict__})"
+
+def _matches(row: Dict[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+    for key, condition in (where or {}).items():
+        if key == "OR":
+            if not any(_matches(row, option) for option in condition):
+                return False
+        elif key == "AND":
+            if not all(_matches(row, option) for option in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = row.get(key)
+            for operator, operand in condition.items():
+                if operator == "in" and value not in operand:
+                    return False
+                if operator == "not" and value == operand:
+                    return False
+                if operator in ("lt", "lte", "gt", "gte") and value is None:
+                    return False
+                if operator == "lt" and not value < operand:
+                    return False
+                if operator == "lte" and not value <= operand:
+                    return False
+                if operator == "gt" and not value > operand:
+                    return False
+                if operator == "gte" and not value >= operand:
+                    return False
+        elif row.get(key) != condition:
+            return False
+    return True
+
+class FakeTable:
+    def __init__(self, client: "FakePrisma", name: str, defaults: Dict[str, Any], unique: Iterable[str]):
+        self.client = client
+        self.name = name
+        self.defaults = defaults
+        self.unique = list(unique)
+        self.rows: List[Dict[str, Any]] = []
+        self.next_id = 1
+
+    def _record(self, row: Dict[str, Any], include: Optional[Dict[str, bool]] = None) -> FakeRecord:
+        fields = copy.deepcopy(row)
+        for relation, wanted in (include or {}).items():
+            if wanted:
+                fields[relation] = self.client.related(self.name, relation, row["id"])
+        return FakeRecord(fields)
+
+    def _check_unique(self, row: Dict[str, Any]):
+        for column in self.unique:
+            if row.get(column) is not None and any(
+                other is not row and other.get(column) == row[column] for other in self.rows
+            ):
+                raise UniqueViolationError({}, message=f"Unique constraint failed on {self.name}.{column}")
+
+    def _apply(self, row: Dict[str, Any], data: Dict[str, Any]):
+        for key, value in data.items():
+            if isinstance(value, dict) and "increment" in value:
+                row[key] = (row.get(key) or 0) + value["increment"]
+            else:
+                row[key] = value
+        row["updatedAt"] = datetime.now(timezone.utc)
+
+    def _sorted(self, rows: List[Dict[str, Any]], order: Optional[Dict[str, str]]) -> List[Dict[str, Any]]:
+        for key, direction in reversed(list((order or {}).items())):
+            rows = sorted(rows, key=lambda row: row.get(key), reverse=direction == "desc")
+        return rows
+
+    async def create(self, data: Dict[str, Any]) -> FakeRecord:
+        await self.client.yield_control()
+        now = datetime.now(timezone.utc)
+        row = {**copy.deepcopy(self.defaults), "createdAt": now, "updatedAt": now, **copy.deepcopy(data)}
+        row.setdefault("id", self.next_id)
+        self.next_id = max(self.next_id, row["id"]) + 1
+        self.rows.append(row)
+        try:
+            self._check_unique(row)
+        except UniqueViolationError:
+            self.rows.remove(row)
+            raise
+        self.client.calls.append((self.name, "create"))
+        return self._record(row)
+
+    async def create_many(self, data: List[Dict[str, Any]]) -> int:
+        for item in data:
+            await self.create(item)
+        self.client.calls.append((self.name, "create_many"))
+        return len(data)
+
+    async def find_unique(self, where: Dict[str, Any], include: Optional[Dict[str, bool]] = None) -> Optional[FakeRecord]:
+        await self.client.yield_control()
+        for row in self.rows:
+            if _matches(row, where):
+                return self._record(row, include)
+        return None
+
+    async def find_first(self, where: Optional[Dict[str, Any]] = None, order: Optional[Dict[str, str]] = None,
+                         include: Optional[Dict[str, bool]] = None) -> Optional[FakeRecord]:
+        rows = await self.find_many(where=where, order=order, include=include)
+        return rows[0] if rows else None
+
+    async def find_many(self, where: Optional[Dict[str, Any]] = None, order: Optional[Dict[str, str]] = None,
+                        include: Optional[Dict[str, bool]] = None) -> List[FakeRecord]:
+        await self.client.yield_control()
+        rows = self._sorted([row for row in self.rows if _matches(row, where)], order)
+        return [self._record(row, include) for row in rows]
+
+    async def update(self, where: Dict[str, Any], data: Dict[str, Any]) -> Optional[FakeRecord]:
+        await self.client.yield_control()
+        for row in self.rows:
+            if _matches(row, where):
+                self._apply(row, data)
+                self.client.calls.append((self.name, "update"))
+                return self._record(row)
+        return None
+
+    async def update_many(self, where: Dict[str, Any], data: Dict[str, Any]) -> int:
+        await self.client.yield_control()
+        rows = [row for row in self.rows if _matches(row, where)]
+        for row in rows:
+            self._apply(row, data)
+        self.client.calls.append((self.name, "update_many"))
+        return len(rows)
+
+    async def delete_many(self, where: Dict[str, Any]) -> int:
+        await self.client.yield_control()
+        rows = [row for row in self.rows if _matches(row, where)]
+        self.rows = [row for row in self.rows if row not in rows]
+        self.client.calls.append((self.name, "delete_many"))
+        return len(rows)
+
+class FakeBatch:
+    """
+    Queue of the operations of a batch_() block, run in one transaction when the block exits.
+    """
+    def __init__(self, client: "FakePrisma"):
+        self.client = client
+        self.operations: List[Tuple[FakeTable, str, Dict[str, Any]]] = []
+
+    def __getattr__(self, name: str) -> Any:
+        table = getattr(self.client, name)
+
+        class Queue:
+            def __getattr__(queue, operation: str):
+                return lambda **kwargs: self.operations.append((table, operation, kwargs))
+
+        return Queue()
+
+# Relations of Content, as (child table, foreign key, one-to-many)
+CONTENT_RELATIONS = {
+    "generalOptions": ("generaloptions", "contentId", False),
+    "contentOptions": ("contentoptions", "contentId", False),
+    "visualPromptOptions": ("visualpromptoptions", "contentId", False),
+    "scenes": ("scene", "contentId", True),
+    "audioPrompts": ("audioprompt", "contentId", True),
+    "visualPrompts": ("visualprompt", "contentId", True),
+    "musicPrompt": ("musicprompt", "contentId", False),
+    "tokenUsage": ("tokenusage", "contentId", True),
+}
+
+class FakePrisma:
+    """
+    In-memory stand-in for the generated Prisma client, covering the model operations the
+    backend uses. Every call yields to the event loop, so concurrent callers interleave the
+    way they do against the real database. A transaction restores all tables if its body raises.
+    """
+    def __init__(self):
+        self.calls: List[Tuple[str, str]] = []
+        self.transactions = 0
+        self._tables: Dict[str, FakeTable] = {}
+        self._table("content", {"status": "pending", "progress": 0})
+        self._table("job", {"status": "queued", "attempts": 0}, unique=["idempotencyKey"])
+        for name, _, _ in CONTENT_RELATIONS.values():
+            self._table(name, {})
+
+    def _table(self, name: str, defaults: Dict[str, Any], unique: Iterable[str] = ()):
+        self._tables[name] = FakeTable(self, name, defaults, unique)
+
+    def __getattr__(self, name: str) -> FakeTable:
+        tables = self.__dict__.get("_tables", {})
+        if name in tables:
+            return tables[name]
+        raise AttributeError(name)
+
+    async def yield_control(self):
+        await asyncio.sleep(0)
+
+    def related(self, table: str, relation: str, row_id: int) -> Any:
+        # Content is the only model whose relations are included
+        child, foreign_key, many = CONTENT_RELATIONS[relation]
+        rows = [self._tables[child]._record(row) for row in self._tables[child].rows if row.get(foreign_key) == row_id]
+        if many:
+            return rows
+        return rows[0] if rows else None
+
+    @asynccontextmanager
+    async def batch_(self):
+        batch = FakeBatch(self)
+        yield batch
+        async with self.tx():
+            for table, operation, kwargs in batch.operations:
+                await getattr(table, operation)(**kwargs)
+
+    @asynccontextmanager
+    async def tx(self):
+        snapshot = {name: (copy.deepcopy(table.rows), table.next_id) for name, table in self._tables.items()}
+        self.transactions += 1
+        try:
+            yield self
+        except BaseException:
+            for name, (rows, next_id) in snapshot.items():
+                self._tables[name].rows = rows
+                self._tables[name].next_id = next_id
+            raise
+
+async def run_write_directly(operation):
+    """
+    Stand-in for prisma.run_write that runs the operation on the caller's loop.
+    """
+    return await operation()
@@ -0,0 +1,79 @@
+import asyncio
+import unittest
+import os
+import sys
+
+# Add the src directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(os.path.dirname(current_dir), 'src')
+sys.path.insert(0, src_dir)
+
+from batch_engine import BatchEngine
+
+class TestBatchEngine(unittest.IsolatedAsyncioTestCase):
+    async def test_results_keep_input_order(self):
+        engine = BatchEngine(max_concurrency=3)
+
+        async def worker(item, index):
+            await asyncio.sleep(0.01 * (5 - item))
+            return item * 10
+
+        results, _ = await engine.run([1, 2, 3, 4], worker)
+        self.assertEqual(results, [10, 20, 30, 40])
+
+    async def test_respects_concurrency_limit(self):
+        engine = BatchEngine(max_concurrency=2)
+        running = 0
+        peak = 0
+
+        async def worker(item, index):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return item
+
+        await engine.run(range(6), worker)
+        self.assertEqual(peak, 2)
+
+    async def test_failing_entry_does_not_stop_others(self):
+        engine = BatchEngine(max_concurrency=2)
+
+        async def worker(item, index):
+            if item == 'bad':
+                raise RuntimeError("boom")
+            return item.upper()
+
+        results, stats = await engine.run(
+            ['a', 'bad', 'c'],
+            worker,
+            on_error=lambda item, index, e: {"error": str(e), "index": index},
+        )
+        self.assertEqual(results, ['A', {"error": "boom", "index": 2}, 'C'])
+        self.assertEqual(stats['failed'], 1)
+        self.assertEqual(stats['succeeded'], 2)
+        self.assertGreater(stats['entries_per_minute'], 0)
+
+    async def test_concurrent_runs_report_their_own_stats(self):
+        engine = BatchEngine(max_concurrency=4)
+
+        async def worker(item, index):
+            await asyncio.sleep(0.01)
+            if item < 0:
+                raise RuntimeError("negative")
+            return item
+
+        (_, first), (_, second) = await asyncio.gather(
+            engine.run([1, -1, -2], worker),
+            engine.run([1, 2, 3, 4, 5], worker),
+        )
+        self.assertEqual((first['total_entries'], first['failed']), (3, 2))
+        self.assertEqual((second['total_entries'], second['failed']), (5, 0))
+
+    def test_invalid_concurrency(self):
+        with self.assertRaises(ValueError):
+            BatchEngine(max_concurrency=0)
+
+if __name__ == '__main__':
+    unittest.main()
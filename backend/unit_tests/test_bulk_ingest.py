@@ -0,0 +1,132 @@
+import unittest
+import io
+import os
+import sys
+from concurrent.futures import Future
+
+# Add the src directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(os.path.dirname(current_dir), 'src')
+sys.path.insert(0, src_dir)
+
+from bulk_ingest import BulkIngestError, BulkIngestor, iter_lines, parse_csv, parse_ndjson
+
+def validate(item):
+    if 'title' not in item:
+        raise ValueError("title is required")
+    return item['title']
+
+class FakeQueue:
+    def __init__(self, error=None):
+        self.batches = []
+        self.error = error
+
+    def submit(self, requests):
+        self.batches.append(list(requests))
+        future = Future()
+        if self.error:
+            future.set_exception(self.error)
+        else:
+            first_id = len(self.batches) * 100
+            future.set_result([{"jobId": job_id, "status": "queued"} for job_id in range(first_id, first_id + len(requests))])
+        return future
+
+class TestParsers(unittest.TestCase):
+    def test_iter_lines_rejects_long_lines(self):
+        lines = iter_lines(io.BytesIO(b'{"a": 1}\n' + b'x' * 20 + b'\n'), max_line_bytes=10)
+
+        self.assertEqual(next(lines), b'{"a": 1}\n')
+        with self.assertRaises(BulkIngestError):
+            next(lines)
+
+    def test_parse_ndjson_reports_bad_lines(self):
+        rows = list(parse_ndjson([b'{"title": "a"}\n', b'\n', b'not json\n', b'[1]\n']))
+
+        self.assertEqual(rows[0], (1, {"title": "a"}))
+        self.assertEqual([line for line, _ in rows], [1, 3, 4])
+        self.assertIsInstance(rows[1][1], ValueError)
+        self.assertIsInstance(rows[2][1], ValueError)
+
+    def test_parse_csv_builds_nested_objects(self):
+        data = '﻿title,generalOptions.style,generalOptions.sceneAmount\nVideo,cinematic,5\nOther,,\n'.encode()
+        rows = list(parse_csv(io.BytesIO(data)))
+
+        self.assertEqual(rows, [
+            (2, {"title": "Video", "generalOptions": {"style": "cinematic", "sceneAmount": "5"}}),
+            (3, {"title": "Other"}),
+        ])
+
+    def test_parse_csv_reports_column_mismatch(self):
+        rows = list(parse_csv([b'title,videoSubject\n', b'a\n']))
+
+        self.assertEqual(rows[0][0], 2)
+        self.assertIsInstance(rows[0][1], ValueError)
+
+class TestBulkIngestor(unittest.TestCase):
+    def ingest(self, rows, queue, batch_size=2, max_in_flight=1):
+        return list(BulkIngestor(validate, queue.submit, batch_size=batch_size, max_in_flight=max_in_flight).ingest(rows))
+
+    def test_enqueues_in_batches_and_reports_each_row(self):
+        queue = FakeQueue()
+        rows = [(1, {"title": "a"}), (2, {}), (3, ValueError("Invalid JSON")), (4, {"title": "b"}), (5, {"title": "c"})]
+
+        results = self.ingest(rows, queue)
+
+        self.assertEqual(queue.batches, [["a", "b"], ["c"]])
+        self.assertEqual(results, [
+            {"line": 2, "error": "title is required"},
+            {"line": 3, "error": "Invalid JSON"},
+            {"line": 1, "jobId": 100, "status": "queued"},
+            {"line": 4, "jobId": 101, "status": "queued"},
+            {"line": 5, "jobId": 200, "status": "queued"},
+            {"summary": {"rows": 5, "queued": 3, "rejected": 2}},
+        ])
+
+    def test_waits_for_the_oldest_batch_before_reading_on(self):
+        queue = FakeQueue()
+        events = []
+
+        def rows():
+            for line in range(1, 7):
+                events.append(f"read {line}")
+                yield line, {"title": str(line)}
+
+        for result in BulkIngestor(validate, queue.submit, batch_size=2, max_in_flight=2).ingest(rows()):
+            if "line" in result:
+                events.append(f"queued {result['line']}")
+
+        self.assertLess(events.index("read 4"), events.index("queued 1"))
+        self.assertLess(events.index("queued 2"), events.index("read 5"))
+        self.assertEqual(len(queue.batches), 3)
+
+    def test_stops_reading_after_a_failed_batch(self):
+        queue = FakeQueue(error=RuntimeError("database is locked"))
+        rows = [(line, {"title": str(line)}) for line in range(1, 6)]
+
+        results = self.ingest(rows, queue)
+
+        self.assertEqual(queue.batches, [["1", "2"]])
+        self.assertEqual(results, [
+            {"line": 1, "error": "Not queued: database is locked"},
+            {"line": 2, "error": "Not queued: database is locked"},
+            {"summary": {"rows": 2, "queued": 0, "rejected": 2, "error": "database is locked"}},
+        ])
+
+    def test_enqueues_rows_read_before_an_input_error(self):
+        queue = FakeQueue()
+
+        def rows():
+            yield 1, {"title": "a"}
+            raise BulkIngestError("Line longer than 10 bytes")
+
+        results = self.ingest(rows(), queue)
+
+        self.assertEqual(queue.batches, [["a"]])
+        self.assertEqual(results, [
+            {"error": "Line longer than 10 bytes"},
+            {"line": 1, "jobId": 100, "status": "queued"},
+            {"summary": {"rows": 1, "queued": 1, "rejected": 0, "error": "Line longer than 10 bytes"}},
+        ])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+from shared.types.ContentCreation import ContentCreationRequest
+from src import content_creation, token_budget
+from src.content_creation import ContentCreator
+from src.services import Scene, VideoContent
+from src.token_budget import TokenBudget, TokenCounter
+
+def make_request(subject):
+    request = MagicMock()
+    request.videoSubject = subject
+    request.dict.return_value = {"videoSubject": subject}
+    return request
+
+class TestProcessBatch(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.stored = []
+
+        async def create_contents(contents, batch_size=None):
+            if any(data["videoSubject"] == "broken" for data in contents):
+                raise RuntimeError("insert failed")
+            self.stored.append([data["videoSubject"] for data in contents])
+            return [{"id": len(self.stored), "videoSubject": data["videoSubject"]} for data in contents]
+
+        for name, value in (
+            ('create_contents', create_contents),
+            ('ProgressTracker', MagicMock()),
+            ('get_section', MagicMock(return_value={'bulk_insert_batch_size': 2, 'batch_concurrency': 1})),
+        ):
+            patcher = patch.object(content_creation, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.creator = ContentCreator("prompt_templates.yaml", max_concurrency=1)
+
+        async def generate_content_data(input_data, progress_tracker=None):
+            return {"videoSubject": input_data.videoSubject}
+
+        self.creator.generate_content_data = generate_content_data
+
+    async def test_entries_are_stored_a_chunk_at_a_time(self):
+        results, stats = await self.creator.process_batch([make_request(f"subject {n}") for n in range(5)])
+
+        self.assertEqual(self.stored, [["subject 0", "subject 1"], ["subject 2", "subject 3"], ["subject 4"]])
+        self.assertEqual([result["videoSubject"] for result in results], [f"subject {n}" for n in range(5)])
+        self.assertEqual((stats["total_entries"], stats["succeeded"], stats["failed"]), (5, 5, 0))
+        self.assertIn("entries_per_minute", stats)
+
+    async def test_failing_chunk_fails_only_its_own_entries(self):
+        subjects = ["subject 0", "subject 1", "broken", "subject 3", "subject 4"]
+
+        results, stats = await self.creator.process_batch([make_request(subject) for subject in subjects])
+
+        self.assertEqual([result.get("error") for result in results], [None, None, "insert failed", "insert failed", None])
+        self.assertEqual([result["index"] for result in results[2:4]], [3, 4])
+        # Entries that failed to store count as failed
+        self.assertEqual((stats["succeeded"], stats["failed"]), (3, 2))
+        self.assertEqual(self.stored, [["subject 0", "subject 1"], ["subject 4"]])
+
+class TestGenerateContentData(unittest.IsolatedAsyncioTestCase):
+    async def test_request_is_rendered_into_the_script_prompt_and_stored_options(self):
+        request = ContentCreationRequest.parse_obj({
+            "title": "Volcanoes",
+            "videoSubject": "Volcanoes",
+            "generalOptions": {"style": "documentary", "description": "Eruptions", "sceneAmount": 2, "duration": 90,
+                               "tone": "calm", "vocabulary": "simple", "targetAudience": "students"},
+            "contentOptions": {"pacing": "slow", "description": "Narrated"},
+            "visualPromptOptions": {"pictureDescription": "Lava", "style": "photo", "imageDetails": "none", "shotDetails": "wide"},
+        })
+        with patch.object(token_budget, 'tiktoken', None):
+            budget = TokenBudget(TokenCounter(), context_window=16385)
+        prompts = []
+
+        async def load_token_budget():
+            return budget
+
+        async def generate_content_with_openai(prompt, estimate=None, on_usage=None):
+            prompts.append(prompt)
+            on_usage({"stage": "script", "promptTokens": 30})
+            return VideoContent(video_title="Volcanoes", description="", main_scenes=[
+                Scene(scene_description="First", visual_prompt="Lava"), Scene(scene_description="Second", visual_prompt="Ash"),
+            ])
+
+        with patch.object(content_creation, 'load_token_budget', load_token_budget), \
+                patch.object(content_creation, 'generate_content_with_openai', generate_content_with_openai):
+            data = await ContentCreator("prompt_templates.yaml").generate_content_data(request)
+
+        prompt, = prompts
+        for line in ("about Volcanoes", "Number of scenes: 2", "Video length: 90 seconds", "Style: documentary", "Target audience: students"):
+            self.assertIn(line, prompt)
+        self.assertEqual(data["generalOptions"]["create"]["sceneAmount"], 2)
+        self.assertEqual(data["visualPromptOptions"]["create"]["style"], "photo")
+        self.assertEqual([row["sceneNumber"] for row in data["visualPrompts"]["create"]], [1, 2])
+        self.assertEqual(data["tokenUsage"]["create"], [{"stage": "script", "promptTokens": 30}])
+        self.assertEqual(json.loads(data["generatedContent"])["video_title"], "Volcanoes")
+
+if __name__ == '__main__':
+    unittest.main()
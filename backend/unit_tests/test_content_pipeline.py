@@ -0,0 +1,224 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+from shared.types.ContentCreation import ContentCreationRequest
+from src import content_pipeline, models, token_budget
+from src.content_pipeline import ContentCreationPipeline
+from src.services import Scene, VideoContent
+from src.token_budget import TokenBudget, TokenCounter
+from unit_tests.fake_prisma import FakePrisma, run_write_directly
+
+def make_request(**general):
+    return ContentCreationRequest.parse_obj({
+        "title": "Volcanoes",
+        "videoSubject": "Volcanoes",
+        "generalOptions": {
+            "style": "documentary",
+            "description": "Eruptions",
+            "sceneAmount": 2,
+            "duration": 60,
+            "tone": "calm",
+            "vocabulary": "simple",
+            "targetAudience": "students",
+            "services": {"generate_image": True, "generate_voice": True, "generate_music": True, "generate_video": True},
+            **general,
+        },
+        "contentOptions": {"pacing": "slow", "description": "Narrated"},
+        "visualPromptOptions": {"pictureDescription": "Lava", "style": "photo", "imageDetails": "none", "shotDetails": "wide"},
+    })
+
+ALL_STAGES = ["script", "image", "voice", "music", "video"]
+
+class PipelineTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.db = FakePrisma()
+        with patch.object(token_budget, 'tiktoken', None):
+            budget = TokenBudget(TokenCounter(), context_window=16385)
+
+        async def load_token_budget():
+            return budget
+
+        for target, name, value in (
+            (content_pipeline, 'prisma', self.db),
+            (content_pipeline, 'load_token_budget', load_token_budget),
+            (models, 'db', self.db),
+            (models, 'run_write', run_write_directly),
+            (models, '_content_inserts', None),
+        ):
+            patcher = patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.pipeline = ContentCreationPipeline("prompt_templates.yaml")
+
+class TestProcessInput(PipelineTestCase):
+    async def test_results_come_with_the_statistics_of_the_run(self):
+        async def create_content(input_data, index, total_entries, progress_tracker):
+            if input_data.videoSubject == "broken":
+                raise RuntimeError("boom")
+            return {"id": index}
+
+        self.pipeline.create_content = create_content
+
+        results, stats = await self.pipeline.process_input([make_request(), ContentCreationRequest(videoSubject="broken")])
+
+        self.assertEqual(results, [{"id": 1}, {"error": "boom", "videoSubject": "broken"}])
+        self.assertEqual((stats["total_entries"], stats["succeeded"], stats["failed"]), (2, 1, 1))
+        self.assertEqual(stats["max_concurrency"], self.pipeline.batch_engine.max_concurrency)
+        self.assertIn("entries_per_minute", stats)
+
+class TestFanOutScenes(PipelineTestCase):
+    async def test_failing_scene_cancels_the_others(self):
+        cancelled = []
+
+        async def generate(scene):
+            if scene == "broken":
+                raise RuntimeError("boom")
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.append(scene)
+                raise
+
+        # A scene started while the script was streaming is cancelled as well
+        streamed = asyncio.ensure_future(generate("streamed"))
+
+        with self.assertRaises(RuntimeError):
+            await asyncio.wait_for(self.pipeline._fan_out_scenes(["streamed", "first", "broken"], generate, {1: streamed}), 1)
+
+        self.assertEqual(sorted(cancelled), ["first", "streamed"])
+
+    async def test_urls_are_returned_in_scene_order(self):
+        async def generate(scene):
+            await asyncio.sleep(0.01 if scene == "first" else 0)
+            return f"{scene}.png"
+
+        urls = await self.pipeline._fan_out_scenes(["first", "second"], generate, {})
+
+        self.assertEqual(urls, ["first.png", "second.png"])
+
+class TestStageFingerprints(PipelineTestCase):
+    async def test_script_follows_the_rendered_prompt(self):
+        before = await self.pipeline.stage_fingerprints(make_request())
+
+        # duration and targetAudience are rendered as video_length and target_audience
+        for changed in (make_request(duration=90), make_request(targetAudience="experts"), make_request(sceneAmount=3)):
+            self.assertNotEqual((await self.pipeline.stage_fingerprints(changed))["script"], before["script"])
+        # The description is not part of the script prompt
+        self.assertEqual((await self.pipeline.stage_fingerprints(make_request(description="Ash")))["script"], before["script"])
+
+class TestPlanRegeneration(PipelineTestCase):
+    async def store_content(self, request, image_urls, voice_urls, **fields):
+        fingerprints = await self.pipeline.stage_fingerprints(request)
+        content = await self.db.content.create(data={
+            "generatedContent": json.dumps({"video_title": "Volcanoes", "description": "", "main_scenes": []}),
+            "stageFingerprints": json.dumps(fingerprints),
+            **fields,
+        })
+        # Stored out of scene order
+        for scene_number in reversed(range(1, len(image_urls) + 1)):
+            await self.db.visualprompt.create(data={"contentId": content.id, "sceneNumber": scene_number, "generatedUrl": image_urls[scene_number - 1]})
+            await self.db.audioprompt.create(data={"contentId": content.id, "sceneNumber": scene_number, "generatedUrl": voice_urls[scene_number - 1]})
+        return content, fingerprints
+
+    async def test_unchanged_stages_reuse_their_stored_urls_in_scene_order(self):
+        request = make_request()
+        content, fingerprints = await self.store_content(
+            request, ["1.jpg", "2.jpg"], ["1.mp3", "2.mp3"], generatedMusic="music.mp3", generatedVideo="video.mp4")
+
+        reused, stored = await self.pipeline.plan_regeneration(content.id, request, fingerprints, ALL_STAGES)
+
+        self.assertEqual(stored, fingerprints)
+        self.assertEqual(reused["image"], ["1.jpg", "2.jpg"])
+        self.assertEqual(reused["voice"], ["1.mp3", "2.mp3"])
+        self.assertEqual((reused["music"], reused["video"]), ("music.mp3", "video.mp4"))
+        self.assertEqual(reused["script"]["content_id"], content.id)
+
+    async def test_stages_with_missing_assets_or_new_inputs_run_again(self):
+        content, _ = await self.store_content(make_request(), ["1.jpg", "2.jpg"], ["1.mp3", None], generatedMusic="music.mp3")
+        request = make_request(style="epic")
+
+        reused, _ = await self.pipeline.plan_regeneration(
+            content.id, request, await self.pipeline.stage_fingerprints(request), ALL_STAGES)
+
+        # The style is rendered into the script prompt, so everything built on it runs again
+        self.assertEqual(list(reused), [])
+
+    async def test_voice_without_every_narration_is_not_reused(self):
+        request = make_request()
+        content, fingerprints = await self.store_content(request, ["1.jpg", "2.jpg"], ["1.mp3", None], generatedMusic="music.mp3")
+
+        reused, _ = await self.pipeline.plan_regeneration(content.id, request, fingerprints, ALL_STAGES)
+
+        self.assertEqual(sorted(reused), ["image", "music", "script"])
+
+    async def test_missing_content_is_an_error(self):
+        with self.assertRaises(ValueError):
+            await self.pipeline.plan_regeneration(99, make_request(), {}, ALL_STAGES)
+
+class TestRegeneration(PipelineTestCase):
+    async def test_reused_script_stores_the_options_of_the_new_request(self):
+        services = {"generate_image": True}
+        old_request = make_request(services=services)
+        script = VideoContent(video_title="Volcanoes", description="", main_scenes=[
+            Scene(scene_description="First", visual_prompt="Lava"), Scene(scene_description="Second", visual_prompt="Ash"),
+        ])
+        content = await self.pipeline.save_to_database(script, old_request)
+        fingerprints = await self.pipeline.stage_fingerprints(old_request)
+        await self.db.content.update(where={"id": content.id}, data={"stageFingerprints": json.dumps(fingerprints)})
+        request = old_request.copy(deep=True)
+        request.visualPromptOptions.style = "painting"
+        generated = []
+
+        async def generate_image(prompt):
+            generated.append(prompt)
+            return f"{prompt}.png"
+
+        with patch.object(content_pipeline, 'generate_image', generate_image), \
+                patch.object(content_pipeline, 'generate_content_with_openai') as generate_content:
+            await self.pipeline.create_content(request, 1, 1, MagicMock(), content_id=content.id)
+
+        generate_content.assert_not_called()
+        self.assertEqual(sorted(generated), ["Ash", "Lava"])
+        stored = await self.db.content.find_unique(where={"id": content.id}, include={"visualPromptOptions": True})
+        self.assertEqual(stored.visualPromptOptions.style, "painting")
+        self.assertEqual(stored.status, "completed")
+        current = await self.pipeline.stage_fingerprints(request)
+        self.assertEqual({name: json.loads(stored.stageFingerprints)[name] for name in ("script", "image")},
+                         {name: current[name] for name in ("script", "image")})
+
+class TestSaveToDatabase(PipelineTestCase):
+    async def test_scripts_saved_at_the_same_time_share_one_transaction(self):
+        scripts = [VideoContent(video_title=title, description="", main_scenes=[Scene(scene_description="First", visual_prompt="Lava")])
+                   for title in ("Volcanoes", "Glaciers")]
+
+        contents = await asyncio.gather(*(self.pipeline.save_to_database(script, make_request()) for script in scripts))
+
+        self.assertEqual([content.title for content in contents], ["Volcanoes", "Glaciers"])
+        self.assertEqual(self.db.transactions, 1)
+        self.assertEqual(sorted(row["contentId"] for row in self.db.visualprompt.rows), [content.id for content in contents])
+
+    async def test_regenerated_script_clears_the_assets_of_the_old_one(self):
+        content = await self.db.content.create(data={
+            "generatedPicture": "old.jpg", "generatedVoice": "old.mp3", "generatedMusic": "music.mp3", "generatedVideo": "old.mp4",
+        })
+        await self.db.visualprompt.create(data={"contentId": content.id, "sceneNumber": 1, "generatedUrl": "old-1.jpg"})
+        await self.db.audioprompt.create(data={"contentId": content.id, "sceneNumber": 1, "generatedUrl": "old-1.mp3"})
+        await self.db.tokenusage.create(data={"contentId": content.id, "stage": "script", "promptTokens": 10})
+        script = VideoContent(video_title="Volcanoes", description="", main_scenes=[
+            Scene(scene_description="First", visual_prompt="Lava"), Scene(scene_description="Second", visual_prompt="Ash"),
+        ])
+
+        await self.pipeline.save_to_database(script, make_request(), [{"stage": "script", "promptTokens": 30}], content_id=content.id)
+
+        stored = await self.db.content.find_unique(where={"id": content.id})
+        self.assertEqual((stored.generatedPicture, stored.generatedVoice, stored.generatedVideo), (None, None, None))
+        # The music does not depend on the script
+        self.assertEqual(stored.generatedMusic, "music.mp3")
+        self.assertEqual([(row["sceneNumber"], row.get("generatedUrl")) for row in self.db.visualprompt.rows], [(1, None), (2, None)])
+        self.assertEqual([(row["sceneNumber"], row.get("generatedUrl")) for row in self.db.audioprompt.rows], [(1, None), (2, None)])
+        self.assertEqual([row["promptTokens"] for row in self.db.tokenusage.rows], [10, 30])
+        self.assertEqual(len(self.db.content.rows), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+import asyncio
+import json
+import threading
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+from src import app as app_module
+from src.job_queue import ContentJobInProgress, IdempotencyKeyMismatch
+from src.progress_events import ProgressBroker
+
+async def run_directly(coroutine):
+    return await coroutine
+
+class ContentsApiTestCase(unittest.TestCase):
+    def setUp(self):
+        self.pages = {}
+        self.calls = []
+
+        async def list_content_summaries(limit, statuses=None, cursor=None):
+            self.calls.append((limit, statuses, cursor))
+            if cursor == "bad":
+                raise ValueError("Invalid cursor: bad")
+            return self.pages[cursor]
+
+        self.progress = []
+        self.usage = []
+
+        async def find_content_progress(content_ids):
+            return self.progress
+
+        async def get_token_usage(content_id):
+            self.calls.append(("token usage", content_id))
+            return self.usage
+
+        for name, value in (
+            ('find_content_progress', find_content_progress),
+            ('get_token_usage', get_token_usage),
+            ('connect_on_startup', MagicMock()),
+            ('atexit', MagicMock()),
+            ('run_on_database_loop', run_directly),
+            ('list_content_summaries', list_content_summaries),
+        ):
+            patcher = patch.object(app_module, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = app_module.create_app('testing').test_client()
+
+class TestListContents(ContentsApiTestCase):
+    def test_pages_follow_the_returned_cursor(self):
+        self.pages = {None: ([{"id": 3}, {"id": 2}], "next"), "next": ([{"id": 1}], None)}
+
+        first = self.client.get('/api/contents?limit=2&status=completed,failed')
+        second = self.client.get(f"/api/contents?limit=2&cursor={first.json['nextCursor']}")
+
+        self.assertEqual(first.json, {"items": [{"id": 3}, {"id": 2}], "nextCursor": "next"})
+        self.assertEqual(second.json, {"items": [{"id": 1}], "nextCursor": None})
+        self.assertEqual(self.calls, [(2, ["completed", "failed"], None), (2, [], "next")])
+
+    def test_malformed_cursor_is_a_bad_request(self):
+        response = self.client.get('/api/contents?cursor=bad')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json, {"error": "Invalid cursor: bad"})
+
+    def test_unchanged_page_is_not_modified(self):
+        self.pages = {None: ([{"id": 1, "status": "processing"}], None)}
+
+        first = self.client.get('/api/contents')
+        etag = first.headers['ETag']
+        unchanged = self.client.get('/api/contents', headers={'If-None-Match': etag})
+        self.pages = {None: ([{"id": 1, "status": "completed"}], None)}
+        changed = self.client.get('/api/contents', headers={'If-None-Match': etag})
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.headers['Cache-Control'], 'no-cache')
+        self.assertEqual((unchanged.status_code, unchanged.data), (304, b''))
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers['ETag'], etag)
+
+class TestContentTokenUsage(ContentsApiTestCase):
+    def test_entries_are_returned_with_their_totals(self):
+        self.progress = [{"id": 7}]
+        self.usage = [
+            {"stage": "script", "model": "gpt-4o", "calls": 2, "cachedCalls": 1, "promptTokens": 100,
+             "completionTokens": 300, "estimatedPromptTokens": 110, "estimatedCompletionTokens": 350},
+            {"stage": "image", "model": "dall-e-3", "calls": 1, "cachedCalls": 0, "promptTokens": None,
+             "completionTokens": None, "estimatedPromptTokens": 20, "estimatedCompletionTokens": 0},
+        ]
+
+        response = self.client.get('/api/contents/7/token-usage')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["contentId"], 7)
+        self.assertEqual(response.json["entries"], self.usage)
+        self.assertEqual(response.json["totals"], {
+            "promptTokens": 100, "completionTokens": 300, "estimatedPromptTokens": 130, "estimatedCompletionTokens": 350,
+        })
+        self.assertEqual(self.calls, [("token usage", 7)])
+
+    def test_missing_content_is_not_found(self):
+        response = self.client.get('/api/contents/8/token-usage')
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.calls, [])
+
+class TestCreateContent(unittest.TestCase):
+    def test_key_reused_with_another_request_is_unprocessable(self):
+        queue = MagicMock()
+        queue.enqueue = AsyncMock(side_effect=IdempotencyKeyMismatch("key-1"))
+        with patch.object(app_module, 'connect_on_startup'), patch.object(app_module, 'atexit'), \
+                patch.object(app_module, 'run_on_database_loop', run_directly), \
+                patch.object(app_module, 'ContentCreationRequest'), \
+                patch.object(app_module, 'JobQueue', return_value=queue):
+            client = app_module.create_app('testing').test_client()
+            response = client.post('/api/create-content', json={"videoSubject": "Glaciers"}, headers={'Idempotency-Key': 'key-1'})
+
+        self.assertEqual(response.status_code, 422)
+        self.assertIn("key-1", response.json["error"])
+        self.assertEqual(queue.enqueue.await_args.args[1], ["key-1"])
+
+class TestRegenerateContent(unittest.TestCase):
+    def test_content_with_a_job_in_flight_is_a_conflict(self):
+        queue = MagicMock()
+        queue.enqueue_regeneration = AsyncMock(side_effect=ContentJobInProgress(5, 9))
+        with patch.object(app_module, 'connect_on_startup'), patch.object(app_module, 'atexit'), \
+                patch.object(app_module, 'run_on_database_loop', run_directly), \
+                patch.object(app_module, 'ContentCreationRequest'), \
+                patch.object(app_module, 'JobQueue', return_value=queue):
+            client = app_module.create_app('testing').test_client()
+            response = client.post('/api/contents/5/regenerate', json={"videoSubject": "Glaciers"})
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json["jobId"], 9)
+
+class TestStreamContentProgress(unittest.TestCase):
+    def setUp(self):
+        # fetch_progress runs its query on the database loop from the request thread
+        self.loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        thread.start()
+        self.addCleanup(lambda: (self.loop.call_soon_threadsafe(self.loop.stop), thread.join(1), self.loop.close()))
+
+    def test_pushed_events_follow_the_stored_state(self):
+        broker = ProgressBroker()
+        channel = MagicMock()
+        # A worker pushes its next event once the stream is open
+        channel.start.side_effect = lambda target: threading.Timer(
+            0.1, target.publish, (5, {"contentId": 5, "status": "completed", "progress": 100})).start()
+        updated_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+        async def find_content_progress(content_ids):
+            return [{"id": 5, "status": "processing", "progress": 40, "currentStep": "images generated", "updatedAt": updated_at}]
+
+        with patch.object(app_module, 'connect_on_startup'), patch.object(app_module, 'atexit'), \
+                patch.object(app_module, 'get_database_loop', return_value=self.loop), \
+                patch.object(app_module, 'find_content_progress', find_content_progress), \
+                patch.object(app_module, 'get_progress_channel', return_value=channel), \
+                patch.object(app_module, 'progress_broker', broker), \
+                patch.object(app_module, 'ProgressFeed') as feed:
+            client = app_module.create_app('testing').test_client()
+            body = client.get('/api/content-progress/5/stream').get_data(as_text=True)
+
+        events = [json.loads(line[len("data: "):]) for line in body.splitlines() if line.startswith("data: ")]
+        self.assertEqual([(event["status"], event["progress"]) for event in events], [("processing", 40), ("completed", 100)])
+        # The stored state is only read once, to start the stream
+        feed.return_value.start.assert_not_called()
+        channel.start.assert_called_once_with(broker)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import asyncio
+import unittest
+import os
+import sys
+
+# Add the src directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(os.path.dirname(current_dir), 'src')
+sys.path.insert(0, src_dir)
+
+from database_writer import DatabaseWriter
+
+class TestDatabaseWriter(unittest.IsolatedAsyncioTestCase):
+    async def test_runs_writes_one_at_a_time_in_order(self):
+        writer = DatabaseWriter()
+        running = 0
+        max_running = 0
+        order = []
+
+        def write(number):
+            async def operation():
+                nonlocal running, max_running
+                running += 1
+                max_running = max(max_running, running)
+                await asyncio.sleep(0.01)
+                order.append(number)
+                running -= 1
+                return number * 10
+            return operation
+
+        results = await asyncio.gather(*(writer.submit(write(number)) for number in range(5)))
+
+        self.assertEqual(results, [0, 10, 20, 30, 40])
+        self.assertEqual(order, [0, 1, 2, 3, 4])
+        self.assertEqual(max_running, 1)
+        self.assertEqual(writer.writes, 5)
+        await writer.close()
+
+    async def test_failed_write_raises_and_writer_continues(self):
+        writer = DatabaseWriter()
+
+        async def failing():
+            raise RuntimeError("database is locked")
+
+        async def succeeding():
+            return "ok"
+
+        with self.assertRaises(RuntimeError):
+            await writer.submit(failing)
+        self.assertEqual(await writer.submit(succeeding), "ok")
+        await writer.close()
+
+    async def test_close_finishes_queued_writes(self):
+        writer = DatabaseWriter()
+        done = []
+
+        async def operation():
+            await asyncio.sleep(0.01)
+            done.append(True)
+
+        pending = [asyncio.ensure_future(writer.submit(operation)) for _ in range(3)]
+        await asyncio.sleep(0)
+        await writer.close()
+
+        self.assertEqual(len(done), 3)
+        await asyncio.gather(*pending)
+
+    async def test_stopped_writer_cancels_the_writes_it_holds(self):
+        writer = DatabaseWriter()
+        started = asyncio.Event()
+
+        async def blocking():
+            started.set()
+            await asyncio.Event().wait()
+
+        running = asyncio.ensure_future(writer.submit(blocking))
+        queued = asyncio.ensure_future(writer.submit(blocking))
+        await started.wait()
+        writer._task.cancel()
+
+        # Neither caller is left waiting on a writer that is gone
+        results = await asyncio.wait_for(asyncio.gather(running, queued, return_exceptions=True), timeout=1)
+        self.assertTrue(all(isinstance(result, asyncio.CancelledError) for result in results))
+        self.assertEqual(writer.pending(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import asyncio
+import unittest
+import os
+import sys
+
+# Add the src directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(os.path.dirname(current_dir), 'src')
+sys.path.insert(0, src_dir)
+
+from insert_batcher import InsertBatcher
+
+class TestInsertBatcher(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.inserts = []
+
+        async def insert_many(items):
+            await asyncio.sleep(0)
+            if "broken" in items:
+                raise RuntimeError("insert failed")
+            self.inserts.append(list(items))
+            return [f"row {item}" for item in items]
+
+        self.batcher = InsertBatcher(insert_many, max_batch_size=3, window_ms=20)
+
+    async def test_concurrent_inserts_share_one_bulk_insert(self):
+        rows = await asyncio.gather(*(self.batcher.insert(item) for item in ("a", "b")))
+
+        self.assertEqual(rows, ["row a", "row b"])
+        self.assertEqual(self.inserts, [["a", "b"]])
+        self.assertEqual(self.batcher.get_stats()["items_per_batch"], 2)
+
+    async def test_full_batch_is_written_without_waiting(self):
+        self.batcher.window = 60
+
+        rows = await asyncio.wait_for(asyncio.gather(*(self.batcher.insert(item) for item in ("a", "b", "c"))), 1)
+
+        self.assertEqual(rows, ["row a", "row b", "row c"])
+        self.assertEqual(self.inserts, [["a", "b", "c"]])
+
+    async def test_failed_bulk_insert_fails_only_the_broken_item(self):
+        results = await asyncio.gather(*(self.batcher.insert(item) for item in ("a", "broken", "c")), return_exceptions=True)
+
+        self.assertEqual(results[0], "row a")
+        self.assertIsInstance(results[1], RuntimeError)
+        self.assertEqual(results[2], "row c")
+        self.assertEqual(self.inserts, [["a"], ["c"]])
+        self.assertEqual(self.batcher.get_stats()["fallbacks"], 1)
+
+    async def test_cancelled_insert_is_left_out_of_its_batch(self):
+        cancelled = asyncio.ensure_future(self.batcher.insert("a"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+
+        self.assertEqual(await self.batcher.insert("b"), "row b")
+        self.assertEqual(self.inserts, [["b"]])
+
+if __name__ == '__main__':
+    unittest.main()
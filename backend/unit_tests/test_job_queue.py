@@ -0,0 +1,219 @@
+import asyncio
+import json
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+from prisma.errors import UniqueViolationError
+from src import job_queue
+from src.job_queue import ContentJobInProgress, IdempotencyKeyMismatch, JobQueue
+from unit_tests.fake_prisma import FakePrisma, run_write_directly
+
+class Request:
+    """
+    Stand-in for a validated ContentCreationRequest.
+    """
+    def __init__(self, subject):
+        self.subject = subject
+
+    def dict(self):
+        return {"videoSubject": self.subject}
+
+    def json(self):
+        return json.dumps(self.dict())
+
+class JobQueueTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.db = FakePrisma()
+        for name, value in (('prisma', self.db), ('run_write', run_write_directly)):
+            patcher = patch.object(job_queue, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.queue = JobQueue(lease_seconds=60, max_attempts=2)
+
+    async def add_job(self, **fields):
+        return await self.db.job.create(data={"payload": "{}", **fields})
+
+    def expire_lease(self, job_id):
+        row = next(row for row in self.db.job.rows if row["id"] == job_id)
+        row["leaseExpiresAt"] = datetime.now(timezone.utc) - timedelta(seconds=1)
+
+class TestEnqueue(JobQueueTestCase):
+    async def test_reused_key_returns_the_job_of_its_first_request(self):
+        first, = await self.queue.enqueue([Request("Volcanoes")], ["key-1"])
+        await self.db.job.update_many(where={"id": first["jobId"]}, data={"status": "completed"})
+
+        again, = await self.queue.enqueue([Request("Volcanoes")], ["key-1"])
+
+        self.assertEqual(again, {"jobId": first["jobId"], "status": "completed", "deduplicated": True})
+        self.assertEqual(len(self.db.job.rows), 1)
+
+    async def test_reused_key_with_another_request_is_rejected(self):
+        await self.queue.enqueue([Request("Volcanoes")], ["key-1"])
+
+        with self.assertRaises(IdempotencyKeyMismatch):
+            await self.queue.enqueue([Request("Glaciers"), Request("Deserts")], ["key-2", "key-1"])
+
+        # Nothing of the rejected call is enqueued
+        self.assertEqual([row["idempotencyKey"] for row in self.db.job.rows], ["key-1"])
+
+    async def test_new_key_creates_a_job_even_for_a_request_in_flight(self):
+        first, = await self.queue.enqueue([Request("Volcanoes")])
+        keyed, = await self.queue.enqueue([Request("Volcanoes")], ["key-1"])
+
+        self.assertNotEqual(keyed["jobId"], first["jobId"])
+        self.assertFalse(keyed["deduplicated"])
+
+    async def test_unkeyed_request_joins_an_identical_job_in_flight(self):
+        results = await self.queue.enqueue([Request("Volcanoes"), Request("Volcanoes"), Request("Glaciers")])
+        again, = await self.queue.enqueue([Request("Volcanoes")])
+
+        self.assertEqual([result["deduplicated"] for result in results], [False, True, False])
+        self.assertEqual(results[1]["jobId"], results[0]["jobId"])
+        self.assertEqual(again["jobId"], results[0]["jobId"])
+
+        await self.db.job.update_many(where={"id": results[0]["jobId"]}, data={"status": "completed"})
+        after, = await self.queue.enqueue([Request("Volcanoes")])
+        self.assertFalse(after["deduplicated"])
+
+    async def test_key_stored_concurrently_is_retried_and_returns_that_job(self):
+        other = await self.add_job(status="running", idempotencyKey="key-1", requestHash=job_queue.request_hash(Request("Volcanoes").dict()))
+        find_many = self.db.job.find_many
+        lookups = 0
+
+        async def find_many_before_the_other_commit(**kwargs):
+            nonlocal lookups
+            lookups += 1
+            # The first lookup of the key runs before another process commits it
+            return [] if lookups == 1 else await find_many(**kwargs)
+
+        with patch.object(self.db.job, 'find_many', find_many_before_the_other_commit):
+            result, = await self.queue.enqueue([Request("Volcanoes")], ["key-1"])
+
+        self.assertEqual(result, {"jobId": other.id, "status": "running", "deduplicated": True})
+        self.assertEqual(len(self.db.job.rows), 1)
+
+class TestEnqueueRegeneration(JobQueueTestCase):
+    async def test_content_with_a_job_in_flight_is_not_regenerated_again(self):
+        content = await self.db.content.create(data={"status": "processing"})
+        for status in ("queued", "running"):
+            job = await self.add_job(status=status, contentId=content.id)
+
+            with self.assertRaises(ContentJobInProgress) as raised:
+                await self.queue.enqueue_regeneration(content.id, Request("Glaciers"))
+
+            self.assertEqual(raised.exception.job_id, job.id)
+            await self.db.job.update_many(where={"id": job.id}, data={"status": "completed"})
+        self.assertEqual(len(self.db.job.rows), 2)
+        self.assertEqual((await self.db.content.find_unique(where={"id": content.id})).status, "processing")
+
+    async def test_content_without_a_job_in_flight_is_regenerated(self):
+        content = await self.db.content.create(data={"status": "completed"})
+        await self.add_job(status="completed", contentId=content.id)
+
+        result = await self.queue.enqueue_regeneration(content.id, Request("Glaciers"))
+
+        self.assertEqual(result, {"jobId": 2, "status": "queued", "contentId": content.id})
+        self.assertEqual((await self.db.content.find_unique(where={"id": content.id})).status, "pending")
+
+    async def test_missing_content_is_not_regenerated(self):
+        self.assertIsNone(await self.queue.enqueue_regeneration(99, Request("Glaciers")))
+        self.assertEqual(self.db.job.rows, [])
+
+class TestClaim(JobQueueTestCase):
+    async def test_racing_workers_cannot_both_claim_a_job(self):
+        job = await self.add_job()
+
+        claims = await asyncio.gather(self.queue.claim("worker-a"), self.queue.claim("worker-b"))
+
+        winners = [claim for claim in claims if claim is not None]
+        self.assertEqual(len(winners), 1)
+        self.assertEqual(winners[0].id, job.id)
+        stored = await self.db.job.find_unique(where={"id": job.id})
+        self.assertEqual((stored.status, stored.attempts, stored.leaseOwner), ("running", 1, winners[0].leaseOwner))
+
+    async def test_racing_workers_take_different_jobs(self):
+        first, second = await self.add_job(), await self.add_job()
+
+        claims = await asyncio.gather(self.queue.claim("worker-a"), self.queue.claim("worker-b"))
+
+        self.assertEqual(sorted(claim.id for claim in claims), [first.id, second.id])
+
+    async def test_running_job_with_a_live_lease_is_not_claimed(self):
+        await self.add_job()
+        self.assertIsNotNone(await self.queue.claim("worker-a"))
+        self.assertIsNone(await self.queue.claim("worker-b"))
+
+    async def test_job_with_an_expired_lease_is_claimed_again(self):
+        job = await self.add_job()
+        await self.queue.claim("worker-a")
+        self.expire_lease(job.id)
+
+        reclaimed = await self.queue.claim("worker-b")
+
+        self.assertEqual((reclaimed.id, reclaimed.leaseOwner, reclaimed.attempts), (job.id, "worker-b", 2))
+        self.assertFalse(await self.queue.heartbeat(job.id, "worker-a"))
+        self.assertTrue(await self.queue.heartbeat(job.id, "worker-b"))
+
+    async def test_expired_lease_at_max_attempts_fails_the_job(self):
+        job = await self.add_job(status="running", attempts=2, leaseOwner="worker-a")
+        self.expire_lease(job.id)
+
+        self.assertIsNone(await self.queue.claim("worker-b"))
+
+        stored = await self.db.job.find_unique(where={"id": job.id})
+        self.assertEqual(stored.status, "failed")
+        self.assertEqual(stored.error, "Lease expired too many times")
+
+    async def test_expired_lease_at_max_attempts_fails_the_content(self):
+        content = await self.db.content.create(data={"status": "processing"})
+        job = await self.add_job(status="running", attempts=2, leaseOwner="worker-a", contentId=content.id)
+        self.expire_lease(job.id)
+
+        self.assertIsNone(await self.queue.claim("worker-b"))
+
+        stored = await self.db.content.find_unique(where={"id": content.id})
+        self.assertEqual((stored.status, stored.currentStep), ("failed", "Failed: Lease expired too many times"))
+
+class TestFail(JobQueueTestCase):
+    async def test_failed_job_is_requeued_until_max_attempts(self):
+        job = await self.add_job()
+
+        claimed = await self.queue.claim("worker-a")
+        await self.queue.fail(job.id, "worker-a", "boom", claimed.attempts)
+        stored = await self.db.job.find_unique(where={"id": job.id})
+        self.assertEqual((stored.status, stored.leaseOwner, stored.error), ("queued", None, "boom"))
+
+        claimed = await self.queue.claim("worker-b")
+        await self.queue.fail(job.id, "worker-b", "boom again", claimed.attempts)
+        stored = await self.db.job.find_unique(where={"id": job.id})
+        self.assertEqual((stored.status, stored.attempts, stored.error), ("failed", 2, "boom again"))
+        self.assertIsNone(await self.queue.claim("worker-c"))
+
+class TestOwnership(JobQueueTestCase):
+    async def test_checkpoint_from_a_stale_worker_is_rejected(self):
+        job = await self.add_job()
+        await self.queue.claim("worker-a")
+        self.expire_lease(job.id)
+        await self.queue.claim("worker-b")
+
+        self.assertFalse(await self.queue.save_checkpoint(job.id, "worker-a", "script", {"script": {"content_id": 1}}, 1))
+        stored = await self.db.job.find_unique(where={"id": job.id})
+        self.assertIsNone(stored.checkpoint)
+
+        self.assertTrue(await self.queue.save_checkpoint(job.id, "worker-b", "script", {"script": {"content_id": 2}}, 2))
+        stored = await self.db.job.find_unique(where={"id": job.id})
+        self.assertEqual((stored.lastCompletedStage, stored.contentId), ("script", 2))
+
+    async def test_only_the_owner_completes_a_job(self):
+        job = await self.add_job()
+        await self.queue.claim("worker-a")
+
+        await self.queue.complete(job.id, "worker-b", 7)
+        self.assertEqual((await self.db.job.find_unique(where={"id": job.id})).status, "running")
+
+        await self.queue.complete(job.id, "worker-a", 7)
+        stored = await self.db.job.find_unique(where={"id": job.id})
+        self.assertEqual((stored.status, stored.contentId, stored.leaseOwner), ("completed", 7, None))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from unittest.mock import patch
+import os
+import sys
+
+# Add the src directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(os.path.dirname(current_dir), 'src')
+sys.path.insert(0, src_dir)
+
+from llm_cache import LLMResponseCache
+
+class TestLLMResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = LLMResponseCache(':memory:', ttl_seconds=60, max_entries=2)
+
+    def test_key_depends_on_request_parameters(self):
+        key = LLMResponseCache.make_key("prompt", "gpt-4o", 0.7, {"type": "json_object"})
+        self.assertEqual(key, LLMResponseCache.make_key("prompt", "gpt-4o", 0.7, {"type": "json_object"}))
+        self.assertNotEqual(key, LLMResponseCache.make_key("prompt", "gpt-4o", 0.2, {"type": "json_object"}))
+        self.assertNotEqual(key, LLMResponseCache.make_key("other prompt", "gpt-4o", 0.7, {"type": "json_object"}))
+
+    def test_hit_and_miss_counters(self):
+        self.assertIsNone(self.cache.get("a"))
+        self.cache.set("a", '{"video_title": "A"}')
+        self.assertEqual(self.cache.get("a"), '{"video_title": "A"}')
+        self.assertEqual(self.cache.get_stats()["hits"], 1)
+        self.assertEqual(self.cache.get_stats()["misses"], 1)
+
+    def test_expired_entries_are_misses(self):
+        with patch('llm_cache.time.time', return_value=1000):
+            self.cache.set("a", "value")
+        with patch('llm_cache.time.time', return_value=1061):
+            self.assertIsNone(self.cache.get("a"))
+
+    def test_evicts_least_recently_used(self):
+        with patch('llm_cache.time.time', return_value=1):
+            self.cache.set("a", "1")
+        with patch('llm_cache.time.time', return_value=2):
+            self.cache.set("b", "2")
+        with patch('llm_cache.time.time', return_value=3):
+            self.cache.get("a")
+        with patch('llm_cache.time.time', return_value=4):
+            self.cache.set("c", "3")
+
+        with patch('llm_cache.time.time', return_value=5):
+            self.assertIsNone(self.cache.get("b"))
+            self.assertEqual(self.cache.get("a"), "1")
+            self.assertEqual(self.cache.get("c"), "3")
+        self.assertEqual(self.cache.get_stats()["evictions"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,192 @@
+import sqlite3
+import unittest
+from unittest.mock import patch
+from src import models
+from src.models import create_contents, decode_content_cursor, list_content_summaries, replace_content
+from unit_tests.fake_prisma import FakePrisma, run_write_directly
+
+def content_data(title, scenes=2):
+    return {
+        "title": title,
+        "videoSubject": title,
+        "generalOptions": {"create": {"style": "documentary"}},
+        "scenes": {"create": [{"type": "main", "description": f"{title} scene {n}"} for n in range(1, scenes + 1)]},
+        "musicPrompt": {"create": {"description": f"{title} music"}},
+        "tokenUsage": {"create": [{"stage": "script", "promptTokens": 10, "completionTokens": 20}]},
+    }
+
+class ModelsTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.db = FakePrisma()
+        for name, value in (('db', self.db), ('run_write', run_write_directly)):
+            patcher = patch.object(models, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+class TestCreateContents(ModelsTestCase):
+    async def test_child_rows_are_fanned_out_to_their_content(self):
+        first, second = await create_contents([content_data("First", scenes=2), content_data("Second", scenes=3)])
+
+        self.assertEqual((first.title, second.title), ("First", "Second"))
+        scenes = [(row["contentId"], row["description"]) for row in self.db.scene.rows]
+        self.assertEqual(scenes, [(first.id, "First scene 1"), (first.id, "First scene 2"),
+                                  (second.id, "Second scene 1"), (second.id, "Second scene 2"), (second.id, "Second scene 3")])
+        # A single nested create becomes one row as well
+        self.assertEqual([row["contentId"] for row in self.db.musicprompt.rows], [first.id, second.id])
+        self.assertEqual([row["contentId"] for row in self.db.generaloptions.rows], [first.id, second.id])
+        self.assertEqual([row["contentId"] for row in self.db.tokenusage.rows], [first.id, second.id])
+        # Relations left out of the data get no rows
+        self.assertEqual(self.db.audioprompt.rows, [])
+
+    async def test_children_are_inserted_with_one_create_many_per_table(self):
+        await create_contents([content_data(f"Content {n}") for n in range(3)])
+
+        self.assertEqual(self.db.transactions, 1)
+        bulk_inserts = [table for table, operation in self.db.calls if operation == "create_many"]
+        self.assertEqual(sorted(bulk_inserts), ["generaloptions", "musicprompt", "scene", "tokenusage"])
+
+    async def test_contents_are_stored_in_chunks_of_batch_size(self):
+        contents = await create_contents([content_data(f"Content {n}") for n in range(5)], batch_size=2)
+
+        self.assertEqual([content.title for content in contents], [f"Content {n}" for n in range(5)])
+        self.assertEqual(self.db.transactions, 3)
+        self.assertEqual(len(self.db.scene.rows), 10)
+
+    async def test_failing_chunk_rolls_back_only_its_own_contents(self):
+        create_many = self.db.scene.create_many
+        calls = 0
+
+        async def failing_second_create_many(data):
+            nonlocal calls
+            calls += 1
+            if calls == 2:
+                raise RuntimeError("disk full")
+            return await create_many(data)
+
+        with patch.object(self.db.scene, 'create_many', failing_second_create_many):
+            with self.assertRaises(RuntimeError):
+                await create_contents([content_data(f"Content {n}") for n in range(4)], batch_size=2)
+
+        self.assertEqual([row["title"] for row in self.db.content.rows], ["Content 0", "Content 1"])
+        self.assertEqual(len(self.db.scene.rows), 4)
+
+class TestTokenUsageLedger(ModelsTestCase):
+    def usage(self, content_id):
+        return [(row["stage"], row["promptTokens"]) for row in self.db.tokenusage.rows if row["contentId"] == content_id]
+
+    async def test_created_contents_store_their_token_usage(self):
+        first, second = await create_contents([content_data("First"), content_data("Second")])
+
+        self.assertEqual(self.usage(first.id), [("script", 10)])
+        self.assertEqual(self.usage(second.id), [("script", 10)])
+
+    async def test_replacing_a_content_appends_to_its_ledger(self):
+        content, = await create_contents([content_data("First")])
+
+        await replace_content(content.id, {
+            "title": "Again",
+            "tokenUsage": {"create": [{"stage": "script", "promptTokens": 30, "completionTokens": 40}]},
+        })
+        await replace_content(content.id, {"title": "Without usage"})
+
+        self.assertEqual(self.usage(content.id), [("script", 10), ("script", 30)])
+
+class SQLiteContents:
+    """
+    Content table in an in-memory SQLite database, read through query_raw like the Prisma client.
+    """
+    def __init__(self, created_at):
+        self.connection = sqlite3.connect(":memory:")
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute(
+            'CREATE TABLE "Content" ("id" INTEGER PRIMARY KEY, "title" TEXT, "videoSubject" TEXT, "status" TEXT, '
+            '"progress" REAL, "currentStep" TEXT, "generatedPicture" TEXT, "generatedVideo" TEXT, '
+            '"createdAt" DATETIME, "updatedAt" DATETIME)'
+        )
+        self.created_at = created_at
+
+    def add(self, content_id, second, status="completed"):
+        self.connection.execute(
+            'INSERT INTO "Content" ("id", "title", "status", "createdAt") VALUES (?, ?, ?, ?)',
+            (content_id, f"Content {content_id}", status, self.created_at(second)),
+        )
+
+    def delete(self, content_id):
+        self.connection.execute('DELETE FROM "Content" WHERE "id" = ?', (content_id,))
+
+    async def query_raw(self, query, *params):
+        return [dict(row) for row in self.connection.execute(query, params)]
+
+# createdAt as stored by the engine, in milliseconds, and as ISO text
+CREATED_AT_FORMATS = {
+    "milliseconds": lambda second: 1_700_000_000_000 + second * 1000,
+    "text": lambda second: f"2026-10-18T10:00:{second:02d}.000+00:00",
+}
+
+class TestListContentSummaries(unittest.IsolatedAsyncioTestCase):
+    async def list_all(self, contents, limit, **kwargs):
+        pages, cursor = [], None
+        with patch.object(models, 'db', contents):
+            while True:
+                rows, cursor = await list_content_summaries(limit, cursor=cursor, **kwargs)
+                pages.append([row["id"] for row in rows])
+                if cursor is None:
+                    return pages
+
+    async def test_pages_are_newest_first_and_ties_break_on_id(self):
+        for name, created_at in CREATED_AT_FORMATS.items():
+            with self.subTest(name):
+                contents = SQLiteContents(created_at)
+                for content_id, second in ((1, 1), (2, 2), (3, 2), (4, 3), (5, 4)):
+                    contents.add(content_id, second)
+
+                self.assertEqual(await self.list_all(contents, 2), [[5, 4], [3, 2], [1]])
+
+    async def test_page_goes_on_after_its_last_content_is_deleted(self):
+        for name, created_at in CREATED_AT_FORMATS.items():
+            with self.subTest(name):
+                contents = SQLiteContents(created_at)
+                for content_id in range(1, 6):
+                    contents.add(content_id, content_id)
+                with patch.object(models, 'db', contents):
+                    first, cursor = await list_content_summaries(2)
+                    contents.delete(4)
+                    second, _ = await list_content_summaries(2, cursor=cursor)
+
+                self.assertEqual([row["id"] for row in first], [5, 4])
+                self.assertEqual([row["id"] for row in second], [3, 2])
+
+    async def test_statuses_filter_every_page(self):
+        contents = SQLiteContents(CREATED_AT_FORMATS["milliseconds"])
+        for content_id in range(1, 6):
+            contents.add(content_id, content_id, status="failed" if content_id % 2 else "completed")
+
+        self.assertEqual(await self.list_all(contents, 1, statuses=["completed"]), [[4], [2]])
+
+    async def test_last_page_has_no_cursor_and_rows_hold_only_summary_columns(self):
+        contents = SQLiteContents(CREATED_AT_FORMATS["milliseconds"])
+        contents.add(1, 1)
+        with patch.object(models, 'db', contents):
+            rows, cursor = await list_content_summaries(1)
+
+        self.assertIsNone(cursor)
+        self.assertEqual(set(rows[0]), set(models.CONTENT_SUMMARY_COLUMNS))
+
+    def test_malformed_cursors_are_rejected(self):
+        for cursor in ("12", "not base64!", "WzEsMl0"):
+            with self.subTest(cursor), self.assertRaises(ValueError):
+                decode_content_cursor(cursor)
+
+class TestGetContentCache(unittest.TestCase):
+    def build(self, settings):
+        with patch.object(models, '_content_cache', None), \
+                patch.object(models, 'get_section', return_value=settings):
+            return models.get_content_cache()
+
+    def test_memory_entries_expire_since_workers_cannot_invalidate_them(self):
+        self.assertEqual(self.build({'backend': 'memory'}).ttl_seconds, 30)
+        self.assertEqual(self.build({'backend': 'memory', 'memory_ttl_seconds': 5, 'ttl_seconds': 60}).ttl_seconds, 5)
+        self.assertEqual(self.build({'backend': 'memory', 'ttl_seconds': 2}).ttl_seconds, 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,49 +1,117 @@
+import asyncio
+import threading
 import unittest
-from unittest.mock import patch, MagicMock
-from services import OpenAIService, generate_content_with_openai
-import json
+from unittest.mock import AsyncMock, MagicMock, patch
+from src import services
+from src.rate_limiter import RateLimiterRegistry
+from src.services import generate_content_with_openai, get_rate_limiters, load_token_budget
+from src.token_budget import TokenEstimate
 
-class TestOpenAIService(unittest.TestCase):
+SCRIPT = '{"video_title": "Test", "description": "This is a test", "main_scenes": []}'
 
+class TestGenerateContentWithOpenAI(unittest.IsolatedAsyncioTestCase):
     def setUp(self):
-        self.service = OpenAIService()
+        limiter = MagicMock()
+        limiter.limit.return_value.__aenter__ = AsyncMock()
+        limiter.limit.return_value.__aexit__ = AsyncMock(return_value=False)
+        patcher = patch.object(services, 'get_rate_limiters', return_value=MagicMock(get=MagicMock(return_value=limiter)))
+        patcher.start()
+        self.addCleanup(patcher.stop)
 
-    @patch('services.client.chat.completions.create')
-    def test_generate_content_success(self, mock_create):
+    @patch.object(services, 'create_chat_completion', new_callable=AsyncMock)
+    async def test_generate_content_success(self, mock_create):
         mock_response = MagicMock()
-        mock_response.choices[0].message.content = '{"title": "Test", "description": "This is a test"}'
+        mock_response.choices[0].message.content = SCRIPT
         mock_create.return_value = mock_response
 
-        result = self.service.generate_content("Test prompt")
-        
-        self.assertEqual(result, {"title": "Test", "description": "This is a test"})
-        mock_create.assert_called_once()
+        result = await generate_content_with_openai("Test prompt", use_cache=False, estimate=TokenEstimate(10, 100))
 
-    @patch('services.client.chat.completions.create')
-    def test_generate_content_non_json(self, mock_create):
+        self.assertEqual(result.video_title, "Test")
+        mock_create.assert_awaited_once()
+
+    @patch.object(services, 'create_chat_completion', new_callable=AsyncMock)
+    async def test_generate_content_non_json(self, mock_create):
         mock_response = MagicMock()
         mock_response.choices[0].message.content = 'This is not JSON'
         mock_create.return_value = mock_response
 
-        result = self.service.generate_content("Test prompt")
-        
-        self.assertEqual(result, {"raw_content": "This is not JSON"})
+        with self.assertRaises(Exception):
+            await generate_content_with_openai("Test prompt", use_cache=False, estimate=TokenEstimate(10, 100))
 
-    @patch('services.client.chat.completions.create')
-    def test_generate_content_api_error(self, mock_create):
+    @patch.object(services, 'create_chat_completion', new_callable=AsyncMock)
+    async def test_generate_content_api_error(self, mock_create):
         mock_create.side_effect = Exception("API Error")
 
         with self.assertRaises(Exception):
-            self.service.generate_content("Test prompt")
+            await generate_content_with_openai("Test prompt", use_cache=False, estimate=TokenEstimate(10, 100))
+
+class RateLimitError(Exception):
+    status_code = 429
+
+class TestRateLimitedScriptCalls(unittest.IsolatedAsyncioTestCase):
+    @patch.object(services, 'RATE_LIMIT_BACKOFF_SECONDS', 0)
+    @patch.object(services, 'create_chat_completion', new_callable=AsyncMock)
+    async def test_429_is_retried_through_the_limiter(self, mock_create):
+        registry = RateLimiterRegistry({'openai': {'requests_per_minute': 600, 'max_concurrency': 4}})
+        mock_response = MagicMock()
+        mock_response.choices[0].message.content = SCRIPT
+        mock_response.usage = None
+        mock_create.side_effect = [RateLimitError("Too Many Requests"), mock_response]
+
+        with patch.object(services, 'get_rate_limiters', return_value=registry):
+            result = await generate_content_with_openai("Test prompt", use_cache=False, estimate=TokenEstimate(10, 100))
+
+        self.assertEqual(result.video_title, "Test")
+        self.assertEqual(mock_create.await_count, 2)
+        # The client does not retry on its own, so the window sees every 429
+        self.assertEqual(mock_create.await_args.kwargs['max_retries'], 0)
+        self.assertEqual(registry.get('openai').throttled_calls, 1)
+        self.assertLess(registry.get('openai').concurrency.limit, 4)
+
+class TestLoadTokenBudget(unittest.IsolatedAsyncioTestCase):
+    async def test_budget_is_created_off_the_event_loop_once(self):
+        loop_thread = threading.get_ident()
+        created_in = []
+
+        def create_budget(*args, **kwargs):
+            created_in.append(threading.get_ident())
+            return MagicMock()
+
+        with patch.object(services, '_token_budget', None), \
+                patch.object(services, 'TokenBudget', side_effect=create_budget), \
+                patch.object(services, 'TokenCounter'):
+            first = await load_token_budget()
+            second = await load_token_budget()
+
+        self.assertIs(first, second)
+        self.assertEqual(len(created_in), 1)
+        self.assertNotEqual(created_in[0], loop_thread)
+
+class TestRateLimiterRegistryPerLoop(unittest.TestCase):
+    def test_limits_are_split_between_the_worker_processes_of_every_host(self):
+        sections = {
+            'api': {'rate_limit_headroom': 1.0, 'rate_limits': {'openai': {'requests_per_minute': 600}}},
+            'job_queue': {'hosts': 3, 'processes_per_host': 2},
+        }
+
+        async def registry():
+            return get_rate_limiters()
+
+        with patch.object(services, 'get_section', lambda name: sections[name]):
+            limiter = asyncio.run(registry()).get('openai')
+            self.assertEqual(limiter.requests.capacity, 100)
+
+            sections['api']['rate_limit_processes'] = 4
+            self.assertEqual(asyncio.run(registry()).get('openai').requests.capacity, 150)
+
+    def test_each_event_loop_gets_its_own_limiters(self):
+        async def registries():
+            return get_rate_limiters(), get_rate_limiters()
 
-    @patch('services.openai_service.generate_content')
-    def test_generate_content_with_openai(self, mock_generate):
-        mock_generate.return_value = {"title": "Test"}
-        
-        result = generate_content_with_openai("Test prompt")
-        
-        self.assertEqual(result, {"title": "Test"})
-        mock_generate.assert_called_once_with("Test prompt")
+        first, same = asyncio.run(registries())
+        second, _ = asyncio.run(registries())
+        self.assertIs(first, same)
+        self.assertIsNot(first, second)
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -0,0 +1,144 @@
+import queue
+import threading
+import unittest
+import os
+import sys
+
+# Add the src directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(os.path.dirname(current_dir), 'src')
+sys.path.insert(0, src_dir)
+
+from progress_events import ProgressBroker, ProgressFeed, RedisProgressChannel, format_sse
+
+class TestProgressBroker(unittest.TestCase):
+    def setUp(self):
+        self.broker = ProgressBroker(history_size=10)
+
+    def test_fans_out_to_all_subscribers(self):
+        first = self.broker.subscribe(1)
+        second = self.broker.subscribe(1)
+        other = self.broker.subscribe(2)
+
+        event_id = self.broker.publish(1, {"progress": 50})
+
+        self.assertEqual(first.get(timeout=0), (event_id, {"progress": 50}))
+        self.assertEqual(second.get(timeout=0), (event_id, {"progress": 50}))
+        self.assertIsNone(other.get(timeout=0))
+
+    def test_event_ids_are_strictly_increasing(self):
+        first = self.broker.publish(1, {"progress": 10}, event_id=100)
+        second = self.broker.publish(1, {"progress": 20}, event_id=100)
+        self.assertEqual((first, second), (100, 101))
+
+    def test_resumes_after_last_event_id(self):
+        self.broker.publish(1, {"progress": 10}, event_id=1)
+        self.broker.publish(1, {"progress": 20}, event_id=2)
+        self.broker.publish(1, {"progress": 30}, event_id=3)
+
+        with self.broker.subscribe(1, last_event_id=1) as subscription:
+            self.assertEqual(subscription.get(timeout=0), (2, {"progress": 20}))
+            self.assertEqual(subscription.get(timeout=0), (3, {"progress": 30}))
+            self.assertIsNone(subscription.get(timeout=0))
+
+    def test_new_subscriber_gets_current_state_only(self):
+        self.broker.publish(1, {"progress": 10})
+        self.broker.publish(1, {"progress": 20})
+
+        with self.broker.subscribe(1) as subscription:
+            self.assertEqual(subscription.get(timeout=0)[1], {"progress": 20})
+            self.assertIsNone(subscription.get(timeout=0))
+        self.assertEqual(self.broker.active_content_ids(), [])
+
+class TestProgressFeed(unittest.TestCase):
+    def test_publishes_only_changed_snapshots_of_subscribed_contents(self):
+        broker = ProgressBroker()
+        requested = []
+        snapshots = {"progress": 10}
+
+        def fetch(content_ids):
+            requested.append(content_ids)
+            return [{"contentId": 7, "progress": snapshots["progress"], "eventId": 1000}]
+
+        feed = ProgressFeed(broker, fetch)
+        feed.poll()
+        self.assertEqual(requested, [])
+
+        subscription = broker.subscribe(7)
+        feed.poll()
+        feed.poll()
+        snapshots["progress"] = 60
+        feed.poll()
+
+        self.assertEqual(requested, [[7], [7], [7]])
+        self.assertEqual(subscription.get(timeout=0), (1000, {"contentId": 7, "progress": 10}))
+        self.assertEqual(subscription.get(timeout=0), (1001, {"contentId": 7, "progress": 60}))
+        self.assertIsNone(subscription.get(timeout=0))
+
+    def test_format_sse(self):
+        self.assertEqual(format_sse(3, {"progress": 1}), 'id: 3\ndata: {"progress": 1}\n\n')
+
+class FakeRedis:
+    """
+    In-process stand-in for a Redis client's publish and pubsub.
+    """
+    def __init__(self):
+        self.messages = queue.Queue()
+        self.published = threading.Event()
+
+    def publish(self, channel, message):
+        self.messages.put({"type": "message", "channel": channel, "data": message.encode()})
+        self.published.set()
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        client = self
+
+        class PubSub:
+            def subscribe(self, channel):
+                pass
+
+            def listen(self):
+                while True:
+                    yield client.messages.get()
+
+        return PubSub()
+
+class TestRedisProgressChannel(unittest.TestCase):
+    def test_events_published_by_a_worker_reach_the_subscribers_of_a_server(self):
+        client = FakeRedis()
+        worker = RedisProgressChannel(client=client)
+        server = RedisProgressChannel(client=client)
+        broker = ProgressBroker()
+        subscription = broker.subscribe(7)
+        server.start(broker)
+
+        worker.publish(7, {"contentId": 7, "progress": 40})
+
+        event_id, data = subscription.get(timeout=1)
+        self.assertEqual(data, {"contentId": 7, "progress": 40})
+        self.assertEqual(broker.latest(7), (event_id, data))
+
+    def test_failed_send_does_not_stop_later_events(self):
+        client = FakeRedis()
+        publish = client.publish
+        calls = []
+
+        def flaky_publish(channel, message):
+            calls.append(message)
+            if len(calls) == 1:
+                raise ConnectionError("redis unavailable")
+            publish(channel, message)
+
+        client.publish = flaky_publish
+        channel = RedisProgressChannel(client=client)
+
+        channel.publish(7, {"progress": 10})
+        channel.publish(7, {"progress": 20})
+
+        self.assertTrue(client.published.wait(1))
+        broker = ProgressBroker()
+        channel.deliver(broker, client.messages.get(timeout=1)["data"])
+        self.assertEqual(broker.latest(7)[1], {"progress": 20})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import asyncio
+import unittest
+import os
+import sys
+
+# Add the src directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(os.path.dirname(current_dir), 'src')
+sys.path.insert(0, src_dir)
+
+from progress_store import ProgressWriteBuffer
+
+class TestProgressWriteBuffer(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.writes = []
+        self.fail_writes = False
+
+        async def write(pending):
+            if self.fail_writes:
+                raise RuntimeError("database unavailable")
+            self.writes.append(pending)
+
+        self.buffer = ProgressWriteBuffer(write, flush_interval_ms=20)
+
+    async def test_coalesces_updates_into_one_write(self):
+        self.buffer.record(1, {"progress": 10, "currentStep": "content saved"})
+        self.buffer.record(1, {"progress": 40, "currentStep": "images generated"})
+        self.buffer.record(2, {"progress": 25})
+        self.assertEqual(self.writes, [])
+
+        await asyncio.sleep(0.1)
+
+        self.assertEqual(self.writes, [{
+            1: {"progress": 40, "currentStep": "images generated"},
+            2: {"progress": 25},
+        }])
+        stats = self.buffer.get_stats()
+        self.assertEqual(stats["updates"], 3)
+        self.assertEqual(stats["rows_written"], 2)
+        self.assertEqual(stats["pending"], 0)
+
+    async def test_keeps_updates_when_write_fails(self):
+        self.fail_writes = True
+        self.buffer.record(1, {"progress": 10})
+        self.assertEqual(await self.buffer.flush(), 0)
+
+        self.buffer.record(1, {"currentStep": "images generated"})
+        self.fail_writes = False
+        self.assertEqual(await self.buffer.flush(), 1)
+        self.assertEqual(self.writes, [{1: {"progress": 10, "currentStep": "images generated"}}])
+        self.assertEqual(self.buffer.get_stats()["failed_flushes"], 1)
+
+    async def test_close_flushes_pending_updates(self):
+        self.buffer.record(1, {"progress": 100, "status": "completed"})
+        await self.buffer.close()
+        self.assertEqual(self.writes, [{1: {"progress": 100, "status": "completed"}}])
+
+    def test_record_outside_event_loop_waits_for_flush(self):
+        self.buffer.record(1, {"progress": 10})
+        self.assertEqual(self.buffer.get_stats()["pending"], 1)
+        asyncio.run(self.buffer.flush())
+        self.assertEqual(self.writes, [{1: {"progress": 10}}])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from src import progress_tracker
+from src.progress_tracker import ProgressTracker
+
+class RecordingWriter:
+    def __init__(self):
+        self.states = {}
+
+    def record(self, content_id, state):
+        self.states.setdefault(content_id, {}).update(state)
+
+class TestProgressTracker(unittest.TestCase):
+    def setUp(self):
+        patcher = patch.object(progress_tracker, 'progress_broker')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.writer = RecordingWriter()
+        self.tracker = ProgressTracker(6, writer=self.writer)
+
+    def test_events_are_pushed_through_the_progress_channel(self):
+        channel = MagicMock()
+        with patch.object(progress_tracker, 'get_progress_channel', return_value=channel):
+            self.tracker.update(3, {"contentId": 1, "progress": 50, "status": "Images generated"})
+
+        channel.publish.assert_called_once_with(1, {"contentId": 1, "status": "processing", "progress": 50, "currentStep": "Images generated"})
+
+    def test_full_progress_does_not_complete_the_content(self):
+        self.tracker.update(6, {"contentId": 1, "progress": 100, "status": "Video generated"})
+        self.assertEqual(self.writer.states[1], {"status": "processing", "progress": 100, "currentStep": "Video generated"})
+
+    def test_complete_marks_the_content_completed(self):
+        self.tracker.update(6, {"contentId": 1, "progress": 100, "status": "Video generated"})
+        self.tracker.complete(1)
+        self.assertEqual(self.writer.states[1]["status"], "completed")
+
+    def test_fail_marks_the_content_failed_or_pending_for_a_retry(self):
+        self.tracker.fail(1, "boom")
+        self.tracker.fail(2, "boom", retrying=True)
+        self.assertEqual(self.writer.states[1], {"status": "failed", "currentStep": "Failed: boom"})
+        self.assertEqual(self.writer.states[2], {"status": "pending", "currentStep": "Retrying after error: boom"})
+
+if __name__ == '__main__':
+    unittest.main()
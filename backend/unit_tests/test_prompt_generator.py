@@ -2,7 +2,9 @@
 
 import unittest
 import os
-from src.prompt_generator import PromptGenerator
+import tempfile
+import time
+from src.prompt_generator import PromptGenerator, compile_template
 
 class TestPromptGenerator(unittest.TestCase):
     def setUp(self):
@@ -59,5 +61,87 @@ class TestPromptGenerator(unittest.TestCase):
         prompt = self.prompt_generator.generate_prompt('component_test', {'name': 'John'})
         self.assertEqual(prompt, "This is a test component. John")
 
+class TestCompiledTemplates(unittest.TestCase):
+    def write_templates(self, path, text):
+        with open(path, 'w') as file:
+            file.write(f"greeting:\n  template: \"{text}\"\n")
+        # Make the change visible even on filesystems with coarse modification times
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 1000000000))
+
+    def test_render_matches_format_and_template_syntax(self):
+        template = compile_template('t', '{{"a": {title!r:>8}}} costs $$5 for ${name} and $missing {component:c}', {'c': 'at {place}'})
+
+        self.assertEqual(template.placeholders, {'title', 'name', 'missing', 'place'})
+        self.assertEqual(
+            template.render({'title': 'x', 'name': 'Ann', 'place': 'home'}),
+            '{"a":      \'x\'} costs $5 for Ann and $missing at home',
+        )
+        with self.assertRaises(KeyError):
+            template.render({'name': 'Ann'})
+
+    def test_unknown_component_is_rejected(self):
+        with self.assertRaises(ValueError):
+            compile_template('t', '{component:missing}', {})
+
+    def test_templates_are_shared_and_reloaded_when_the_file_changes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'templates.yaml')
+            self.write_templates(path, "Hello {name}")
+            first = PromptGenerator(path, reload_interval=0)
+            second = PromptGenerator(path, reload_interval=0)
+            self.assertIs(first._compiled['greeting'], second._compiled['greeting'])
+
+            self.write_templates(path, "Goodbye {name}")
+            self.assertEqual(first.generate_prompt('greeting', name='Ann'), "Goodbye Ann")
+
+            with open(path, 'w') as file:
+                file.write("greeting: [unclosed")
+            os.utime(path, ns=(time.time_ns(), time.time_ns() + 2000000000))
+            self.assertEqual(first.generate_prompt('greeting', name='Ann'), "Goodbye Ann")
+
+    def test_added_templates_survive_a_reload(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'templates.yaml')
+            self.write_templates(path, "Hello {name}")
+            generator = PromptGenerator(path, reload_interval=0)
+            generator.add_template('extra', 'Extra $name')
+            generator.remove_template('greeting')
+
+            self.write_templates(path, "Goodbye {name}")
+            self.assertEqual(generator.generate_prompt('extra', name='Ann'), "Extra Ann")
+            self.assertNotIn('greeting', generator.templates)
+
+class TestRenderMany(unittest.TestCase):
+    def setUp(self):
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        self.prompt_generator = PromptGenerator(os.path.join(current_dir, '..', 'src', 'prompt_templates.yaml'))
+        self.prompt_generator.add_template('subject', 'Video about {title} for $audience', max_length=30)
+
+    def test_renders_rows_and_columns_lazily(self):
+        rows = iter([{'title': 'Rome', 'audience': 'kids'}, {'title': 'Mars', 'audience': 'adults'}])
+        prompts = self.prompt_generator.render_many('subject', rows)
+
+        self.assertEqual(next(prompts), "Video about Rome for kids")
+        self.assertEqual(next(rows), {'title': 'Mars', 'audience': 'adults'})
+        self.assertEqual(list(self.prompt_generator.render_many('subject', {'title': ['Rome', 'Mars'], 'audience': ['kids', 'adults']})),
+                         ["Video about Rome for kids", "Video about Mars for adults"])
+
+    def test_invalid_rows(self):
+        rows = [{'title': 'Rome', 'audience': 'kids'}, {'audience': 'kids'}, {'title': 'A very long subject', 'audience': 'kids'}]
+
+        self.assertEqual(list(self.prompt_generator.render_many('subject', rows, strict=False)), ["Video about Rome for kids", None, None])
+        with self.assertRaisesRegex(ValueError, "Row 1 .*title"):
+            list(self.prompt_generator.render_many('subject', rows))
+
+    def test_unfilled_dollar_placeholders_are_left_as_generate_prompt_leaves_them(self):
+        prompts = list(self.prompt_generator.render_many('subject', [{'title': 'Rome'}]))
+
+        self.assertEqual(prompts, [self.prompt_generator.generate_prompt('subject', title='Rome')])
+        self.assertEqual(prompts, ["Video about Rome for $audience"])
+
+    def test_unknown_template(self):
+        with self.assertRaises(ValueError):
+            self.prompt_generator.render_many('missing', [])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
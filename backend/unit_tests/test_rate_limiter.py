@@ -0,0 +1,121 @@
+import asyncio
+import unittest
+import os
+import sys
+
+# Add the src directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(os.path.dirname(current_dir), 'src')
+sys.path.insert(0, src_dir)
+
+from rate_limiter import TokenBucket, AdaptiveConcurrency, RateLimiterRegistry, is_rate_limit_error
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class RateLimitError(Exception):
+    status_code = 429
+
+class TestTokenBucket(unittest.TestCase):
+    def test_refills_over_time(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate_per_minute=60, capacity=2, clock=clock)
+        self.assertEqual(bucket.try_acquire(), 0)
+        self.assertEqual(bucket.try_acquire(), 0)
+        self.assertAlmostEqual(bucket.try_acquire(), 1.0)
+
+        clock.now = 1.0
+        self.assertEqual(bucket.try_acquire(), 0)
+
+    def test_adjust_refunds_tokens(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate_per_minute=600, capacity=100, clock=clock)
+        bucket.try_acquire(80)
+        bucket.adjust(-50)
+        self.assertEqual(bucket.tokens, 70)
+
+class TestAdaptiveConcurrency(unittest.IsolatedAsyncioTestCase):
+    async def test_multiplicative_decrease_on_throttle(self):
+        window = AdaptiveConcurrency(max_limit=8)
+        await window.acquire()
+        await window.release(0.1, throttled=True)
+        self.assertEqual(window.limit, 4)
+
+    async def test_additive_increase_is_capped(self):
+        window = AdaptiveConcurrency(max_limit=4)
+        window.limit = 2
+        for _ in range(10):
+            await window.acquire()
+            await window.release(0.1)
+        self.assertEqual(window.limit, 4)
+
+    async def test_latency_spike_shrinks_window(self):
+        window = AdaptiveConcurrency(max_limit=8)
+        for _ in range(5):
+            await window.acquire()
+            await window.release(0.1)
+        await window.acquire()
+        await window.release(1.0)
+        self.assertEqual(window.limit, 4)
+
+class TestRateLimiterRegistry(unittest.IsolatedAsyncioTestCase):
+    async def test_throttled_call_shrinks_provider_window(self):
+        registry = RateLimiterRegistry({"openai": {"requests_per_minute": 600, "max_concurrency": 4}})
+        limiter = registry.get("openai")
+
+        with self.assertRaises(RateLimitError):
+            async with limiter.limit():
+                raise RateLimitError()
+
+        self.assertEqual(limiter.throttled_calls, 1)
+        self.assertEqual(limiter.concurrency.limit, 2)
+        self.assertEqual(limiter.concurrency.in_flight, 0)
+
+    async def test_concurrent_calls_stay_within_window(self):
+        registry = RateLimiterRegistry({"luma": {"requests_per_minute": 6000, "max_concurrency": 2}})
+        limiter = registry.get("luma")
+        running = 0
+        peak = 0
+
+        async def call():
+            nonlocal running, peak
+            async with limiter.limit():
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*(call() for _ in range(6)))
+        self.assertEqual(peak, 2)
+
+    def test_processes_split_the_limits_evenly(self):
+        limits = {"openai": {"requests_per_minute": 600, "tokens_per_minute": 40000, "max_concurrency": 10}}
+
+        limiters = [RateLimiterRegistry(limits, headroom=0.9, processes=4).get("openai") for _ in range(4)]
+
+        # Together the processes stay at the headroom of the published limits
+        self.assertAlmostEqual(sum(limiter.requests.rate_per_second * 60 for limiter in limiters), 540)
+        self.assertAlmostEqual(sum(limiter.tokens.capacity for limiter in limiters), 36000)
+        self.assertEqual(sum(limiter.concurrency.max_limit for limiter in limiters), 8)
+
+    def test_every_process_keeps_one_call_in_flight(self):
+        registry = RateLimiterRegistry({"suna": {"requests_per_minute": 10, "max_concurrency": 2}}, processes=4)
+        self.assertEqual(registry.get("suna").concurrency.max_limit, 1)
+        with self.assertRaises(ValueError):
+            RateLimiterRegistry({}, processes=0)
+
+    def test_unknown_provider(self):
+        registry = RateLimiterRegistry({})
+        with self.assertRaises(ValueError):
+            registry.get("openai")
+
+    def test_is_rate_limit_error(self):
+        self.assertTrue(is_rate_limit_error(RateLimitError()))
+        self.assertFalse(is_rate_limit_error(ValueError()))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import os
+import sys
+
+# Add the src directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(os.path.dirname(current_dir), 'src')
+sys.path.insert(0, src_dir)
+
+from response_cache import MemoryCacheBackend, ResponseCache
+
+class TestMemoryCacheBackend(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        backend = MemoryCacheBackend(max_entries=2)
+        backend.set("a", b"1")
+        backend.set("b", b"2")
+        backend.get("a")
+        backend.set("c", b"3")
+
+        self.assertEqual(backend.get("a"), b"1")
+        self.assertIsNone(backend.get("b"))
+        self.assertEqual(backend.evictions, 1)
+
+    def test_expires_entries(self):
+        backend = MemoryCacheBackend()
+        backend.set("a", b"1", ttl_seconds=0)
+        self.assertIsNone(backend.get("a"))
+
+class TestResponseCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.cache = ResponseCache(MemoryCacheBackend())
+        self.loads = 0
+
+    async def load_completed(self):
+        self.loads += 1
+        return b'{"status": "completed"}', True
+
+    async def test_reads_through_once(self):
+        for _ in range(3):
+            self.assertEqual(await self.cache.get_or_load("content:1", self.load_completed), b'{"status": "completed"}')
+
+        self.assertEqual(self.loads, 1)
+        stats = self.cache.get_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 1))
+        self.assertEqual(stats["hit_ratio"], 0.6667)
+
+    async def test_does_not_cache_uncacheable_or_missing_responses(self):
+        async def load_processing():
+            self.loads += 1
+            return b'{"status": "processing"}', False
+
+        async def load_missing():
+            return None
+
+        await self.cache.get_or_load("content:1", load_processing)
+        await self.cache.get_or_load("content:1", load_processing)
+        self.assertIsNone(await self.cache.get_or_load("content:2", load_missing))
+        self.assertEqual(self.loads, 2)
+
+    async def test_invalidation_forces_reload(self):
+        await self.cache.get_or_load("content:1", self.load_completed)
+        self.cache.invalidate(["content:1"])
+        await self.cache.get_or_load("content:1", self.load_completed)
+
+        self.assertEqual(self.loads, 2)
+        self.assertEqual(self.cache.get_stats()["invalidations"], 1)
+
+    async def test_load_racing_with_an_invalidation_is_not_cached(self):
+        async def load_then_written():
+            self.loads += 1
+            # A writer commits and invalidates after the read
+            self.cache.invalidate(["content:1"])
+            return b'{"status": "completed"}', True
+
+        await self.cache.get_or_load("content:1", load_then_written)
+        await self.cache.get_or_load("content:1", self.load_completed)
+
+        self.assertEqual(self.loads, 2)
+
+    async def test_backend_errors_fall_back_to_loading(self):
+        class BrokenBackend:
+            def get(self, key):
+                raise ConnectionError("redis is down")
+
+            def set(self, key, value, ttl_seconds=None):
+                raise ConnectionError("redis is down")
+
+        cache = ResponseCache(BrokenBackend())
+        self.assertEqual(await cache.get_or_load("content:1", self.load_completed), b'{"status": "completed"}')
+        self.assertEqual(cache.get_stats()["errors"], 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import json
+import unittest
+import os
+import sys
+
+# Add the src directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(os.path.dirname(current_dir), 'src')
+sys.path.insert(0, src_dir)
+
+from scene_stream import SceneStreamParser
+
+SCRIPT = {
+    "video_title": "The {Curious} Life of \"Ada\"",
+    "description": "Scenes: [a, b]",
+    "main_scenes": [
+        {"scene_description": "Ada meets Babbage", "visual_prompt": "A salon, {candles}, 1833"},
+        {"scene_description": "The \\\"Notes\\\"", "visual_prompt": "Handwritten notes ]}"},
+        {"scene_description": "Legacy", "visual_prompt": "A modern computer"},
+    ],
+}
+
+class TestSceneStreamParser(unittest.TestCase):
+    def test_emits_each_scene_once_complete(self):
+        text = json.dumps(SCRIPT, indent=2)
+        parser = SceneStreamParser()
+        emitted = []
+        for i in range(0, len(text), 7):
+            emitted.extend(parser.feed(text[i:i + 7]))
+
+        self.assertEqual(emitted, SCRIPT["main_scenes"])
+        self.assertEqual(parser.scenes_emitted, 3)
+        self.assertEqual(json.loads(parser.buffer), SCRIPT)
+
+    def test_scene_is_emitted_before_script_finishes(self):
+        text = json.dumps(SCRIPT)
+        end_of_first_scene = text.index("1833") + len('1833"}')
+        parser = SceneStreamParser()
+
+        self.assertEqual(parser.feed(text[:end_of_first_scene]), [SCRIPT["main_scenes"][0]])
+        self.assertEqual(parser.feed(text[end_of_first_scene:]), SCRIPT["main_scenes"][1:])
+
+    def test_ignores_nested_arrays_with_same_key(self):
+        document = {"other": {"main_scenes": [{"a": 1}]}, "main_scenes": [{"b": 2}]}
+        parser = SceneStreamParser()
+        self.assertEqual(parser.feed(json.dumps(document)), [{"b": 2}])
+
+if __name__ == '__main__':
+    unittest.main()
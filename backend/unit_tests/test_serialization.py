@@ -0,0 +1,61 @@
+import unittest
+import json
+import os
+import sys
+
+# Add the src directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(os.path.dirname(current_dir), 'src')
+sys.path.insert(0, src_dir)
+
+from serialization import JSONSerializer, OrjsonSerializer, RawJSON, get_serializer, orjson
+
+class FakeModel:
+    def __init__(self, **fields):
+        self.fields = fields
+
+    def dict(self, exclude=None):
+        return {name: value for name, value in self.fields.items() if name not in (exclude or ())}
+
+def serializers():
+    return [JSONSerializer()] + ([OrjsonSerializer()] if orjson is not None else [])
+
+class TestSerializers(unittest.TestCase):
+    def test_embeds_raw_json_without_parsing(self):
+        for serializer in serializers():
+            with self.subTest(serializer=serializer.name):
+                data = serializer.dumps({"id": 1, "content": RawJSON('{"a": [1, 2]}'), "empty": RawJSON(None)})
+
+                self.assertEqual(json.loads(data), {"id": 1, "content": {"a": [1, 2]}, "empty": None})
+                self.assertIn(b'{"a": [1, 2]}', data)
+
+    def test_round_trips_plain_values(self):
+        value = {"title": "Vidéo", "scenes": [{"n": 1}, {"n": 2}], "progress": 12.5}
+        for serializer in serializers():
+            with self.subTest(serializer=serializer.name):
+                self.assertEqual(serializer.loads(serializer.dumps(value)), value)
+
+    def test_dump_model_splices_raw_fields(self):
+        model = FakeModel(id=3, title="Video", generatedContent="ignored")
+        for serializer in serializers():
+            with self.subTest(serializer=serializer.name):
+                data = serializer.dump_model(model, raw_fields={"generatedContent": '{"video_title":"Video"}'})
+
+                self.assertEqual(json.loads(data), {"generatedContent": {"video_title": "Video"}, "id": 3, "title": "Video"})
+
+    def test_dump_model_without_other_fields(self):
+        data = JSONSerializer().dump_model(FakeModel(generatedContent="x"), raw_fields={"generatedContent": None})
+
+        self.assertEqual(json.loads(data), {"generatedContent": None})
+
+class TestGetSerializer(unittest.TestCase):
+    def test_selects_library(self):
+        self.assertEqual(get_serializer('json').name, "json")
+        self.assertEqual(get_serializer('auto').name, "orjson" if orjson is not None else "json")
+
+    def test_rejects_unknown_library(self):
+        with self.assertRaises(ValueError):
+            get_serializer('simplejson')
+
+if __name__ == '__main__':
+    unittest.main()
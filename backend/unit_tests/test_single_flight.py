@@ -0,0 +1,88 @@
+import unittest
+import asyncio
+import os
+import sys
+
+# Add the src directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(os.path.dirname(current_dir), 'src')
+sys.path.insert(0, src_dir)
+
+from single_flight import SingleFlight, request_hash
+
+class TestRequestHash(unittest.TestCase):
+    def test_ignores_key_order(self):
+        self.assertEqual(
+            request_hash({"title": "a", "generalOptions": {"style": "x", "duration": 60}}),
+            request_hash({"generalOptions": {"duration": 60, "style": "x"}, "title": "a"}),
+        )
+        self.assertNotEqual(request_hash({"title": "a"}), request_hash({"title": "b"}))
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_calls_share_one_run(self):
+        group = SingleFlight()
+        runs = 0
+        release = asyncio.Event()
+
+        async def work():
+            nonlocal runs
+            runs += 1
+            await release.wait()
+            return "content"
+
+        calls = [asyncio.ensure_future(group.run("key", work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+
+        self.assertEqual(await asyncio.gather(*calls), ["content"] * 3)
+        self.assertEqual(runs, 1)
+        self.assertEqual(group.get_stats(), {"calls": 1, "coalesced": 2, "in_flight": 0})
+
+        # A finished run is not reused
+        self.assertEqual(await group.run("key", work), "content")
+        self.assertEqual(runs, 2)
+
+    async def test_exception_reaches_every_caller(self):
+        group = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0)
+            raise RuntimeError("provider down")
+
+        results = await asyncio.gather(group.run("key", work), group.run("key", work), return_exceptions=True)
+
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+
+    async def test_run_survives_until_its_last_caller_is_cancelled(self):
+        group = SingleFlight()
+        release = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def work():
+            try:
+                await release.wait()
+                return "content"
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        first = asyncio.ensure_future(group.run("key", work))
+        second = asyncio.ensure_future(group.run("key", work))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        await asyncio.sleep(0)
+        self.assertFalse(cancelled.is_set())
+        release.set()
+        self.assertEqual(await second, "content")
+
+        third = asyncio.ensure_future(group.run("other", work))
+        release.clear()
+        await asyncio.sleep(0)
+        third.cancel()
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+        await asyncio.sleep(0)
+        self.assertEqual(group.in_flight(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
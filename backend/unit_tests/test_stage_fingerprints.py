@@ -0,0 +1,84 @@
+import unittest
+import copy
+from src.stage_fingerprints import reusable_stages, stage_fingerprints
+
+REQUEST = {
+    "videoSubject": "Volcanoes",
+    "generalOptions": {
+        "style": "documentary",
+        "sceneAmount": 3,
+        "tone": "calm",
+        "vocabulary": "simple",
+        "services": {"generate_image": True, "generate_voice": True, "generate_music": True, "generate_video": True},
+    },
+    "contentOptions": {"pacing": "slow"},
+    "visualPromptOptions": {"style": "photo"},
+}
+ALL_STAGES = ["script", "image", "voice", "music", "video"]
+
+def fingerprints(request=REQUEST, prompt=None, model="gpt-4o", temperature=0.7):
+    # The script prompt as rendered for the request
+    prompt = f"Write about {request['videoSubject']}" if prompt is None else prompt
+    return stage_fingerprints(request, prompt, model, temperature)
+
+def changed(path, value):
+    request = copy.deepcopy(REQUEST)
+    target = request
+    for key in path[:-1]:
+        target = target[key]
+    target[path[-1]] = value
+    return fingerprints(request)
+
+def changed_stages(before, after):
+    return [name for name in ALL_STAGES if before[name] != after[name]]
+
+class TestStageFingerprints(unittest.TestCase):
+    def test_identical_requests_match(self):
+        self.assertEqual(fingerprints(), fingerprints(copy.deepcopy(REQUEST)))
+
+    def test_script_input_changes_every_stage_built_on_it(self):
+        self.assertEqual(changed_stages(fingerprints(), changed(["videoSubject"], "Glaciers")), ALL_STAGES)
+        self.assertEqual(changed_stages(fingerprints(), fingerprints(prompt="Describe Volcanoes")),
+                         ["script", "image", "voice", "video"])
+        self.assertEqual(changed_stages(fingerprints(), fingerprints(model="gpt-4o-mini")),
+                         ["script", "image", "voice", "video"])
+        self.assertEqual(changed_stages(fingerprints(), fingerprints(temperature=0.2)),
+                         ["script", "image", "voice", "video"])
+
+    def test_stage_options_change_only_that_stage_and_the_video(self):
+        before = fingerprints()
+        self.assertEqual(changed_stages(before, changed(["visualPromptOptions", "style"], "anime")), ["image", "video"])
+        self.assertEqual(changed_stages(before, changed(["contentOptions", "pacing"], "fast")), ["voice", "video"])
+        self.assertEqual(changed_stages(before, changed(["generalOptions", "style"], "epic")), ["music", "video"])
+
+    def test_fields_outside_the_script_prompt_are_ignored(self):
+        self.assertEqual(changed_stages(fingerprints(), changed(["generalOptions", "description"], "new")), [])
+        # sceneAmount reaches the script only through the rendered prompt
+        self.assertEqual(changed_stages(fingerprints(), changed(["generalOptions", "sceneAmount"], 4)), [])
+
+    def test_disabling_a_stage_changes_the_video(self):
+        before = fingerprints()
+        after = changed(["generalOptions", "services", "generate_music"], False)
+        self.assertEqual(changed_stages(before, after), ["video"])
+
+class TestReusableStages(unittest.TestCase):
+    def test_unchanged_stored_stages_are_reused(self):
+        current = fingerprints()
+        self.assertEqual(reusable_stages(current, current, ALL_STAGES, ALL_STAGES), ALL_STAGES)
+
+    def test_changed_stages_and_missing_results_are_not_reused(self):
+        stored = fingerprints()
+        current = changed(["visualPromptOptions", "style"], "anime")
+        self.assertEqual(reusable_stages(stored, current, ALL_STAGES, ALL_STAGES), ["script", "voice", "music"])
+        self.assertEqual(reusable_stages(stored, stored, ["script", "image", "music"], ALL_STAGES), ["script", "image", "music"])
+
+    def test_stages_are_not_reused_when_the_script_runs_again(self):
+        current = fingerprints()
+        # Same fingerprints, but the stored script is missing, so its scenes are written anew
+        self.assertEqual(reusable_stages(current, current, ["image", "voice", "music", "video"], ALL_STAGES), ["music"])
+
+    def test_content_without_fingerprints_reuses_nothing(self):
+        self.assertEqual(reusable_stages({}, fingerprints(), ALL_STAGES, ALL_STAGES), [])
+
+if __name__ == '__main__':
+    unittest.main()
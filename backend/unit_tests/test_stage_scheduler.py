@@ -0,0 +1,86 @@
+import asyncio
+import time
+import unittest
+import os
+import sys
+
+# Add the src directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(os.path.dirname(current_dir), 'src')
+sys.path.insert(0, src_dir)
+
+from stage_scheduler import Stage, StageScheduler, StageError
+
+def sleeping_stage(name, delay, calls):
+    async def run(results):
+        calls.append(name)
+        await asyncio.sleep(delay)
+        return name
+    return run
+
+class TestStageScheduler(unittest.IsolatedAsyncioTestCase):
+    async def test_independent_stages_run_concurrently(self):
+        calls = []
+        scheduler = StageScheduler([
+            Stage("script", sleeping_stage("script", 0, calls)),
+            Stage("image", sleeping_stage("image", 0.1, calls), depends_on=["script"]),
+            Stage("voice", sleeping_stage("voice", 0.1, calls), depends_on=["script"]),
+            Stage("music", sleeping_stage("music", 0.1, calls), depends_on=["script"]),
+            Stage("video", sleeping_stage("video", 0, calls), depends_on=["image", "voice", "music"]),
+        ])
+
+        start_time = time.monotonic()
+        results = await scheduler.run()
+        elapsed_time = time.monotonic() - start_time
+
+        self.assertLess(elapsed_time, 0.25)
+        self.assertEqual(calls[0], "script")
+        self.assertEqual(calls[-1], "video")
+        self.assertEqual(results["video"], "video")
+        self.assertEqual(set(scheduler.timings), {"script", "image", "voice", "music", "video"})
+
+    async def test_failure_cancels_dependents_only(self):
+        calls = []
+
+        async def failing(results):
+            raise RuntimeError("image service down")
+
+        scheduler = StageScheduler([
+            Stage("script", sleeping_stage("script", 0, calls)),
+            Stage("image", failing, depends_on=["script"]),
+            Stage("music", sleeping_stage("music", 0.01, calls), depends_on=["script"]),
+            Stage("video", sleeping_stage("video", 0, calls), depends_on=["image", "music"]),
+        ])
+
+        with self.assertRaises(StageError) as context:
+            await scheduler.run()
+
+        self.assertEqual(context.exception.stage, "image")
+        self.assertIn("music", calls)
+        self.assertNotIn("video", calls)
+        self.assertEqual(scheduler.status["video"], "cancelled")
+
+    async def test_completed_stages_are_not_rerun(self):
+        calls = []
+        scheduler = StageScheduler([
+            Stage("script", sleeping_stage("script", 0, calls)),
+            Stage("image", sleeping_stage("image", 0, calls), depends_on=["script"]),
+        ])
+
+        results = await scheduler.run({"script": "stored script"})
+
+        self.assertEqual(calls, ["image"])
+        self.assertEqual(results["script"], "stored script")
+        self.assertEqual(scheduler.status["script"], "skipped")
+
+    def test_rejects_cycles_and_unknown_dependencies(self):
+        async def noop(results):
+            return None
+
+        with self.assertRaises(ValueError):
+            StageScheduler([Stage("a", noop, depends_on=["b"]), Stage("b", noop, depends_on=["a"])])
+        with self.assertRaises(ValueError):
+            StageScheduler([Stage("a", noop, depends_on=["missing"])])
+
+if __name__ == '__main__':
+    unittest.main()
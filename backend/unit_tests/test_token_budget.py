@@ -0,0 +1,81 @@
+import unittest
+from unittest.mock import patch
+import os
+import sys
+
+# Add the src directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(os.path.dirname(current_dir), 'src')
+sys.path.insert(0, src_dir)
+
+from prompt_generator import compile_template
+from token_budget import TokenBudget, TokenBudgetExceeded, TokenCounter
+
+def heuristic_counter(**kwargs):
+    with patch('token_budget.tiktoken', None):
+        return TokenCounter(**kwargs)
+
+class TestTokenCounter(unittest.TestCase):
+    def test_caches_short_texts_only(self):
+        counter = heuristic_counter(max_cached_length=20)
+
+        self.assertEqual(counter.count("abcdefgh"), 2)
+        self.assertEqual(counter.count("abcdefgh"), 2)
+        self.assertEqual(counter.count("x" * 41), 11)
+        self.assertEqual(counter.get_stats(), {"tokenizer": "heuristic", "hits": 1, "misses": 1, "entries": 1})
+
+    def test_evicts_least_recently_used(self):
+        counter = heuristic_counter(cache_size=2)
+        for text in ("a", "b", "a", "c"):
+            counter.count(text)
+
+        self.assertEqual(list(counter._counts), ["a", "c"])
+
+    def test_truncate(self):
+        counter = heuristic_counter()
+
+        self.assertEqual(counter.truncate("abcdefghij", 2), "abcdefgh")
+        self.assertEqual(counter.truncate("abc", 0), "")
+
+class TestTokenBudget(unittest.TestCase):
+    def setUp(self):
+        self.counter = heuristic_counter()
+        # 12 characters of literal text: 3 tokens
+        self.template = compile_template('t', 'Video about {title}', {})
+
+    def test_fits_within_budget(self):
+        budget = TokenBudget(self.counter, context_window=100)
+
+        prompt, estimate = budget.fit(self.template, {'title': 'Rome'}, completion_tokens=50, overhead_tokens=5)
+
+        self.assertEqual(prompt, "Video about Rome")
+        self.assertEqual((estimate.prompt_tokens, estimate.completion_tokens, estimate.total_tokens), (9, 50, 59))
+        self.assertEqual(estimate.trimmed, [])
+
+    def test_trims_variables_to_fit(self):
+        budget = TokenBudget(self.counter, context_window=100, max_prompt_tokens=20, trim_variables=['title'])
+
+        prompt, estimate = budget.fit(self.template, {'title': 'x' * 400}, completion_tokens=50)
+
+        self.assertEqual(estimate.trimmed, ['title'])
+        self.assertLessEqual(estimate.prompt_tokens, 20)
+        self.assertEqual(prompt, "Video about " + "x" * 68)
+
+    def test_rejects_when_configured_or_not_trimmable(self):
+        values = {'title': 'x' * 400}
+        with self.assertRaises(TokenBudgetExceeded) as raised:
+            TokenBudget(self.counter, context_window=100, on_oversize="reject", trim_variables=['title']).fit(self.template, values, 50)
+        self.assertEqual((raised.exception.prompt_tokens, raised.exception.limit), (103, 50))
+
+        with self.assertRaises(TokenBudgetExceeded):
+            TokenBudget(self.counter, context_window=100).fit(self.template, values, 50)
+
+    def test_check_counts_a_rendered_prompt(self):
+        budget = TokenBudget(self.counter, context_window=100)
+
+        self.assertEqual(budget.check("x" * 40, 50, overhead_tokens=2).prompt_tokens, 12)
+        with self.assertRaises(TokenBudgetExceeded):
+            budget.check("x" * 400, 50)
+
+if __name__ == '__main__':
+    unittest.main()
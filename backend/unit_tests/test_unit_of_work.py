@@ -0,0 +1,80 @@
+import unittest
+import os
+import sys
+
+# Add the src directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(os.path.dirname(current_dir), 'src')
+sys.path.insert(0, src_dir)
+
+from unit_of_work import UnitOfWork
+
+class FakeActions:
+    def __init__(self, batcher, model):
+        self.batcher = batcher
+        self.model = model
+
+    def update_many(self, where, data):
+        self.batcher.statements.append((self.model, where, data))
+
+class FakeBatcher:
+    def __init__(self, client):
+        self.client = client
+        self.statements = []
+
+    def __getattr__(self, model):
+        return FakeActions(self, model)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            if self.client.fail:
+                raise RuntimeError("database is locked")
+            self.client.transactions.append(self.statements)
+
+class FakeClient:
+    def __init__(self):
+        self.transactions = []
+        self.fail = False
+
+    def batch_(self):
+        return FakeBatcher(self)
+
+class TestUnitOfWork(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.client = FakeClient()
+        self.unit_of_work = UnitOfWork(self.client)
+
+    async def test_commits_all_updates_in_one_transaction(self):
+        self.unit_of_work.update("visualprompt", {"contentId": 1, "sceneNumber": 1}, {"generatedUrl": "a.jpg"})
+        self.unit_of_work.update("content", {"id": 1}, {"generatedPicture": "a.jpg"})
+        self.unit_of_work.update("content", {"id": 1}, {"generatedMusic": "m.mp3"})
+
+        self.assertEqual(await self.unit_of_work.commit(), 2)
+
+        self.assertEqual(self.client.transactions, [[
+            ("visualprompt", {"contentId": 1, "sceneNumber": 1}, {"generatedUrl": "a.jpg"}),
+            ("content", {"id": 1}, {"generatedPicture": "a.jpg", "generatedMusic": "m.mp3"}),
+        ]])
+        self.assertEqual(self.unit_of_work.transactions, 1)
+        self.assertEqual(await self.unit_of_work.commit(), 0)
+        self.assertEqual(self.unit_of_work.transactions, 1)
+
+    async def test_keeps_updates_when_commit_fails(self):
+        self.unit_of_work.update("content", {"id": 1}, {"generatedMusic": "m.mp3"})
+        self.client.fail = True
+        with self.assertRaises(RuntimeError):
+            await self.unit_of_work.commit()
+        self.assertEqual(len(self.unit_of_work), 1)
+
+        self.client.fail = False
+        self.unit_of_work.update("content", {"id": 1}, {"generatedVideo": "v.mp4"})
+        await self.unit_of_work.commit()
+        self.assertEqual(self.client.transactions, [[
+            ("content", {"id": 1}, {"generatedMusic": "m.mp3", "generatedVideo": "v.mp4"}),
+        ]])
+
+if __name__ == '__main__':
+    unittest.main()
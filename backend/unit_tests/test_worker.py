@@ -0,0 +1,259 @@
+import asyncio
+import itertools
+import json
+import signal
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from src import worker
+from src.worker import ContentWorker, run_pool
+
+class FakeQueue:
+    lease_seconds = 60
+
+    def __init__(self, jobs=(), lease_held=True):
+        self.jobs = list(jobs)
+        self.lease_held = lease_held
+        self.claims = 0
+        self.checkpoints = []
+        self.completed = []
+        self.failed = []
+
+    async def claim(self, worker_id):
+        self.claims += 1
+        return self.jobs.pop(0) if self.jobs else None
+
+    async def heartbeat(self, job_id, worker_id):
+        return self.lease_held
+
+    async def save_checkpoint(self, job_id, worker_id, stage, checkpoint, content_id=None):
+        self.checkpoints.append((job_id, stage, dict(checkpoint), content_id))
+        return True
+
+    async def complete(self, job_id, worker_id, content_id=None):
+        self.completed.append((job_id, content_id))
+
+    async def fail(self, job_id, worker_id, error, attempts):
+        self.failed.append((job_id, error))
+        return "queued" if attempts < 3 else "failed"
+
+class FakePipeline:
+    def __init__(self, run=None):
+        self.calls = []
+        self.run = run
+
+    async def create_content(self, input_data, index, total_entries, progress_tracker, checkpoint=None, on_checkpoint=None, content_id=None,
+                             mark_failed=True):
+        self.calls.append({"checkpoint": checkpoint, "content_id": content_id})
+        if self.run:
+            await self.run(checkpoint, on_checkpoint)
+        return SimpleNamespace(id=content_id or 42)
+
+class FakeProgressTracker:
+    def __init__(self):
+        self.failures = []
+
+    def fail(self, content_id, error, retrying=False):
+        self.failures.append((content_id, error, retrying))
+
+def make_job(job_id, checkpoint=None, content_id=None, attempts=1):
+    return SimpleNamespace(
+        id=job_id, payload="{}", attempts=attempts, contentId=content_id,
+        checkpoint=json.dumps(checkpoint) if checkpoint is not None else None,
+    )
+
+class WorkerTestCase(unittest.IsolatedAsyncioTestCase):
+    def use_pipeline(self, pipeline):
+        for name, value in (('content_pipeline', pipeline), ('ContentCreationRequest', MagicMock())):
+            patcher = patch.object(worker, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def make_worker(self, queue, concurrency=1):
+        content_worker = ContentWorker("worker-test", queue=queue, concurrency=concurrency)
+        content_worker.poll_interval = 0.01
+        content_worker.heartbeat_interval = 0.01
+        return content_worker
+
+class TestProcessJob(WorkerTestCase):
+    async def test_resumes_from_the_stored_checkpoint(self):
+        checkpoint = {"script": {"content_id": 7, "generated_content": {}}, "image": ["a.jpg"]}
+
+        async def run(stages, on_checkpoint):
+            await on_checkpoint("voice", {**stages, "voice": ["a.mp3"]})
+
+        pipeline = FakePipeline(run)
+        self.use_pipeline(pipeline)
+        queue = FakeQueue()
+
+        await self.make_worker(queue).process_job(make_job(1, checkpoint, content_id=7))
+
+        self.assertEqual(pipeline.calls, [{"checkpoint": checkpoint, "content_id": 7}])
+        self.assertEqual(queue.checkpoints, [(1, "voice", {**checkpoint, "voice": ["a.mp3"]}, 7)])
+        self.assertEqual(queue.completed, [(1, 7)])
+        self.assertEqual(queue.failed, [])
+
+    async def test_pipeline_error_fails_the_job(self):
+        async def run(stages, on_checkpoint):
+            raise RuntimeError("boom")
+
+        self.use_pipeline(FakePipeline(run))
+        queue = FakeQueue()
+
+        await self.make_worker(queue).process_job(make_job(1))
+
+        self.assertEqual(queue.failed, [(1, "boom")])
+        self.assertEqual(queue.completed, [])
+
+    async def test_failed_job_reports_its_content(self):
+        async def run(stages, on_checkpoint):
+            await on_checkpoint("script", {"script": {"content_id": 9, "generated_content": {}}})
+            raise RuntimeError("boom")
+
+        self.use_pipeline(FakePipeline(run))
+        tracker = FakeProgressTracker()
+        with patch.object(worker, 'ProgressTracker', return_value=tracker):
+            await self.make_worker(FakeQueue()).process_job(make_job(1))
+            await self.make_worker(FakeQueue()).process_job(make_job(2, attempts=3))
+
+        # Pending while the job will run again, failed once it has no attempts left
+        self.assertEqual(tracker.failures, [(9, "boom", True), (9, "boom", False)])
+
+    async def test_failed_regeneration_reports_its_content_before_any_checkpoint(self):
+        async def run(stages, on_checkpoint):
+            raise RuntimeError("boom")
+
+        self.use_pipeline(FakePipeline(run))
+        tracker = FakeProgressTracker()
+        with patch.object(worker, 'ProgressTracker', return_value=tracker):
+            await self.make_worker(FakeQueue()).process_job(make_job(1, content_id=5))
+
+        # The content was set back to pending when the regeneration was enqueued
+        self.assertEqual(tracker.failures, [(5, "boom", True)])
+
+    async def test_losing_the_lease_cancels_the_job(self):
+        cancelled = asyncio.Event()
+
+        async def run(stages, on_checkpoint):
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        self.use_pipeline(FakePipeline(run))
+        queue = FakeQueue(lease_held=False)
+
+        await asyncio.wait_for(self.make_worker(queue).process_job(make_job(1)), 1)
+
+        self.assertTrue(cancelled.is_set())
+        # The job may already run elsewhere, so it is neither completed nor failed here
+        self.assertEqual((queue.completed, queue.failed), ([], []))
+
+class TestDrain(WorkerTestCase):
+    async def test_stop_finishes_jobs_in_progress_and_claims_no_more(self):
+        started = []
+        release = asyncio.Event()
+
+        async def run(stages, on_checkpoint):
+            started.append(len(started) + 1)
+            await release.wait()
+
+        self.use_pipeline(FakePipeline(run))
+        queue = FakeQueue([make_job(1), make_job(2), make_job(3)])
+        content_worker = self.make_worker(queue, concurrency=2)
+
+        running = asyncio.ensure_future(content_worker.run())
+        while len(started) < 2:
+            await asyncio.sleep(0.01)
+        content_worker.stop()
+        release.set()
+        await asyncio.wait_for(running, 1)
+
+        self.assertEqual(sorted(job_id for job_id, _ in queue.completed), [1, 2])
+        self.assertEqual([job.id for job in queue.jobs], [3])
+
+    async def test_idle_slots_stop_polling(self):
+        queue = FakeQueue()
+        content_worker = self.make_worker(queue, concurrency=3)
+
+        running = asyncio.ensure_future(content_worker.run())
+        await asyncio.sleep(0.05)
+        content_worker.stop()
+        await asyncio.wait_for(running, 1)
+
+        self.assertGreaterEqual(queue.claims, 3)
+
+class FakeProcess:
+    pids = itertools.count(1000)
+
+    def __init__(self, pool, drains, target=None, args=(), name=None):
+        self.pool = pool
+        self.drains = drains
+        self.name = name
+        self.pid = None
+        self.exited = False
+        self.killed = False
+        self.terminated = False
+
+    def start(self):
+        self.pid = next(self.pids)
+
+    def is_alive(self):
+        return self.pid is not None and not self.exited
+
+    def join(self, timeout=None):
+        self.pool.on_join()
+
+    def kill(self):
+        self.killed = True
+        self.exited = True
+
+class FakePool:
+    """
+    Spawn context whose processes receive SIGTERM on the first join and exit on it if they drain.
+    """
+    def __init__(self, drains):
+        self.drains = drains
+        self.processes = []
+        self.handlers = {}
+        self.clock = itertools.count()
+
+    def Process(self, **kwargs):
+        process = FakeProcess(self, self.drains[len(self.processes)], **kwargs)
+        self.processes.append(process)
+        return process
+
+    def on_join(self):
+        if not any(process.terminated for process in self.processes):
+            self.handlers[signal.SIGTERM](signal.SIGTERM, None)
+
+    def kill(self, pid, signum):
+        process = next(process for process in self.processes if process.pid == pid)
+        process.terminated = True
+        if process.drains:
+            process.exited = True
+
+class TestRunPool(unittest.TestCase):
+    def run_pool(self, drains, drain_timeout):
+        pool = FakePool(drains)
+        with patch.object(worker.multiprocessing, 'get_context', return_value=pool), \
+                patch.object(worker, 'os', SimpleNamespace(kill=pool.kill)), \
+                patch.object(worker.signal, 'signal', side_effect=lambda signum, handler: pool.handlers.__setitem__(signum, handler)), \
+                patch.object(worker, 'time', SimpleNamespace(monotonic=lambda: float(next(pool.clock)))):
+            run_pool(len(drains), drain_timeout=drain_timeout)
+        return pool.processes
+
+    def test_sigterm_is_forwarded_and_draining_processes_exit(self):
+        processes = self.run_pool([True, True], drain_timeout=30)
+
+        self.assertTrue(all(process.terminated for process in processes))
+        self.assertFalse(any(process.killed for process in processes))
+
+    def test_processes_that_do_not_drain_in_time_are_killed(self):
+        processes = self.run_pool([True, False], drain_timeout=3)
+
+        self.assertEqual([process.killed for process in processes], [False, True])
+
+if __name__ == '__main__':
+    unittest.main()
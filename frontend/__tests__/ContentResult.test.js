@@ -1,6 +1,7 @@
 import React from 'react';
 import { render, screen, waitFor } from '@testing-library/react';
 import ContentResult from '../pages/content-result';
+import { useProgress } from '../hooks/useProgress';
 
 // Mock the next/router
 jest.mock('next/router', () => ({
@@ -12,6 +13,11 @@ jest.mock('next/router', () => ({
 // Mock the Layout component
 jest.mock('../components/Layout', () => ({ children }) => <div>{children}</div>);
 
+// Mock the progress stream
+jest.mock('../hooks/useProgress', () => ({
+  useProgress: jest.fn(() => ({ progress: null, error: null })),
+}));
+
 // Mock fetch globally
 global.fetch = jest.fn();
 
@@ -20,6 +26,7 @@ describe('ContentResult', () => {
 
   beforeEach(() => {
     jest.clearAllMocks();
+    useProgress.mockReturnValue({ progress: null, error: null });
     consoleErrorSpy = jest.spyOn(console, 'error').mockImplementation(() => {});
   });
 
@@ -173,6 +180,62 @@ describe('ContentResult', () => {
     });
   });
 
+  test('displays the narration of each scene', async () => {
+    const mockContent = {
+      audioPrompts: [
+        { type: 'narration', sceneNumber: 2, description: 'Second', generatedUrl: 'https://example.com/voice-2.mp3' },
+        { type: 'narration', sceneNumber: 1, description: 'First', generatedUrl: 'https://example.com/voice-1.mp3' },
+        { type: 'narration', sceneNumber: 3, description: 'Third', generatedUrl: null },
+      ],
+    };
+
+    global.fetch.mockResolvedValueOnce({
+      ok: true,
+      json: () => Promise.resolve(mockContent),
+    });
+
+    render(<ContentResult />);
+
+    await waitFor(() => {
+      expect(screen.getByText('Generated Narration')).toBeInTheDocument();
+      expect(screen.getByTestId('narration-audio-1')).toHaveAttribute('src', 'https://example.com/voice-1.mp3');
+      expect(screen.getByTestId('narration-audio-2')).toHaveAttribute('src', 'https://example.com/voice-2.mp3');
+    });
+    expect(screen.queryByTestId('narration-audio-3')).not.toBeInTheDocument();
+    expect(screen.queryByTestId('voice-audio')).not.toBeInTheDocument();
+  });
+
+  test('displays the progress of a content being generated', async () => {
+    useProgress.mockReturnValue({ progress: { status: 'processing', progress: 40, currentStep: 'images generated' }, error: null });
+    global.fetch.mockResolvedValueOnce({
+      ok: true,
+      json: () => Promise.resolve({ title: 'Test Title', status: 'processing' }),
+    });
+
+    render(<ContentResult />);
+
+    await waitFor(() => {
+      expect(screen.getByTestId('content-progress')).toBeInTheDocument();
+      expect(screen.getByText('images generated')).toBeInTheDocument();
+    });
+    expect(useProgress).toHaveBeenLastCalledWith('123');
+  });
+
+  test('loads the content again once its generation has finished', async () => {
+    useProgress.mockReturnValue({ progress: { status: 'completed', progress: 100 }, error: null });
+    global.fetch
+      .mockResolvedValueOnce({ ok: true, json: () => Promise.resolve({ title: 'Test Title', status: 'processing' }) })
+      .mockResolvedValueOnce({ ok: true, json: () => Promise.resolve({ title: 'Test Title', status: 'completed' }) });
+
+    render(<ContentResult />);
+
+    await waitFor(() => {
+      expect(global.fetch).toHaveBeenCalledTimes(2);
+      expect(screen.queryByTestId('content-progress')).not.toBeInTheDocument();
+    });
+    expect(useProgress).toHaveBeenLastCalledWith(null);
+  });
+
   test('displays error state when content has error status', async () => {
     const mockContent = {
       status: 'error',
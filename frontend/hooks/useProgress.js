@@ -1,7 +1,9 @@
 // hooks/useProgress.js
 
 import { useState, useEffect } from 'react';
-import { getContentProgress } from '../utils/api';
+import { getContentProgress, getContentProgressStreamUrl } from '../utils/api';
+
+const isFinished = (progressData) => ['completed', 'failed'].includes(progressData.status);
 
 export const useProgress = (contentId) => {
   const [progress, setProgress] = useState(null);
@@ -9,13 +11,14 @@ export const useProgress = (contentId) => {
 
   useEffect(() => {
     let intervalId;
+    let eventSource;
 
     const pollProgress = async () => {
       try {
         const progressData = await getContentProgress(contentId);
         setProgress(progressData);
 
-        if (progressData.status === 'completed') {
+        if (isFinished(progressData)) {
           clearInterval(intervalId);
         }
       } catch (err) {
@@ -24,11 +27,41 @@ export const useProgress = (contentId) => {
       }
     };
 
+    // Polling stays as the fallback when server-sent events are unavailable
+    const startPolling = () => {
+      if (!intervalId) {
+        intervalId = setInterval(pollProgress, 2000);
+      }
+    };
+
     if (contentId) {
-      intervalId = setInterval(pollProgress, 2000);
+      if (typeof EventSource === 'undefined') {
+        startPolling();
+      } else {
+        eventSource = new EventSource(getContentProgressStreamUrl(contentId));
+
+        eventSource.onmessage = (event) => {
+          const progressData = JSON.parse(event.data);
+          setProgress(progressData);
+
+          if (isFinished(progressData)) {
+            eventSource.close();
+          }
+        };
+
+        eventSource.onerror = () => {
+          // EventSource reconnects with Last-Event-ID by itself; only give up once it is closed
+          if (eventSource.readyState === EventSource.CLOSED) {
+            startPolling();
+          }
+        };
+      }
     }
 
     return () => {
+      if (eventSource) {
+        eventSource.close();
+      }
       if (intervalId) {
         clearInterval(intervalId);
       }
@@ -36,4 +69,4 @@ export const useProgress = (contentId) => {
   }, [contentId]);
 
   return { progress, error };
-};
\ No newline at end of file
+};
@@ -1,6 +1,8 @@
 import React, { useState, useEffect } from 'react';
 import { useRouter } from 'next/router';
 import Layout from '../components/Layout';
+import ProgressBar from '../components/ProgressBar';
+import { useProgress } from '../hooks/useProgress';
 
 const ContentResult = () => {
   const router = useRouter();
@@ -8,6 +10,9 @@ const ContentResult = () => {
   const [content, setContent] = useState(null);
   const [error, setError] = useState('');
   const [isLoading, setIsLoading] = useState(true);
+  // Progress is streamed only while the content is being generated
+  const inProgress = Boolean(content && ['pending', 'processing'].includes(content.status));
+  const { progress } = useProgress(inProgress ? id : null);
 
   useEffect(() => {
     if (id) {
@@ -15,6 +20,13 @@ const ContentResult = () => {
     }
   }, [id]);
 
+  useEffect(() => {
+    // The generated assets are only stored with the content, so it is loaded again once finished
+    if (inProgress && progress && ['completed', 'failed'].includes(progress.status)) {
+      fetchContent(id);
+    }
+  }, [progress, inProgress]);
+
   const fetchContent = async (contentId) => {
     try {
       const response = await fetch(`/api/content/${contentId}`);
@@ -43,9 +55,20 @@ const ContentResult = () => {
     return <Layout><div>No content available.</div></Layout>;
   }
 
+  // Narration is generated per scene; generatedVoice only exists on older contents
+  const narration = (content.audioPrompts || [])
+    .filter((prompt) => prompt.generatedUrl)
+    .sort((a, b) => a.sceneNumber - b.sceneNumber);
+
   return (
     <Layout>
       <h1 className="text-2xl font-bold mb-4">{content.title}</h1>
+      {inProgress && (
+        <div className="mb-4" data-testid="content-progress">
+          <p className="mb-2">{(progress && progress.currentStep) || 'Waiting to start...'}</p>
+          <ProgressBar progress={(progress && progress.progress) || 0} />
+        </div>
+      )}
       <p className="mb-2">{content.description}</p>
       <p className="mb-2">Target Audience: {content.targetAudience}</p>
       <p className="mb-2">Duration: {content.duration} seconds</p>
@@ -85,7 +108,21 @@ const ContentResult = () => {
         </div>
       )}
 
-      {content.generatedVoice && (
+      {narration.length > 0 && (
+        <div className="mb-4">
+          <h2 className="text-xl font-bold mt-4 mb-2">Generated Narration</h2>
+          {narration.map((prompt) => (
+            <div key={prompt.sceneNumber} className="mb-2">
+              <h4 className="font-semibold">Scene {prompt.sceneNumber}</h4>
+              <audio controls src={prompt.generatedUrl} data-testid={`narration-audio-${prompt.sceneNumber}`}>
+                Your browser does not support the audio element.
+              </audio>
+            </div>
+          ))}
+        </div>
+      )}
+
+      {narration.length === 0 && content.generatedVoice && (
         <div className="mb-4">
           <h2 className="text-xl font-bold mt-4 mb-2">Generated Voice</h2>
           <audio controls src={content.generatedVoice} data-testid="voice-audio">
@@ -1,4 +1,5 @@
 const API_BASE_URL = '/api'; // Adjust this if your API has a different base URL
+const BACKEND_URL = process.env.NEXT_PUBLIC_BACKEND_URL || 'http://localhost:5000'; // Flask server, for streaming endpoints
 
 export const api = {
   async get(endpoint) {
@@ -28,4 +29,24 @@ export const api = {
 
 export const createContent = (formData) => api.post('/create-content', formData);
 export const getContentProgress = (id) => api.get(`/content-progress/${id}`);
-export const getContent = (id) => api.get(`/get-content/${id}`);
\ No newline at end of file
+export const getContent = async (id) => {
+  // Served by the backend's content cache; completed contents are cached there indefinitely
+  const response = await fetch(`${BACKEND_URL}/api/contents/${id}`);
+  if (!response.ok) {
+    throw new Error(`HTTP error! status: ${response.status}`);
+  }
+  return response.json();
+};
+export const getContents = async ({ status, cursor, limit } = {}) => {
+  const params = new URLSearchParams();
+  if (status) params.set('status', Array.isArray(status) ? status.join(',') : status);
+  if (cursor) params.set('cursor', cursor);
+  if (limit) params.set('limit', limit);
+  // The browser revalidates with the page's ETag and reuses its cached copy on 304
+  const response = await fetch(`${BACKEND_URL}/api/contents?${params}`);
+  if (!response.ok) {
+    throw new Error(`HTTP error! status: ${response.status}`);
+  }
+  return response.json();
+};
+export const getContentProgressStreamUrl = (id) => `${BACKEND_URL}/api/content-progress/${id}/stream`;
\ No newline at end of file
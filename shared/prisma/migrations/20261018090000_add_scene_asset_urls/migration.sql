@@ -0,0 +1,5 @@
+-- AlterTable
+ALTER TABLE "AudioPrompt" ADD COLUMN "generatedUrl" TEXT;
+
+-- AlterTable
+ALTER TABLE "VisualPrompt" ADD COLUMN "generatedUrl" TEXT;
@@ -0,0 +1,11 @@
+-- CreateIndex
+CREATE INDEX "Content_status_createdAt_idx" ON "Content"("status", "createdAt");
+
+-- CreateIndex
+CREATE INDEX "Scene_contentId_idx" ON "Scene"("contentId");
+
+-- CreateIndex
+CREATE INDEX "AudioPrompt_contentId_sceneNumber_idx" ON "AudioPrompt"("contentId", "sceneNumber");
+
+-- CreateIndex
+CREATE INDEX "VisualPrompt_contentId_sceneNumber_idx" ON "VisualPrompt"("contentId", "sceneNumber");
@@ -0,0 +1,2 @@
+-- CreateIndex
+CREATE INDEX "Content_createdAt_id_idx" ON "Content"("createdAt", "id");
@@ -0,0 +1,17 @@
+-- CreateTable
+CREATE TABLE "TokenUsage" (
+    "id" INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+    "stage" TEXT NOT NULL,
+    "model" TEXT NOT NULL,
+    "promptTokens" INTEGER NOT NULL DEFAULT 0,
+    "completionTokens" INTEGER NOT NULL DEFAULT 0,
+    "estimatedPromptTokens" INTEGER NOT NULL DEFAULT 0,
+    "estimatedCompletionTokens" INTEGER NOT NULL DEFAULT 0,
+    "cached" BOOLEAN NOT NULL DEFAULT false,
+    "createdAt" DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "contentId" INTEGER NOT NULL,
+    CONSTRAINT "TokenUsage_contentId_fkey" FOREIGN KEY ("contentId") REFERENCES "Content" ("id") ON DELETE CASCADE ON UPDATE CASCADE
+);
+
+-- CreateIndex
+CREATE INDEX "TokenUsage_contentId_idx" ON "TokenUsage"("contentId");
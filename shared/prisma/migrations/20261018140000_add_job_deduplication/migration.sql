@@ -0,0 +1,9 @@
+-- AlterTable
+ALTER TABLE "Job" ADD COLUMN "requestHash" TEXT;
+ALTER TABLE "Job" ADD COLUMN "idempotencyKey" TEXT;
+
+-- CreateIndex
+CREATE UNIQUE INDEX "Job_idempotencyKey_key" ON "Job"("idempotencyKey");
+
+-- CreateIndex
+CREATE INDEX "Job_requestHash_status_idx" ON "Job"("requestHash", "status");
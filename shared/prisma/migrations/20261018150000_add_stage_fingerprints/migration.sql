@@ -0,0 +1,2 @@
+-- AlterTable
+ALTER TABLE "Content" ADD COLUMN "stageFingerprints" TEXT;
@@ -29,12 +29,14 @@ export interface GeneralOptions {
     type: 'OPENING' | 'MAIN' | 'CLOSING';
     sceneNumber: number;
     description: string;
+    generatedUrl: string | null;
   }
   
   export interface AudioPrompt {
     type: string;
     sceneNumber: number;
     description: string;
+    generatedUrl: string | null;
   }
   
   export interface MusicPrompt {